@@ -0,0 +1,96 @@
+# Mode acteurs / learner (core.rl.trainers.actor_learner) : poids partagés, files de transitions
+# et quelques centaines de pas d'entraînement avec un acteur (test de fumée, torch requis)
+# Usage : python -m benchmarks.bench_actor_learner
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from core.rl.replay_buffer import ReplayBuffer
+from core.rl.trainers.actor_learner import SharedWeights, TransitionRing, train_actor_learner
+
+
+def check_weights():
+    # Publication / rechargement : mêmes poids (BatchNorm compris : compteur entier), une fois par version
+    torch.manual_seed(0)
+    learner = nn.Sequential(nn.Linear(4, 3), nn.BatchNorm1d(3))
+    actor = nn.Sequential(nn.Linear(4, 3), nn.BatchNorm1d(3))
+    learner(torch.randn(8, 4))  # statistiques de BatchNorm non nulles
+    weights = SharedWeights(learner)
+    try:
+        reader = SharedWeights(actor, weights.names())
+        assert not reader.load(actor), "rien de publié, rien à charger"
+        weights.publish(learner)
+        assert reader.load(actor) and not reader.load(actor)
+        for (key, a), b in zip(learner.state_dict().items(), actor.state_dict().values()):
+            assert a.dtype == b.dtype and torch.equal(a, b), f"{key} différent après rechargement"
+        reader.close()
+    finally:
+        weights.close()
+    print("check poids partagés : state_dict identique après publication, un chargement par version")
+
+
+def check_ring(n_streams=2, steps=40, shape=(2, 4, 4)):
+    # Deux environnements poussés à tour de rôle, vidés dans le replay buffer : transitions intactes,
+    # une observation par transition (plus le premier état de chaque flux)
+    ring = TransitionRing(16, 3, shape)
+    buffer = ReplayBuffer(1000)
+    rng = np.random.default_rng(0)
+    state = [(rng.random(3, dtype=np.float32), rng.random(shape, dtype=np.float32)) for _ in range(n_streams)]
+    pushed = []
+    try:
+        for t in range(steps):
+            for k in range(n_streams):
+                nxt = (rng.random(3, dtype=np.float32), rng.random(shape, dtype=np.float32))
+                pushed.append(state[k] + (len(pushed), float(len(pushed))) + nxt + (False,))
+                assert ring.push(*pushed[-1], stream=k)
+                state[k] = nxt
+            if t % 3 == 0:
+                ring.drain(buffer)
+        ring.drain(buffer)
+    finally:
+        ring.close()
+    assert len(buffer) == len(pushed) and buffer.obs_written == len(pushed) + n_streams
+    batch = buffer.gather(np.arange(len(pushed)))
+    for row, ref in enumerate(pushed):
+        assert batch[2][row] == ref[2] and np.array_equal(batch[0][row], ref[0]) and np.array_equal(batch[5][row], ref[5])
+    print(f"check file de transitions : {len(pushed)} transitions de {n_streams} flux intactes,"
+          f" {buffer.obs_written} observations stockées")
+
+
+def smoke(n_actors=1, envs_per_actor=2, total_steps=300, max_steps=100):
+    start = time.perf_counter()
+    trainer, stats = train_actor_learner(n_actors=n_actors, envs_per_actor=envs_per_actor, total_steps=total_steps,
+                                         max_steps=max_steps, publish_every=2, report_every=float("inf"))
+    buffer = trainer.replay_buffer
+    assert stats["actor_steps"] >= total_steps and stats["updates"] >= 1
+    # Toutes les transitions poussées sont dans le replay (l'acteur arrêté en cours de pas en a poussé d'avance)
+    assert stats["actor_steps"] <= len(buffer) <= stats["actor_steps"] + n_actors * envs_per_actor
+    # Sans flux par environnement : deux observations par transition
+    assert buffer.obs_written < 1.5 * len(buffer), "observations non partagées entre transitions"
+    assert trainer.epsilon < trainer.epsilon_start
+    print(f"{n_actors} acteur(s) x {envs_per_actor} env. | {stats['actor_steps']} pas, {stats['updates']} mises à jour"
+          f" en {time.perf_counter() - start:.1f} s ({stats['actor_steps_per_s']:.1f} pas/s,"
+          f" {stats['updates_per_s']:.2f} mises à jour/s) | replay {len(buffer)} transitions,"
+          f" {buffer.obs_written} observations | epsilon {trainer.epsilon:.3f}")
+
+
+def check_crash():
+    # Acteur qui plante au démarrage (aucun environnement) : le learner lève au lieu d'attendre ses pas
+    start = time.perf_counter()
+    try:
+        train_actor_learner(n_actors=1, envs_per_actor=0, total_steps=10, report_every=float("inf"))
+    except RuntimeError as error:
+        assert "acteur 0" in str(error), error
+        message = str(error)
+    else:
+        raise AssertionError("acteur planté non détecté")
+    print(f"check acteur planté : RuntimeError en {time.perf_counter() - start:.1f} s ({message})")
+
+
+if __name__ == "__main__":
+    check_weights()
+    check_ring()
+    check_crash()
+    smoke()
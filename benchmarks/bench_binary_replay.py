@@ -0,0 +1,138 @@
+# Replay binaire (core.binary_replay : statiques une fois, colonnes float32, deltas entre keyframes)
+# vs épisodes JSON de viewer/data : taille, temps d'écriture, lecture complète et accès direct
+# Usage : python -m benchmarks.bench_binary_replay
+import glob
+import json
+import math
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from core.binary_replay import BinaryReplayReader, BinaryReplayWriter, convert_replay, load_frames
+from core.environment import Environment
+from core.frame_writer import FrameWriter, numpy_default, read_frames
+
+
+def close(a, b):
+    # Égalité aux arrondis float32 près (les types sont conservés)
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(close(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(close(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return type(a) == type(b) and math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-4)
+    return type(a) == type(b) and a == b
+
+
+def same_objects(xs, ys):
+    # Mêmes objets à l'ordre près (le replay range les statiques avant les blocs par sorte)
+    pool = list(ys)
+    for obj in xs:
+        match = next((j for j, other in enumerate(pool) if close(obj, other)), None)
+        if match is None:
+            return False
+        pool.pop(match)
+    return not pool
+
+
+def same_frames(original, decoded):
+    for frame, other in zip(original, decoded):
+        if not same_objects(frame['objects'], other['objects']) or len(frame['agents']) != len(other['agents']):
+            return False
+        for entry, decoded_entry in zip(frame['agents'], other['agents']):
+            fields = lambda e: {k: v for k, v in e.items() if k != 'visible'}
+            if not close(fields(entry), fields(decoded_entry)):
+                return False
+            if not same_objects([frame['objects'][i] for i in entry['visible']],
+                                [other['objects'][i] for i in decoded_entry['visible']]):
+                return False
+    return len(original) == len(decoded)
+
+
+def without_ids(value):
+    # Les ids d'agents viennent d'un compteur global : ils diffèrent d'un Environment à l'autre
+    if isinstance(value, dict):
+        return {k: without_ids(v) for k, v in value.items() if k != 'id'}
+    if isinstance(value, list):
+        return [without_ids(v) for v in value]
+    return value
+
+
+def check(tmp, seed=4, steps=120):
+    # Frames d'une simulation écrites en direct (Environment(writer=...)) vs history
+    random.seed(seed)
+    np.random.seed(seed)
+    path = os.path.join(tmp, "check.replay")
+    env = Environment()
+    with BinaryReplayWriter(path, keyframe_every=16) as writer:
+        env.writer = writer
+        env.run(steps)
+    random.seed(seed)
+    np.random.seed(seed)
+    reference = Environment()
+    reference.run(steps)
+    history = json.loads(json.dumps(list(reference.history), default=numpy_default))
+    reader = BinaryReplayReader(path)
+    frames = list(reader)
+    assert same_frames(without_ids(history), without_ids(frames)), "replay différent de l'historique"
+    for t in random.sample(range(steps), 10):
+        assert reader.frame(t) == frames[t], f"accès direct à la frame {t} différent"
+    print(f"check : {steps} frames relues (arrondis float32), accès direct par l'index conforme")
+
+
+def check_crash(tmp, seed=5, steps=120):
+    # Épisode de main.train_dqn interrompu : frames écrites en JSON Lines (FrameWriter) avant le crash,
+    # fichier coupé au milieu d'une ligne ; convert_replay reprend toutes les frames complètes
+    random.seed(seed)
+    np.random.seed(seed)
+    source = os.path.join(tmp, "crash.jsonl")
+    writer = FrameWriter(source)
+    env = Environment(writer=writer)
+    env.run(steps)
+    writer.close()
+    with open(source, "rb") as f:
+        lines = f.read().split(b"\n")
+    kept = steps // 2
+    with open(source, "wb") as f:
+        f.write(b"\n".join(lines[:kept]) + b"\n" + lines[kept][:len(lines[kept]) // 2])
+    target = os.path.join(tmp, "crash.replay")
+    assert convert_replay(source, target) == kept
+    assert same_frames(load_frames(source), list(BinaryReplayReader(target))), "replay différent des frames écrites"
+    assert len(read_frames(source)) == kept
+    print(f"check crash : {kept} frames complètes sur {steps} reprises d'un JSON Lines coupé, converties en replay")
+
+
+def run(tmp):
+    episodes = sorted(glob.glob("viewer/data/episode_*.json"), key=lambda p: int(p.split("_")[-1][:-5]))
+    total_json = total_binary = 0
+    for source in episodes:
+        target = os.path.join(tmp, os.path.basename(source)[:-5] + ".replay")
+        start = time.perf_counter()
+        convert_replay(source, target)
+        t_write = time.perf_counter() - start
+        reader = BinaryReplayReader(target)
+        start = time.perf_counter()
+        frames = list(reader)
+        t_read = time.perf_counter() - start
+        assert same_frames(load_frames(source), frames), f"{source} : replay différent"
+        start = time.perf_counter()
+        for t in range(0, len(reader), 7):
+            reader.frame(t)  # pas de 7 : chaque accès repart de la keyframe précédente
+        t_seek = (time.perf_counter() - start) / len(range(0, len(reader), 7))
+        size_json, size_binary = os.path.getsize(source), os.path.getsize(target)
+        total_json += size_json
+        total_binary += size_binary
+        print(f"{os.path.basename(source):<17} {len(frames):>4} frames | JSON {size_json / 2 ** 20:5.2f} Mo"
+              f" -> {size_binary / 2 ** 10:6.1f} Ko (x{size_json / size_binary:5.1f}) | conversion {t_write * 1e3:6.1f} ms"
+              f" | lecture {t_read * 1e3:6.1f} ms | accès direct {t_seek * 1e3:5.2f} ms")
+    print(f"total : {total_json / 2 ** 20:.1f} Mo -> {total_binary / 2 ** 20:.2f} Mo (x{total_json / total_binary:.1f})")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        check(tmp)
+        check_crash(tmp)
+        run(tmp)
@@ -0,0 +1,146 @@
+# Historique en colonnes NumPy (core.column_recorder) vs Environment.history en dicts :
+# coût de l'enregistrement par step, mémoire retenue en fin de run, temps d'export et pistes des entités éphémères
+# Usage : python -m benchmarks.bench_column_recorder
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+
+from core.agents.agent import Agent
+from core.column_recorder import ColumnRecorder
+from core.environment import RECORD_AGENTS, RECORD_FULL, RECORD_OFF, Environment
+from core.frame_writer import numpy_default
+
+CONFIGS = {
+    "off": dict(record=RECORD_OFF),
+    "history (dicts)": dict(record=RECORD_FULL),
+    "ColumnRecorder": dict(record=RECORD_FULL, recorder=True),
+}
+
+
+def simulate(seed, steps, recorder=False, **kwargs):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment(recorder=ColumnRecorder() if recorder else None, **kwargs)
+    env.run(steps)
+    return env
+
+
+def without_ids(value):
+    # Les ids viennent d'un compteur global : ils diffèrent d'un Environment à l'autre
+    if isinstance(value, dict):
+        return {k: without_ids(v) for k, v in value.items() if k != 'id'}
+    if isinstance(value, list):
+        return [without_ids(v) for v in value]
+    return value
+
+
+def as_json(frames):
+    return without_ids(json.loads(json.dumps(list(frames), default=numpy_default)))
+
+
+def check(steps=300):
+    # Frames reconstruites identiques à l'historique en dicts (niveaux, 1 frame sur N, graines)
+    cases = [(0, {}), (1, {}), (2, dict(record=RECORD_AGENTS)), (3, dict(record_every=4))]
+    for seed, kwargs in cases:
+        reference = simulate(seed, steps, **kwargs)
+        env = simulate(seed, steps, recorder=True, **kwargs)
+        assert env.history == [], "le recorder remplace history"
+        assert as_json(env.recorder.frames()) == as_json(reference.history), f"frames différentes ({seed}, {kwargs})"
+        tracks = env.recorder.tracks()
+        assert all(first <= last < len(env.recorder) for _, first, last in tracks)
+    print(f"check : {len(cases)} simulations de {steps} steps, frames identiques à l'historique en dicts")
+
+
+def measure(label, steps):
+    # Mémoire allouée encore vivante en fin de run (tracemalloc, hors chrono) et temps d'export
+    tracemalloc.start()
+    env = simulate(0, steps, **CONFIGS[label])
+    retained = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        env.export(os.path.join(tmp, "output.json"))
+        t_export = time.perf_counter() - start
+    size = env.recorder.nbytes() / 2 ** 20 if env.recorder is not None else None
+    return retained, size, t_export
+
+
+# Méthodes qui font l'enregistrement, par configuration
+RECORDING = {
+    "history (dicts)": ((Agent, "to_dict"), (Agent, "get_orientation"), (Environment, "_record_frame")),
+    "ColumnRecorder": ((ColumnRecorder, "record_agent"), (ColumnRecorder, "end_frame")),
+}
+
+
+def timed(methods, spent):
+    # Remplace les méthodes par des versions chronométrées (temps CPU, appels imbriqués comptés une fois)
+    originals = [(cls, name, getattr(cls, name)) for cls, name in methods]
+    depth = [0]
+
+    def wrap(method):
+        def timed_method(*args, **kwargs):
+            depth[0] += 1
+            start = time.process_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                depth[0] -= 1
+                if depth[0] == 0:
+                    spent[0] += time.process_time() - start
+        return timed_method
+
+    for cls, name, method in originals:
+        setattr(cls, name, wrap(method))
+    return lambda: [setattr(cls, name, method) for cls, name, method in originals]
+
+
+def run(steps=1000, rounds=5):
+    # Temps CPU, configurations alternées à chaque tour (machine bruitée), médiane de chacune ;
+    # coût de l'enregistrement mesuré aussi directement dans les méthodes qui le font
+    times = {label: [] for label in CONFIGS}
+    recording = {label: [] for label in RECORDING}
+    for _ in range(rounds):
+        for label, kwargs in CONFIGS.items():
+            start = time.process_time()
+            simulate(0, steps, **kwargs)
+            times[label].append(time.process_time() - start)
+        for label, methods in RECORDING.items():
+            spent = [0.0]
+            restore = timed(methods, spent)
+            try:
+                simulate(0, steps, **CONFIGS[label])
+            finally:
+                restore()
+            recording[label].append(spent[0])
+    off = np.median(times["off"])
+    print(f"run_simulation, {steps} steps")
+    for label in CONFIGS:
+        retained, size, t_export = measure(label, steps)
+        columns = f" (colonnes {size:5.2f} Mo)" if size is not None else ""
+        t = np.median(times[label])
+        cost = f"enregistrement {1e3 * np.median(recording[label]) / steps:5.3f} ms/step" if label in recording else ""
+        print(f"{label:<16} | {1e3 * t / steps:5.2f} ms/step ({t / off - 1:+4.0%}) {cost:<32}"
+              f" | mémoire retenue {retained:6.1f} Mo{columns:<20} | export {t_export:5.2f} s")
+
+
+def tracks(steps=1000):
+    # Entités apparues / disparues en cours d'épisode : une piste [première, dernière frame] chacune
+    env = simulate(0, steps, recorder=True)
+    spans = Counter()
+    counts = Counter()
+    for etype, first, last in env.recorder.tracks():
+        counts[etype] += 1
+        spans[etype] += last - first + 1
+    print("pistes : " + ", ".join(f"{etype} {n} (durée moy. {spans[etype] / n:.0f} frames)" for etype, n in counts.most_common()))
+
+
+if __name__ == "__main__":
+    check()
+    run()
+    tracks()
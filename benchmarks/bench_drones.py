@@ -0,0 +1,76 @@
+# Noyau de drones (core.drone_kernel) vs mise à jour scalaire drone par drone
+# Usage : python -m benchmarks.bench_drones
+import random
+import time
+
+import numpy as np
+
+from core.drone_kernel import PATTERNS, DroneKernel
+from core.enemys.elite_drone import EliteDrone
+from core.enemys.enemy_drone import EnemyDrone
+from core.environment import Environment
+
+
+class ScalarDrones:
+    # Pas de plan : chaque drone reprend son code d'origine
+    def plan(self, env):
+        pass
+
+    def plan_for(self, drone):
+        return None
+
+
+def build(n_drones, seed, mode):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment()
+    if mode == "scalaire":
+        env.drones = ScalarDrones()
+    elif mode == "tout vectorisé":
+        env.drones = DroneKernel(patrol_batch_min=0)
+    for k in range(n_drones):
+        x, y = np.random.uniform(50, 450, 2)
+        drone = EnemyDrone(x, y, patrol_radius=np.random.uniform(10, 60), radius=2.2,
+                           patrol_type=PATTERNS[k % len(PATTERNS)])
+        drone.angle = np.random.uniform(0, 6)
+        env.spawn_entity(drone)
+    for k in range(max(1, n_drones // 10)):
+        x, y = np.random.uniform(50, 450, 2)
+        env.spawn_entity(EliteDrone(x, y, patrol_radius=30, radius=2.5, patrol_type=PATTERNS[k % len(PATTERNS)]))
+    return env
+
+
+def trace(env, steps):
+    out = []
+    for _ in range(steps):
+        env.step()
+        out.append([(o.x, o.y, getattr(o, "angle", None)) for o in env.objects
+                    if isinstance(o, (EnemyDrone, EliteDrone))])
+    return out
+
+
+def drone_ticks(env, steps):
+    # Seulement le coût des drones : plan du noyau + update() de chaque drone
+    drones = [o for o in env.objects if isinstance(o, (EnemyDrone, EliteDrone))]
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.drones.plan(env)
+        for d in drones:
+            d.update(env)
+    return (time.perf_counter() - start) / steps
+
+
+MODES = ("scalaire", "noyau", "tout vectorisé")
+
+
+def run(n_drones, steps=150):
+    traces = [trace(build(n_drones, n_drones, mode), steps) for mode in MODES]
+    assert traces[0] == traces[1] == traces[2], "trajectoires différentes"
+    timings = [drone_ticks(build(n_drones, n_drones, mode), steps) for mode in MODES]
+    print(f"{n_drones:>4} drones | " + " | ".join(f"{mode} {1e3 * t:5.2f} ms/tick" for mode, t in zip(MODES, timings))
+          + f" | trajectoires identiques sur {steps} steps")
+
+
+if __name__ == "__main__":
+    for n in (5, 15, 50, 200):
+        run(n)
@@ -0,0 +1,85 @@
+# Mémoire par entité et allocations par step (EntityStore / vues __slots__)
+# Usage : python -m benchmarks.bench_entity_store
+import gc
+import importlib
+import pkgutil
+import random
+import sys
+import tracemalloc
+
+import numpy as np
+
+import core.agents
+import core.enemys
+import core.objects
+from core.enemys.enemy_drone import EnemyDrone
+from core.entity import Entity
+from core.environment import Environment
+from core.objects.projectile import Projectile
+from core.objects.rockWall import RockWall
+
+try:
+    from core.entity_store import STORE
+except ImportError:  # arbre sans EntityStore (mesure "avant")
+    STORE = None
+
+
+def subclasses(cls):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from subclasses(sub)
+
+
+def check_slots():
+    # Toutes les entités du jeu sont des vues __slots__ : aucune instance ne porte de __dict__
+    for package in (core.agents, core.enemys, core.objects):
+        for module in pkgutil.walk_packages(package.__path__, package.__name__ + "."):
+            importlib.import_module(module.name)
+    classes = sorted(set(subclasses(Entity)), key=lambda c: (c.__module__, c.__name__))
+    with_dict = [f"{c.__module__}.{c.__name__}" for c in classes if c.__dictoffset__]
+    assert not with_dict, f"sous-classes d'Entity avec __dict__ (__slots__ manquant) : {with_dict}"
+    print(f"check __slots__ : {len(classes)} sous-classes d'Entity, aucune avec __dict__")
+
+
+def memory_per_entity(cls, make, n=20000):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [make(i) for i in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # la liste elle-même (8 octets par référence) n'est pas comptée
+    per_entity = (after - before - sys.getsizeof(entities)) / n
+    del entities
+    # les lignes libérées sont réutilisées : on ajoute explicitement le coût des colonnes
+    columns = STORE.nbytes_per_row() if STORE is not None else 0
+    print(f"{cls.__name__:<12} {per_entity:8.1f} octets / objet + {columns} octets de colonnes")
+
+
+def step_allocations(steps=200):
+    random.seed(0)
+    np.random.seed(0)
+    env = Environment()
+    env.run(20)
+    gc.collect()
+    tracemalloc.start()
+    peaks, blocks = [], []
+    for _ in range(steps):
+        tracemalloc.reset_peak()
+        start_mem = tracemalloc.get_traced_memory()[0]
+        start_blocks = sys.getallocatedblocks()
+        env.step()
+        peaks.append(tracemalloc.get_traced_memory()[1] - start_mem)
+        blocks.append(sys.getallocatedblocks() - start_blocks)
+    tracemalloc.stop()
+    print(f"step : pic d'allocation moyen {np.mean(peaks) / 1024:.1f} Ko, "
+          f"blocs nets conservés {np.mean(blocks):.1f} / step")
+
+
+if __name__ == "__main__":
+    check_slots()
+    gc.collect()
+    memory_per_entity(Projectile, lambda i: Projectile(i, i, 1.0, 0.0))
+    memory_per_entity(RockWall, lambda i: RockWall(i, i))
+    memory_per_entity(EnemyDrone, lambda i: EnemyDrone(i, i))
+    step_allocations()
@@ -0,0 +1,56 @@
+# Pool de processus (core.rl.env_pool) vs VecShooterEnv dans le processus principal
+# Usage : python -m benchmarks.bench_env_pool
+import os
+import random
+import time
+
+import numpy as np
+
+from core.rl.env_pool import ShooterEnvPool
+from core.rl.vec_env import VecShooterEnv
+
+
+def check(n_envs=4, steps=40, seed=3):
+    # Un seul worker avec la même graine : mêmes observations que VecShooterEnv en local
+    random.seed(seed)
+    np.random.seed(seed)
+    vec_env = VecShooterEnv(n_envs, max_steps=25)
+    ref = [vec_env.reset()]
+    rng = np.random.default_rng(seed)
+    actions = [rng.integers(0, 13, n_envs) for _ in range(steps)]
+    ref += [[a.copy() for a in vec_env.step(a)] + [vec_env.truncated.copy()] for a in actions]
+    with ShooterEnvPool(1, n_envs, max_steps=25, seed=seed) as pool:
+        got = [[a.copy() for a in pool.reset()]]
+        got += [[a.copy() for a in pool.step(a)] + [pool.truncated.copy()] for a in actions]
+        assert vec_env.completed == pool.completed, "épisodes différents"
+    for r, g in zip(ref, got):
+        assert all(np.array_equal(x, y) for x, y in zip(r, g)), "observations différentes"
+    print(f"pool (1 worker) identique à VecShooterEnv sur {steps} steps | {len(pool.completed)} épisodes relancés")
+
+
+def run(n_envs, n_workers, steps=50):
+    rng = np.random.default_rng(0)
+    if n_workers == 0:
+        env = VecShooterEnv(n_envs)
+        env.reset()
+        start = time.perf_counter()
+        for _ in range(steps):
+            env.step(rng.integers(0, 13, n_envs))
+        elapsed = time.perf_counter() - start
+        label = "VecShooterEnv local"
+    else:
+        with ShooterEnvPool(n_workers, n_envs // n_workers) as env:
+            env.reset()
+            start = time.perf_counter()
+            for _ in range(steps):
+                env.step(rng.integers(0, 13, n_envs))
+            elapsed = time.perf_counter() - start
+        label = f"pool {n_workers} workers"
+    print(f"{n_envs:>3} envs | {label:<20} {n_envs * steps / elapsed:7.0f} steps/s")
+
+
+if __name__ == "__main__":
+    check()
+    print(f"{os.cpu_count()} coeur(s) disponible(s)")
+    for n_workers in (0, 1, 2, 4):
+        run(8, n_workers)
@@ -0,0 +1,86 @@
+# Frames écrites en flux (core.frame_writer, JSON Lines) vs history en mémoire + export json.dump en fin de run
+# Usage : python -m benchmarks.bench_frame_writer
+import json
+import multiprocessing as mp
+import os
+import random
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from core.environment import Environment
+from core.frame_writer import FrameWriter, read_frames
+
+
+def simulate(seed, steps, writer=None):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment(writer=writer)
+    env.run(steps)
+    return env
+
+
+def same_without_ids(a, b):
+    # Les ids viennent d'un compteur global : ils diffèrent d'un Environment à l'autre
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(k == 'id' or same_without_ids(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same_without_ids(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def check(tmp, seed=5, steps=80):
+    # Mêmes frames que l'export de history ; un fichier coupé en pleine ligne reste lisible
+    exported = os.path.join(tmp, "check.json")
+    streamed = os.path.join(tmp, "check.jsonl")
+    simulate(seed, steps).export(exported)
+    with FrameWriter(streamed) as writer:
+        env = simulate(seed, steps, writer)
+    assert len(env.history) == 0 and writer.frames == steps
+    with open(exported) as f:
+        reference = json.load(f)
+    frames = read_frames(streamed)
+    assert same_without_ids(frames, reference), "frames différentes de l'export"
+
+    with open(streamed, "rb") as f:
+        data = f.read()
+    cut = data.index(b"\n", len(data) // 2) + 20  # crash au milieu d'une ligne
+    with open(streamed, "wb") as f:
+        f.write(data[:cut])
+    partial = read_frames(streamed)
+    assert 0 < len(partial) < steps and partial == frames[:len(partial)]
+    print(f"check : {steps} frames identiques à l'export, fichier coupé -> {len(partial)} frames complètes lues")
+
+
+def measure(mode, steps, path, queue):
+    # Processus neuf par mesure : ru_maxrss est le pic de ce seul run
+    start = time.perf_counter()
+    if mode == "flux":
+        with FrameWriter(path) as writer:
+            simulate(0, steps, writer)
+    else:
+        simulate(0, steps).export(path)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, os.path.getsize(path), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def run(tmp, steps_list=(500, 2000)):
+    ctx = mp.get_context("spawn")
+    for steps in steps_list:
+        for mode in ("export", "flux"):
+            queue = ctx.Queue()
+            path = os.path.join(tmp, f"run.{'jsonl' if mode == 'flux' else 'json'}")
+            process = ctx.Process(target=measure, args=(mode, steps, path, queue))
+            process.start()
+            elapsed, size, rss = queue.get()
+            process.join()
+            label = "history + export" if mode == "export" else "flux JSON Lines"
+            print(f"{steps:>5} steps | {label:<16} | {elapsed:6.2f} s | fichier {size / 2 ** 20:6.2f} Mo | pic RSS {rss:6.1f} Mo")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        check(tmp)
+        run(tmp)
@@ -0,0 +1,56 @@
+# Historique à table d'objets par frame (indices de visibilité par agent) vs une copie des objets par agent
+# Usage : python -m benchmarks.bench_history_table
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from core.environment import Environment
+from core.utils import to_serializable
+
+
+def legacy(history):
+    # Ancien format : liste d'agents, chacun avec une copie complète des objets vivants
+    return [[{**entry, 'visible': [dict(o) for o in frame['objects']]} for entry in frame['agents']]
+            for frame in history]
+
+
+def check(env):
+    for frame in env.history:
+        n = len(frame['objects'])
+        assert all(0 <= i < n for entry in frame['agents'] for i in entry['visible']), "indice hors table"
+        assert all(len(set(entry['visible'])) == len(entry['visible']) for entry in frame['agents'])
+    seen = np.mean([len(e['visible']) for f in env.history for e in f['agents']])
+    table = np.mean([len(f['objects']) for f in env.history])
+    print(f"check : indices valides, {seen:.1f} objets vus par agent en moyenne sur {table:.1f} par frame")
+
+
+def export(history, path):
+    start = time.perf_counter()
+    with open(path, "w") as f:
+        json.dump(to_serializable(history), f, indent=2)
+    return time.perf_counter() - start, os.path.getsize(path)
+
+
+def best(history, path, repeat=3):
+    runs = [export(history, path) for _ in range(repeat)]
+    return min(t for t, _ in runs), runs[0][1]
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    env = Environment()
+    env.run(steps=1000)
+    check(env)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "output.json")
+        t_old, size_old = best(legacy(env.history), path)
+        t_new, size_new = best(env.history, path)
+    print(f"run_simulation 1000 steps, {len(env.agents)} agents vivants à la fin")
+    print(f"copie par agent : {size_old / 2 ** 20:6.2f} Mo, export {t_old:5.2f} s")
+    print(f"table par frame : {size_new / 2 ** 20:6.2f} Mo, export {t_new:5.2f} s"
+          f" (taille x{size_old / size_new:4.1f} plus petite, export x{t_old / t_new:4.1f} plus rapide)")
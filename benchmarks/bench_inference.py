@@ -0,0 +1,147 @@
+# Choix d'actions en lot (core.rl.inference) vs un passage de la policy par agent
+# Usage : python -m benchmarks.bench_inference
+import threading
+import time
+
+import numpy as np
+
+from core.mini_map import channel_names
+from core.rl.env_wrapper import flat_state_dim
+from core.rl.inference import PolicyInference, torch_policy
+
+MINIMAP_SHAPE = (len(channel_names), 64, 64)
+ACTIONS = 13
+
+
+def numpy_policy(seed=0):
+    # Petit réseau NumPy (état plat + minimap sous-échantillonnée) si torch n'est pas installé
+    rng = np.random.default_rng(seed)
+    w_flat = rng.standard_normal((flat_state_dim(), 128)).astype(np.float32)
+    w_map = rng.standard_normal((len(channel_names) * 16 * 16, 128)).astype(np.float32)
+    w_out = rng.standard_normal((128, ACTIONS)).astype(np.float32)
+
+    def policy(flat_states, minimaps):
+        pooled = minimaps[:, :, ::4, ::4].reshape(len(minimaps), -1)
+        hidden = np.maximum(flat_states @ w_flat + pooled @ w_map, 0)
+        return hidden @ w_out
+    return policy
+
+
+def make_policy():
+    try:
+        import torch
+        from core.rl.models.dqn_model import CombinedDQN
+    except ImportError:
+        return numpy_policy(), "policy NumPy"
+    torch.set_num_threads(1)
+    # Laissé en mode train : torch_policy passe en eval le temps du choix
+    model = CombinedDQN(flat_input_dim=flat_state_dim(), output_dim=ACTIONS)
+    return torch_policy(model), "CombinedDQN (torch)"
+
+
+def observations(n, seed=0):
+    rng = np.random.default_rng(seed)
+    flat = rng.random((n, flat_state_dim()), dtype=np.float32)
+    minimaps = (rng.random((n,) + MINIMAP_SHAPE, dtype=np.float32) < 0.001).astype(np.float32)
+    return flat, minimaps
+
+
+def one_by_one(policy, flat, minimaps):
+    return np.array([int(policy(flat[i:i + 1], minimaps[i:i + 1]).argmax()) for i in range(len(flat))])
+
+
+def threaded(service, flat, minimaps, n_threads=8):
+    # n_threads environnements, chacun demande l'action de ses agents un par un
+    actions = np.empty(len(flat), dtype=np.int64)
+
+    def env_loop(rows):
+        for i in rows:
+            actions[i] = service.submit(flat[i], minimaps[i]).result(timeout=10)
+
+    threads = [threading.Thread(target=env_loop, args=(range(k, len(flat), n_threads),)) for k in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return actions
+
+
+def best(fn, repeat=3):
+    result, times = None, []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def run(n_agents, policy, max_batch=256):
+    flat, minimaps = observations(n_agents)
+    ref, t_serial = best(lambda: one_by_one(policy, flat, minimaps))
+
+    service = PolicyInference(policy, ACTIONS, max_batch=max_batch)
+    got, t_batch = best(lambda: service.act(flat, minimaps))
+    assert np.array_equal(ref, got), "actions différentes en lot"
+
+    # 8 threads ont au plus 8 requêtes en attente : lot plein à 8, sinon délai de 2 ms
+    service = PolicyInference(policy, ACTIONS, max_batch=8, max_delay=0.002).start()
+    try:
+        got, t_threads = best(lambda: threaded(service, flat, minimaps))
+    finally:
+        service.close()
+    assert np.array_equal(ref, got), "actions différentes via submit"
+    per_forward = service.requests / max(1, service.forwards)
+    print(f"{n_agents:>4} agents | un par un {t_serial * 1e3:7.2f} ms | act en lot {t_batch * 1e3:6.2f} ms"
+          f" (x{t_serial / t_batch:5.1f}) | submit 8 threads {t_threads * 1e3:7.2f} ms"
+          f" ({per_forward:.1f} requêtes par passage)")
+
+
+def check_epsilon(policy, n=4000, epsilon=0.3):
+    # Epsilon-greedy vectorisé : part d'actions aléatoires, réseau sauté pour elles
+    flat, minimaps = observations(n, seed=1)
+    greedy = one_by_one(policy, flat, minimaps)
+    service = PolicyInference(policy, ACTIONS, max_batch=512, rng=0)
+    actions = service.act(flat, minimaps, epsilon=epsilon)
+    # Tirages du générateur du service seulement (le générateur global n'y joue aucun rôle)
+    rng = np.random.default_rng(0)
+    rng.integers(0, ACTIONS, size=n)
+    explore = rng.random(n) < epsilon
+    assert np.array_equal(actions[~explore], greedy[~explore])
+    assert service.forwards == -(-int((~explore).sum()) // 512)
+    print(f"check epsilon : {explore.mean():.0%} d'actions aléatoires, {service.forwards} passages pour {n} agents")
+
+
+def check_train_mode(n=32):
+    # Réseau en mode train (celui du DQNTrainer) : choix en eval, BatchNorm ni utilisée sur le lot
+    # ni mise à jour, mode train rétabli ; select_actions = select_action environnement par environnement
+    try:
+        import torch
+        from core.rl.trainers.train_dqn import DQNTrainer
+    except ImportError:
+        return
+    torch.manual_seed(0)
+    trainer = DQNTrainer(flat_state_dim(), ACTIONS, seed=0)
+    trainer.epsilon = trainer.epsilon_min = 0.0
+    model = trainer.q_net
+    model(*map(torch.as_tensor, observations(8, seed=3)))  # statistiques de BatchNorm non triviales
+    stats = {k: v.clone() for k, v in model.state_dict().items() if "running" in k or "num_batches" in k}
+    flat, minimaps = observations(n, seed=2)
+    batched = trainer.select_actions(flat, minimaps)
+    # Une ligne choisie seule, ou au milieu d'autres observations : même action
+    mixed = trainer.select_actions(np.concatenate([flat[:1], flat[::-1]]), np.concatenate([minimaps[:1], minimaps[::-1]]))
+    serial = np.array([trainer.select_action(flat[i], minimaps[i]) for i in range(n)])
+    assert model.training, "mode train non rétabli"
+    for key, value in model.state_dict().items():
+        if key in stats:
+            assert torch.equal(value, stats[key]), f"{key} modifié par le choix d'actions"
+    assert np.array_equal(batched, serial) and np.array_equal(mixed[1:], batched[::-1]) and mixed[0] == batched[0]
+    print(f"check réseau en mode train : {n} actions identiques en lot et une par une, BatchNorm inchangée")
+
+
+if __name__ == "__main__":
+    policy, label = make_policy()
+    print(label)
+    check_train_mode()
+    check_epsilon(policy)
+    for n_agents in (16, 64, 256):
+        run(n_agents, policy)
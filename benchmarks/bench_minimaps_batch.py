@@ -0,0 +1,57 @@
+# Minimaps de plusieurs agents en une passe (extract_minimaps) vs un appel par agent
+# Usage : python -m benchmarks.bench_minimaps_batch
+import random
+import time
+
+import numpy as np
+
+from core.agents.combat_agents import ScoutAgent
+from core.environment import Environment
+from core.mini_map import extract_minimap_tensor, extract_minimaps
+from core.perception import PerceptionCache
+
+
+def build(n_agents, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment()
+    rng = np.random.default_rng(seed)
+    while len(env.agents) < n_agents:
+        agent = ScoutAgent(*rng.uniform(50, 450, 2), radius=1.5)
+        agent.facing_angle = rng.uniform(-np.pi, np.pi)
+        env.agents.append(agent)
+        env.spatial.insert(agent)
+        env.version += 1
+    env.agents = env.agents[:n_agents]
+    env.step()
+    return env
+
+
+def run(n_agents, grid_size=64, ticks=20):
+    env = build(n_agents)
+    out = np.zeros((n_agents, 18, grid_size, grid_size), dtype=np.float32)
+    extract_minimaps(env, env.agents, grid_size=grid_size)  # chauffe (imports paresseux de NumPy)
+    one, batched = 0.0, 0.0
+    for _ in range(ticks):
+        env.step()
+        agents = env.agents
+        # Cache de perception vidé avant chaque mesure : chaque version recalcule la vision
+        env.perception = PerceptionCache(env)
+        start = time.perf_counter()
+        ref = [extract_minimap_tensor(a, env, grid_size=grid_size) for a in agents]
+        one += time.perf_counter() - start
+        if len(agents) != len(out):
+            out = np.zeros((len(agents), 18, grid_size, grid_size), dtype=np.float32)
+        env.perception = PerceptionCache(env)
+        start = time.perf_counter()
+        got = extract_minimaps(env, agents, grid_size=grid_size, out=out)
+        batched += time.perf_counter() - start
+        for k in range(len(agents)):
+            assert np.array_equal(ref[k].view(np.uint32), got[k].view(np.uint32)), "minimap différente"
+    print(f"{n_agents:>3} agents | un appel par agent {1e3 * one / ticks:6.2f} ms/tick"
+          f" | extract_minimaps {1e3 * batched / ticks:6.2f} ms/tick | x{one / batched:4.1f} | identiques")
+
+
+if __name__ == "__main__":
+    for n in (1, 4, 16, 64):
+        run(n)
@@ -0,0 +1,124 @@
+# Codage des minimaps (core.obs_codec) : taux de compression, erreur, coût de décodage par lot de 64
+# Usage : python -m benchmarks.bench_obs_codec
+import random
+import time
+
+import numpy as np
+
+from core.agents.combat_agents import HeavyAgent
+from core.environment import RECORD_OFF, Environment
+from core.enemys.enemyTurret import EnemyTurret
+from core.mini_map import channels, extract_minimap_tensor
+from core.obs_codec import HEALTH_SCALE, MinimapCodec
+from core.rl.replay_buffer import ReplayBuffer
+from core.rl.vec_env import VecShooterEnv
+
+
+def collect(n_envs=8, steps=40, seed=0):
+    # Minimaps réelles d'épisodes joués au hasard
+    random.seed(seed)
+    np.random.seed(seed)
+    vec_env = VecShooterEnv(n_envs, max_steps=200)
+    flat, minimaps = vec_env.reset()
+    rng = np.random.default_rng(seed)
+    out = [minimaps.copy()]
+    for _ in range(steps):
+        flat, minimaps, _, _ = vec_env.step(rng.integers(0, 13, n_envs))
+        out.append(minimaps.copy())
+    return np.concatenate(out)
+
+
+def best(fn, repeat=20):
+    fn()
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        times.append((time.perf_counter() - start) / repeat)
+    return min(times)
+
+
+def check(minimaps):
+    for sparse in (False, True):
+        codec = MinimapCodec(sparse=sparse)
+        decoded = codec.decode_batch(codec.encode_batch(minimaps))
+        assert decoded.dtype == np.float32 and decoded.shape == minimaps.shape
+        assert (np.abs(decoded - minimaps).max(axis=(0, 2, 3)) <= codec.scale / 510 + 1e-6).all(), \
+            "erreur de quantification"
+        assert np.array_equal(decoded != 0, minimaps != 0), "pixels non nuls perdus"
+        assert np.array_equal(decoded[:, codec.binary], minimaps[:, codec.binary]), "canaux binaires altérés"
+        one = codec.decode(codec.encode(minimaps[5]))
+        assert np.array_equal(one, decoded[5])
+    print(f"check : {len(minimaps)} minimaps, canaux binaires exacts, erreur <= plafond/510 ailleurs")
+
+
+def check_health(grid_size=64):
+    # Santé au-dessus de 100 en vue : tourelle (150) et HeavyAgent (200) à côté de l'agent RL
+    random.seed(0)
+    np.random.seed(0)
+    env = Environment(use_rl=True, record=RECORD_OFF)
+    agent = env.agents[0]
+    turret = next(o for o in env.objects if isinstance(o, EnemyTurret) and o.health > 100)
+    # Agent à l'ouest de la tourelle, regard vers l'est
+    agent.x, agent.y, agent.facing_angle = turret.x - 12, turret.y, 0.0
+    env.spawn_entity(HeavyAgent(agent.x + 6, agent.y + 1))
+    env.spatial.rebuild(env.agents + env.objects)
+    env.version += 1
+    minimap = extract_minimap_tensor(agent, env, grid_size=grid_size)
+    for name, value in (("enemy_turret", turret.health / 100), ("heatmap_danger", turret.health / 100),
+                        ("ally_agent", 2.0)):
+        assert minimap[channels[name]].max() == value, f"{name} : {minimap[channels[name]].max()} au lieu de {value}"
+    for sparse in (False, True):
+        codec = MinimapCodec(grid_size=grid_size, sparse=sparse)
+        decoded = codec.decode(codec.encode(minimap))
+        assert np.abs(decoded - minimap).max() <= HEALTH_SCALE / 510 + 1e-6, "santé écrêtée au codage"
+        try:
+            MinimapCodec(grid_size=grid_size, sparse=sparse, scales={}).encode(minimap)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("santé au-dessus du plafond acceptée")
+    print(f"check santé > 100 : tourelle {turret.health}, HeavyAgent 200, erreur <= {HEALTH_SCALE}/510,"
+          f" hors plafond refusé")
+
+
+def run(minimaps, batch_size=64):
+    raw = minimaps[0].nbytes
+    rng = np.random.default_rng(0)
+    idx = rng.integers(0, len(minimaps), batch_size)
+    out = np.empty((batch_size,) + minimaps.shape[1:], dtype=np.float32)
+    t_raw = best(lambda: np.take(minimaps, idx, axis=0, out=out))
+    print(f"float32 brut : {raw} octets | copie d'un lot de {batch_size} : {t_raw * 1e3:.2f} ms")
+    for sparse in (False, True):
+        codec = MinimapCodec(sparse=sparse)
+        codes = codec.encode_batch(minimaps)
+        size = np.mean([len(c) for c in codes]) if sparse else codec.code_size
+        batch = [codes[i] for i in idx] if sparse else codes[idx]
+        t_decode = best(lambda: codec.decode_batch(batch, out=out))
+        t_encode = best(lambda: codec.encode(minimaps[7]), repeat=200)
+        label = "sparse" if sparse else "dense"
+        print(f"{label:<6} : {size:8.0f} octets (x{raw / size:7.1f}) | décodage lot de {batch_size} {t_decode * 1e3:.2f} ms"
+              f" | codage {t_encode * 1e6:.0f} µs / minimap")
+
+
+def run_replay(minimaps, capacity=2000, batch_size=64):
+    # Replay buffer : minimaps stockées codées, décodées au sample
+    flat = np.zeros(107, dtype=np.float32)
+    for codec in (None, MinimapCodec()):
+        buffer = ReplayBuffer(capacity, codec=codec)
+        for i in range(capacity):
+            buffer.push(flat + i, minimaps[i % len(minimaps)], 0, 0.0, flat + i + 1,
+                        minimaps[(i + 1) % len(minimaps)], False)
+        t = best(lambda: buffer.sample(batch_size))
+        label = "sans codec" if codec is None else "codec dense"
+        print(f"replay {label:<11} : {buffer.nbytes() / capacity / 1024:6.1f} Kio / transition"
+              f" | sample({batch_size}) {t * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    minimaps = collect()
+    check(minimaps)
+    check_health()
+    run(minimaps)
+    run_replay(minimaps)
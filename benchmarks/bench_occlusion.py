@@ -0,0 +1,60 @@
+# Occlusion statique (core.occlusion.WallOcclusion) vs is_blocked_by_wall
+# Usage : python -m benchmarks.bench_occlusion
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.entity_types import EntityType
+from core.objects.rockWall import RockWall
+from core.occlusion import WallOcclusion
+from core.scene_objects import spawn_objects
+from core.utils import is_blocked_by_wall
+
+
+def random_segments(n, seed, max_len=100.0):
+    rng = np.random.default_rng(seed)
+    ax, ay = rng.uniform(0, 500, n), rng.uniform(0, 500, n)
+    angle = rng.uniform(-np.pi, np.pi, n)
+    length = rng.uniform(0, max_len, n)
+    return ax, ay, ax + length * np.cos(angle), ay + length * np.sin(angle)
+
+
+def run(walls, label, n=2000):
+    occlusion = WallOcclusion(walls)
+    ax, ay, tx, ty = random_segments(n, seed=len(walls))
+    points = [(SimpleNamespace(x=ax[i], y=ay[i]), SimpleNamespace(x=tx[i], y=ty[i], etype="target"))
+              for i in range(n)]
+
+    start = time.perf_counter()
+    ref = np.array([is_blocked_by_wall(a, t, walls) for a, t in points])
+    linear = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = np.array([occlusion.is_blocked(ax[i], ay[i], tx[i], ty[i]) for i in range(n)])
+    grid = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = np.concatenate([occlusion.blocked_batch(ax[i], ay[i], tx[i:i + 50], ty[i:i + 50])
+                            for i in range(0, n, 50)])
+    batched = time.perf_counter() - start
+    # même observateur pour chaque paquet de 50 cibles
+    ref_batch = np.array([is_blocked_by_wall(SimpleNamespace(x=ax[i - i % 50], y=ay[i - i % 50]), points[i][1], walls)
+                          for i in range(n)])
+
+    assert (ref == single).all(), "requête unitaire différente"
+    assert (ref_batch == batch).all(), "requête groupée différente"
+    print(f"{label:<22} {len(walls):>5} murs | linéaire {1e6 * linear / n:7.1f} us/seg"
+          f" | grille {1e6 * grid / n:6.1f} us/seg | lot {1e6 * batched / n:5.1f} us/seg | bloqués {ref.mean():.0%}")
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    walls = [o for o in spawn_objects() if o.etype == EntityType.WALL]
+    run(walls, "carte par défaut")
+    rng = np.random.default_rng(1)
+    dense = [RockWall(x, y, radius=r) for x, y, r in zip(rng.uniform(0, 500, 1000), rng.uniform(0, 500, 1000),
+                                                         rng.uniform(1, 4, 1000))]
+    run(dense, "1000 murs aléatoires")
@@ -0,0 +1,90 @@
+# Cache de perception par tick (core.perception) vs vision recalculée à chaque appel
+# Usage : python -m benchmarks.bench_perception
+import random
+import time
+
+import numpy as np
+
+from core.environment import Environment
+from core.rl.env_wrapper import ShooterEnvWrapper
+from core.utils import distance_to
+from core.vision_engine import EntityArrays, visible_indices, visible_objects
+
+
+class NoCache:
+    # Même interface que PerceptionCache, sans mémorisation
+    def __init__(self, env):
+        self.env = env
+
+    def visible(self, agent, objects):
+        return visible_objects([agent], list(objects), self.env.occlusion)[0]
+
+    def visible_many(self, agents):
+        objects = self.env.objects + self.env.agents
+        return objects, visible_indices(agents, EntityArrays(objects), self.env.occlusion)
+
+    def distance(self, agent, obj):
+        return distance_to(agent, obj)
+
+
+def episode(steps, seed, cached):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment(use_rl=True)
+    if not cached:
+        env.perception = NoCache(env)
+    wrapper = ShooterEnvWrapper(env, env.agents[0])
+    wrapper.reset()
+    out = []
+    start = time.perf_counter()
+    for i in range(steps):
+        flat, minimap, reward, done = wrapper.step(i % len(wrapper.agent.action_space))
+        out.append((flat, minimap, reward))
+        if done:
+            break
+    return out, (time.perf_counter() - start) / len(out), env
+
+
+def run(steps=300, seed=0):
+    ref, t_ref, _ = episode(steps, seed, cached=False)
+    got, t_got, env = episode(steps, seed, cached=True)
+    assert len(ref) == len(got)
+    for (f0, m0, r0), (f1, m1, r1) in zip(ref, got):
+        assert np.array_equal(f0, f1) and np.array_equal(m0, m1) and r0 == r1, "observations différentes"
+    s = env.perception.stats()
+    print(f"{len(got)} steps RL | sans cache {1e3 * t_ref:5.2f} ms/step | avec cache {1e3 * t_got:5.2f} ms/step"
+          f" | x{t_ref / t_got:4.2f} | observations identiques")
+    print(f"requêtes {s['queries']} | hits {s['hits']} ({100 * s['hit_rate']:.0f} %)"
+          f" | évaluations {s['evaluations']} | évitées {s['saved']}"
+          f" | distances mémorisées {100 * s['distance_hit_rate']:.0f} %")
+
+
+def several(n_envs=4, steps=100, seed=0):
+    # Plusieurs environnements dans le même processus : chacun a son store, donc sa version
+    random.seed(seed)
+    np.random.seed(seed)
+    a, b = Environment(use_rl=True), Environment(use_rl=True)
+    a.perception.visible_many(a.agents)
+    hits = a.perception.hits
+    b.step()
+    a.perception.visible_many(a.agents)
+    assert a.perception.hits == hits + len(a.agents), "un step d'un autre environnement a vidé le cache"
+
+    wrappers = []
+    for _ in range(n_envs):
+        env = Environment(use_rl=True)
+        wrappers.append(ShooterEnvWrapper(env, env.agents[0]))
+        wrappers[-1].reset()
+    for i in range(steps):
+        for wrapper in wrappers:
+            wrapper.step(i % len(wrapper.agent.action_space))
+    stats = [w.env.perception.stats() for w in wrappers]
+    queries = sum(s["queries"] for s in stats)
+    hits = sum(s["hits"] for s in stats)
+    print(f"{n_envs} environnements avancés à tour de rôle | hits {hits} / {queries} ({100 * hits / queries:.0f} %)"
+          f" | cache d'un environnement intact après le step d'un autre")
+
+
+if __name__ == "__main__":
+    run()
+    several()
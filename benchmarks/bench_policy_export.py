@@ -0,0 +1,116 @@
+# Policy figée (core.rl.export) vs réseau float : latence par lot et accord des actions
+# Usage : python -m benchmarks.bench_policy_export
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from core.environment import RECORD_OFF, Environment
+from core.mini_map import channel_names
+from core.rl.env_wrapper import ShooterEnvWrapper, flat_state_dim
+from core.rl.inference import PolicyInference, torch_policy
+
+ACTIONS = 13
+MINIMAP_SHAPE = (len(channel_names), 64, 64)
+
+
+def observations(n, seed=0):
+    rng = np.random.default_rng(seed)
+    flat = rng.random((n, flat_state_dim()), dtype=np.float32)
+    minimaps = (rng.random((n,) + MINIMAP_SHAPE, dtype=np.float32) < 0.01).astype(np.float32)
+    return flat, minimaps
+
+
+def trained_model(torch, CombinedDQN, steps=20):
+    # Quelques pas d'entraînement pour que les BatchNorm aient des statistiques non triviales
+    model = CombinedDQN(flat_input_dim=flat_state_dim(), output_dim=ACTIONS)
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+    flat, minimaps = observations(64, seed=1)
+    flat, minimaps = torch.from_numpy(flat), torch.from_numpy(minimaps)
+    target = torch.randn(64, ACTIONS)
+    for _ in range(steps):
+        loss = ((model(flat, minimaps) - target) ** 2).mean()
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    return model.eval()
+
+
+def latency(torch, model, flat, minimaps, repeat=5):
+    flat, minimaps = torch.from_numpy(flat), torch.from_numpy(minimaps)
+    times = []
+    with torch.inference_mode():
+        model(flat, minimaps)  # passage de chauffe (optimisations du module tracé)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            q_values = model(flat, minimaps)
+            times.append(time.perf_counter() - start)
+    return q_values.numpy(), min(times)
+
+
+if __name__ == "__main__":
+    try:
+        import torch
+        from core.rl.export import export_policy, load_policy
+        from core.rl.models.dqn_model import CombinedDQN, DQN
+    except ImportError:
+        print("torch n'est pas installé : benchmark ignoré")
+        raise SystemExit(0)
+
+    torch.set_num_threads(1)
+    model = trained_model(torch, CombinedDQN)
+    flat, minimaps = observations(1024, seed=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        policies = {"float (eval)": model}
+        for label, quantize in (("figée", False), ("figée int8", True)):
+            path = os.path.join(tmp, f"policy_{quantize}.pt")
+            export_policy(model, path, quantize=quantize)
+            policies[label] = load_policy(path)
+            print(f"{label:<12} : {os.path.getsize(path) / 2 ** 20:5.2f} Mo sur disque")
+
+        reference = {}
+        for batch in (1, 16, 256):
+            for label, policy in policies.items():
+                q_values, t = latency(torch, policy, flat[:batch], minimaps[:batch])
+                if label == "float (eval)":
+                    reference[batch] = (q_values, t)
+                ref_q, ref_t = reference[batch]
+                print(f"lot {batch:>4} | {label:<12} | {t * 1e3:8.2f} ms (x{ref_t / t:4.2f})"
+                      f" | écart max q {np.abs(q_values - ref_q).max():.2e}")
+
+        # Accord des actions sur 1024 observations
+        greedy, _ = latency(torch, model, flat, minimaps, repeat=1)
+        for label, policy in list(policies.items())[1:]:
+            q_values, _ = latency(torch, policy, flat, minimaps, repeat=1)
+            agreement = (q_values.argmax(axis=1) == greedy.argmax(axis=1)).mean()
+            print(f"accord des actions {label:<12} : {agreement:.1%}")
+            if label == "figée":
+                assert agreement > 0.99, "BatchNorm mal replié"
+
+        # DQN (état plat seul) : même signature (flat_input, minimap_input) une fois exporté
+        dqn = DQN(flat_state_dim(), ACTIONS).eval()
+        frozen = export_policy(dqn)
+        with torch.inference_mode():
+            expected = dqn(torch.from_numpy(flat[:64]))
+            got = frozen(torch.from_numpy(flat[:64]), torch.from_numpy(minimaps[:64]))
+        assert torch.allclose(expected, got, atol=1e-5)
+        print("check DQN figé : q-values identiques")
+
+        # Policy rechargée aux commandes d'un environnement, comme main.run_simulation
+        env = Environment(use_rl=True, record=RECORD_OFF)
+        wrapper = ShooterEnvWrapper(env, env.agents[0])
+        inference = PolicyInference(torch_policy(policies["figée"]), len(env.agents[0].action_space))
+        flat_state, minimap = wrapper.reset()
+        same = steps = 0
+        for steps in range(1, 101):
+            action = inference.act(flat_state[None], minimap[None])[0]
+            q_values, _ = latency(torch, model, flat_state[None], minimap[None], repeat=1)
+            same += int(action == q_values.argmax())
+            flat_state, minimap, _, done = wrapper.step(action)
+            if done:
+                break
+        assert same >= 0.99 * steps
+        print(f"simulation pilotée par la policy rechargée : {steps} pas, {same / steps:.0%} des actions"
+              f" identiques au réseau float")
@@ -0,0 +1,104 @@
+# Lots préchargés dans un thread (core.rl.prefetch) vs tirés sur le chemin critique du learner
+# Usage : python -m benchmarks.bench_prefetch
+import os
+import time
+
+import numpy as np
+
+from core.mini_map import channel_names
+from core.rl.prefetch import BatchPrefetcher
+from core.rl.replay_buffer import PrioritizedReplayBuffer, ReplayBuffer
+
+MINIMAP_SHAPE = (len(channel_names), 64, 64)
+
+
+def push_numbered(buffer, i, shape):
+    # Transition i : état plat et minimap remplis de i, état suivant de i + 1, récompense i
+    buffer.push(np.full(107, i, dtype=np.float32), np.full(shape, i, dtype=np.float32), i % 13, float(i),
+                np.full(107, i + 1, dtype=np.float32), np.full(shape, i + 1, dtype=np.float32), False)
+
+
+def check(steps=300, batch_size=32, shape=(2, 8, 8)):
+    # Pushs du thread principal pendant que le thread tire : chaque lot reste cohérent
+    buffer = ReplayBuffer(500)
+    for i in range(batch_size):
+        push_numbered(buffer, i, shape)
+    prefetcher = BatchPrefetcher(buffer, batch_size, depth=3)
+    try:
+        for i in range(batch_size, batch_size + steps):
+            push_numbered(buffer, i, shape)
+            (flat_s, minimap_s, a, r, flat_s2, minimap_s2, d), _, _ = prefetcher.get()
+            assert (flat_s[:, 0] == r).all() and (flat_s2[:, 0] == r + 1).all(), "lot incohérent"
+            assert (minimap_s[:, 0, 0, 0] == r).all() and (minimap_s2[:, -1, -1, -1] == r + 1).all()
+            assert (a == r.astype(np.int64) % 13).all()
+    finally:
+        prefetcher.close()
+    print(f"check : {steps} lots préchargés cohérents pendant les pushs")
+
+
+def seeded(batches=100, batch_size=32, shape=(2, 8, 8)):
+    # Même graine, mêmes lots préchargés, quels que soient les tirages du thread principal
+    # sur le générateur global (epsilon-greedy) pendant que le thread tire
+    for cls in (ReplayBuffer, PrioritizedReplayBuffer):
+        runs = []
+        for _ in range(2):
+            buffer = cls(500, rng=0)
+            for i in range(500):
+                push_numbered(buffer, i, shape)
+            prefetcher = BatchPrefetcher(buffer, batch_size)
+            rewards = []
+            try:
+                for _ in range(batches):
+                    np.random.rand(np.random.randint(1, 50))
+                    rewards.append(prefetcher.get()[0][3].copy())
+            finally:
+                prefetcher.close()
+            runs.append(np.concatenate(rewards))
+        assert np.array_equal(*runs), f"{cls.__name__} : lots différents à graine égale"
+    print(f"check : {batches} lots préchargés identiques à graine égale (uniforme et priorisé)")
+
+
+def learner(buffer, batch_size, steps, compute, prefetch):
+    # Boucle du learner : un push par pas (comme main.train_dqn), un lot, un calcul
+    prefetcher = BatchPrefetcher(buffer, batch_size) if prefetch else None
+    wait = 0.0
+    start = time.perf_counter()
+    try:
+        for i in range(steps):
+            push_numbered(buffer, 10 ** 6 + i, MINIMAP_SHAPE)
+            t = time.perf_counter()
+            if prefetcher is None:
+                buffer.sample(batch_size)
+            else:
+                prefetcher.get()
+            wait += time.perf_counter() - t
+            compute()
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+    total = time.perf_counter() - start
+    return wait / steps, total / steps
+
+
+def run(batch_size=64, steps=60):
+    buffer = ReplayBuffer(2000)
+    for i in range(2000):
+        push_numbered(buffer, i, MINIMAP_SHAPE)
+    a = np.random.rand(600, 600)
+    computes = {
+        "calcul CPU (matmul)": lambda: a @ a,
+        "calcul hors CPU (GPU)": lambda: time.sleep(0.010),
+    }
+    print(f"{os.cpu_count()} coeur(s) | lot de {batch_size} minimaps")
+    for label, compute in computes.items():
+        for prefetch in (False, True):
+            wait, step = learner(buffer, batch_size, steps, compute, prefetch)
+            mode = "préchargé" if prefetch else "synchrone"
+            print(f"{label:<22} | {mode:<9} | attente données {wait * 1e3:6.2f} ms | pas complet {step * 1e3:6.2f} ms"
+                  f" | {wait / step:4.0%} du temps à attendre")
+
+
+if __name__ == "__main__":
+    check()
+    seeded()
+    run()
@@ -0,0 +1,101 @@
+# Projectiles en lot (core.projectile_batch) vs l'ancienne mise à jour objet par objet
+# Usage : python -m benchmarks.bench_projectiles
+import random
+import time
+
+import numpy as np
+
+from core.entity_types import EntityType
+from core.environment import Environment
+from core.objects.projectile import HOSTILE_TYPES, Projectile
+from core.objects.rockWall import RockWall
+from core.utils import distance_to
+
+
+def legacy_update(proj, env):
+    # Copie de l'ancien Projectile.update (test ponctuel en fin de déplacement, index spatial), gardée comme référence
+    if not proj.alive:
+        return
+    proj.ttl -= 1
+    if proj.ttl <= 0:
+        proj.alive = False
+        return
+    proj.x += proj.dx * proj.speed
+    proj.y += proj.dy * proj.speed
+    for agent in env.spatial.query_radius(proj.x, proj.y, proj.radius, (EntityType.AGENT,)):
+        if agent is proj.owner:
+            continue
+        if agent.alive and distance_to(proj, agent) <= (proj.radius + agent.radius):
+            if getattr(proj.owner, "etype", None) in HOSTILE_TYPES:
+                agent.take_damage(proj.damage)
+                proj.alive = False
+                return
+    for obj in env.spatial.query_radius(proj.x, proj.y, proj.radius, HOSTILE_TYPES):
+        if obj.alive and getattr(proj.owner, "etype", None) == EntityType.AGENT:
+            if distance_to(proj, obj) <= (proj.radius + obj.radius):
+                obj.take_damage(proj.damage)
+                proj.owner.last_attack_success = True
+                proj.alive = False
+                return
+    for obj in env.spatial.query_radius(proj.x, proj.y, proj.radius, (EntityType.WALL, EntityType.DECOY)):
+        if obj.alive and distance_to(proj, obj) <= (proj.radius + obj.radius):
+            proj.alive = False
+            return
+
+
+def build(n_projectiles, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment()
+    shooters = env.agents + [o for o in env.objects if o.etype in HOSTILE_TYPES]
+    rng = np.random.default_rng(seed)
+    for _ in range(n_projectiles):
+        owner = shooters[rng.integers(len(shooters))]
+        angle = rng.uniform(-np.pi, np.pi)
+        env.spawn_projectile(owner.x, owner.y, np.cos(angle), np.sin(angle), owner)
+    return env
+
+
+def run(n_projectiles, ticks=30):
+    env = build(n_projectiles, seed=n_projectiles)
+    projectiles = [o for o in env.objects if o.etype == EntityType.PROJECTILE]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for p in projectiles:
+            legacy_update(p, env)
+    legacy = time.perf_counter() - start
+    legacy_alive = sum(p.alive for p in projectiles)
+
+    env = build(n_projectiles, seed=n_projectiles)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        env.projectiles.step(env)
+    batched = time.perf_counter() - start
+    print(f"{n_projectiles:>5} projectiles | objet par objet {1e3 * legacy / ticks:7.2f} ms/tick"
+          f" | lot {1e3 * batched / ticks:5.2f} ms/tick | x{legacy / batched:5.1f}"
+          f" | encore en vol {legacy_alive} / {len(env.projectiles)}")
+
+
+def tunneling():
+    # Projectile rapide tiré à travers un mur fin : l'ancien test ponctuel le laisse passer
+    random.seed(0)
+    np.random.seed(0)
+    env = Environment()
+    env.objects = [RockWall(30, 0, radius=0.5)]
+    env.agents = []
+    env.spatial.rebuild(env.objects)
+    legacy = Projectile(19, 0, 1.0, 0.0, speed=8.0)
+    batched = Projectile(19, 0, 1.0, 0.0, speed=8.0)
+    env.projectiles.add(batched)
+    for _ in range(3):
+        legacy_update(legacy, env)
+        env.projectiles.step(env)
+    print(f"mur fin (r=0.5, vitesse 8) : objet par objet {'arrêté' if not legacy.alive else 'traversé'}"
+          f", lot {'arrêté' if not batched.alive else 'traversé'}")
+    assert not batched.alive
+
+
+if __name__ == "__main__":
+    tunneling()
+    for n in (50, 200, 500, 1000):
+        run(n)
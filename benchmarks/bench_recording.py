@@ -0,0 +1,106 @@
+# Niveaux d'enregistrement de Environment.history : débit de simulation et pic de RSS
+# Usage : python -m benchmarks.bench_recording
+import multiprocessing as mp
+import random
+import resource
+import time
+
+import numpy as np
+
+from core.column_recorder import ColumnRecorder
+from core.environment import RECORD_AGENTS, RECORD_FULL, RECORD_OFF, Environment
+from core.rl.env_wrapper import ShooterEnvWrapper
+
+CONFIGS = {
+    "off": dict(record=RECORD_OFF),
+    "agents": dict(record=RECORD_AGENTS),
+    "full, 1 frame / 10": dict(record=RECORD_FULL, record_every=10),
+    "full, 100 dernières": dict(record=RECORD_FULL, max_history=100),
+    "full": dict(record=RECORD_FULL),
+}
+
+
+def simulate(seed, steps, **kwargs):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment(**kwargs)
+    env.run(steps)
+    return env
+
+
+def without_ids(value):
+    # Les ids viennent d'un compteur global : ils diffèrent d'un Environment à l'autre
+    if isinstance(value, dict):
+        return {k: without_ids(v) for k, v in value.items() if k != 'id'}
+    if isinstance(value, list):
+        return [without_ids(v) for v in value]
+    return value
+
+
+def check(seed=3, steps=60):
+    # Même simulation quel que soit le niveau, frames gardées cohérentes avec l'historique complet
+    full = simulate(seed, steps, record=RECORD_FULL)
+    frames = without_ids(full.history)
+    positions = [(a.x, a.y, a.health) for a in full.agents]
+    for kwargs in CONFIGS.values():
+        env = simulate(seed, steps, **kwargs)
+        assert [(a.x, a.y, a.health) for a in env.agents] == positions, f"simulation modifiée par {kwargs}"
+    assert simulate(seed, steps, record=RECORD_OFF).history == []
+    assert without_ids(list(simulate(seed, steps, record=RECORD_FULL, max_history=7).history)) == frames[-7:]
+    assert without_ids(simulate(seed, steps, record=RECORD_FULL, record_every=10).history) == frames[::10]
+    # max_history ne borne que history : refusé avec un recorder plutôt qu'ignoré
+    try:
+        Environment(max_history=7, recorder=ColumnRecorder())
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("max_history accepté avec un recorder")
+    agents = without_ids(simulate(seed, steps, record=RECORD_AGENTS).history)
+    assert [{'objects': [], 'agents': [{**e, 'visible': []} for e in frame['agents']]} for frame in frames] == agents
+    print(f"check : {len(CONFIGS)} niveaux, même simulation, frames conformes à l'historique complet")
+
+
+def rollout(seed, steps, **kwargs):
+    # Boucle d'entraînement (main.train_dqn) : wrapper RL, actions aléatoires, observations complètes
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment(use_rl=True, **kwargs)
+    wrapper = ShooterEnvWrapper(env, env.agents[0])
+    wrapper.reset()
+    for _ in range(steps):
+        *_, done = wrapper.step(np.random.randint(13))
+        if done:
+            break
+    return env
+
+
+def measure(scenario, label, steps, queue, repeat=2):
+    # Processus neuf par niveau : ru_maxrss est le pic de ce seul run
+    times = []
+    for _ in range(repeat):
+        env = None  # un seul historique vivant à la fois
+        start = time.perf_counter()
+        env = scenario(0, steps, **CONFIGS[label])
+        times.append(time.perf_counter() - start)
+    queue.put((env.time / min(times), len(env.history), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def run(scenario, title, steps):
+    ctx = mp.get_context("spawn")
+    results = {}
+    for label in CONFIGS:
+        queue = ctx.Queue()
+        process = ctx.Process(target=measure, args=(scenario, label, steps, queue))
+        process.start()
+        results[label] = queue.get()
+        process.join()
+    base_rate = results["full"][0]
+    print(f"{title}, {steps} steps")
+    for label, (rate, frames, rss) in results.items():
+        print(f"{label:<20} | {rate:7.1f} steps/s (x{rate / base_rate:4.2f}) | {frames:>5} frames | pic RSS {rss:6.1f} Mo")
+
+
+if __name__ == "__main__":
+    check()
+    run(simulate, "run_simulation", 1000)
+    run(rollout, "boucle d'entraînement (ShooterEnvWrapper)", 1000)
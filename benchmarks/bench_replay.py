@@ -0,0 +1,181 @@
+# Replay buffer sur tableaux préalloués (core.rl.replay_buffer) vs l'ancien deque de tuples
+# Usage : python -m benchmarks.bench_replay
+import os
+import random
+import tempfile
+import time
+from collections import deque
+
+import numpy as np
+
+from core.mini_map import channel_names
+from core.obs_codec import MinimapCodec
+from core.rl.env_wrapper import flat_state_dim
+from core.rl.replay_buffer import MemmapReplayBuffer, ReplayBuffer
+
+MINIMAP_SHAPE = (len(channel_names), 64, 64)
+
+
+class DequeReplayBuffer:
+    # Ancienne implémentation (tuples dans un deque, np.array à chaque sample)
+    def __init__(self, capacity):
+        self.buffer = deque(maxlen=capacity)
+
+    def push(self, flat_state, minimap, action, reward, flat_next_state, next_minimap, done):
+        self.buffer.append((flat_state, minimap, action, reward, flat_next_state, next_minimap, done))
+
+    def sample(self, batch_size):
+        samples = random.sample(self.buffer, batch_size)
+        flat_s, minimap_s, a, r, flat_s2, minimap_s2, d = zip(*samples)
+        return (np.array(flat_s), np.array(minimap_s), np.array(a), np.array(r),
+                np.array(flat_s2), np.array(minimap_s2), np.array(d))
+
+    def __len__(self):
+        return len(self.buffer)
+
+
+def episodes(n, rng, shape=MINIMAP_SHAPE, max_len=60, truncate_every=4):
+    """
+    Flux de n transitions découpé en épisodes ; la récompense numérote la transition.
+    Un épisode sur truncate_every est tronqué : l'état suivant n'est pas l'état poussé ensuite.
+    """
+    flat_dim = flat_state_dim()
+    number, episode = 0, 0
+    while number < n:
+        state = (rng.random(flat_dim, dtype=np.float32), rng.random(shape, dtype=np.float32))
+        length = int(rng.integers(1, max_len))
+        for t in range(length):
+            if number >= n:
+                return
+            nxt = (rng.random(flat_dim, dtype=np.float32), rng.random(shape, dtype=np.float32))
+            done = t == length - 1 and episode % truncate_every != 0
+            yield state + (int(rng.integers(0, 13)), float(number)) + nxt + (done,)
+            number += 1
+            state = nxt
+        episode += 1
+
+
+def interleaved(n, rng, n_streams, shape):
+    # n_streams flux d'épisodes poussés à tour de rôle (VecShooterEnv), récompense renumérotée
+    streams = [list(episodes(n // n_streams, rng, shape=shape)) for _ in range(n_streams)]
+    for t in range(n // n_streams):
+        for k, stream in enumerate(streams):
+            yield stream[t][:3] + (float(t * n_streams + k),) + stream[t][4:], k
+
+
+def check(capacity=300, n=2000, seed=0, path=None, n_streams=1):
+    # Petites minimaps : on compare chaque transition tirée à celle qui a été poussée
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)
+    if n_streams == 1:
+        pushed, streams = list(episodes(n, rng, shape=(2, 4, 4))), [0] * n
+    else:
+        pushed, streams = map(list, zip(*interleaved(n, rng, n_streams, (2, 4, 4))))
+    if path is None:
+        buffer = ReplayBuffer(capacity)
+        for transition, stream in zip(pushed, streams):
+            buffer.push(*transition, stream=stream)
+    else:
+        # Moitié des transitions, fermeture, réouverture du dossier, le reste
+        buffer = MemmapReplayBuffer(path, capacity)
+        for transition, stream in zip(pushed[:n // 2], streams[:n // 2]):
+            buffer.push(*transition, stream=stream)
+        buffer.close()
+        buffer = MemmapReplayBuffer(path, capacity)
+        for transition, stream in zip(pushed[n // 2:], streams[n // 2:]):
+            buffer.push(*transition, stream=stream)
+    assert capacity * 0.9 <= len(buffer) <= capacity
+    for _ in range(20):
+        batch = buffer.sample(32)
+        for row in range(32):
+            number = int(batch[3][row])
+            assert number >= n - len(buffer), "transition évincée tirée"
+            ref = pushed[number]
+            assert np.array_equal(batch[0][row], ref[0]) and np.array_equal(batch[1][row], ref[1])
+            assert batch[2][row] == ref[2] and bool(batch[6][row]) == ref[6]
+            assert np.array_equal(batch[4][row], ref[4]) and np.array_equal(batch[5][row], ref[5]), "état suivant faux"
+    label = ("mémoire" if path is None else "memmap rechargé") + (f", {n_streams} flux entrelacés" if n_streams > 1 else "")
+    print(f"check {label} : {len(buffer)}/{capacity} transitions gardées, tirages identiques aux transitions poussées")
+
+
+def fill(buffer, n, seed=0):
+    # Même flux que main.train_dqn : l'état poussé est l'objet état suivant précédent
+    rng = np.random.default_rng(seed)
+    flat_dim = flat_state_dim()
+    obs = (rng.random(flat_dim, dtype=np.float32), rng.random(MINIMAP_SHAPE, dtype=np.float32))
+    for i in range(n):
+        nxt = (rng.random(flat_dim, dtype=np.float32), np.full(MINIMAP_SHAPE, i, dtype=np.float32))
+        buffer.push(obs[0], obs[1], i % 13, 0.0, nxt[0], nxt[1], False)
+        obs = nxt
+
+
+def anon_rss():
+    # Mémoire anonyme du processus (les pages des fichiers projetés n'y sont pas)
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def time_sample(buffer, batch_size, repeat=50):
+    buffer.sample(batch_size)
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            buffer.sample(batch_size)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def run(capacity=10_000, batch_size=64):
+    obs_bytes = (flat_state_dim() + int(np.prod(MINIMAP_SHAPE))) * 4
+    # L'ancien buffer garde deux observations par transition dès qu'elles sont copiées
+    # (TransitionRing.drain, états finaux de VecShooterEnv)
+    legacy_bytes = 2 * obs_bytes * capacity
+    legacy = DequeReplayBuffer(capacity)
+    fill(legacy, capacity)
+    t_legacy = time_sample(legacy, batch_size)
+    del legacy
+
+    buffer = ReplayBuffer(capacity)
+    fill(buffer, capacity)
+    t_new = time_sample(buffer, batch_size)
+    # Minimaps codées : taille des tableaux connue dès le premier push
+    coded = ReplayBuffer(capacity, codec=MinimapCodec())
+    fill(coded, 1)
+    print(f"capacité {capacity} | mémoire : deque {legacy_bytes / 2 ** 30:.2f} Gio"
+          f" -> préalloué {buffer.nbytes() / 2 ** 30:.2f} Gio (-{1 - buffer.nbytes() / legacy_bytes:.0%},"
+          f" une observation par transition + marge)"
+          f" -> minimaps codées {coded.nbytes() / 2 ** 30:.2f} Gio (-{1 - coded.nbytes() / legacy_bytes:.0%})")
+    print(f"sample({batch_size}) : deque {t_legacy * 1e3:.2f} ms -> préalloué {t_new * 1e3:.2f} ms"
+          f" (x{t_legacy / t_new:.1f})")
+
+
+def run_memmap(capacity, batch_size=64):
+    # Buffer plus gros que la RAM : la mémoire du processus ne grossit pas avec la capacité
+    with tempfile.TemporaryDirectory(dir=os.environ.get("REPLAY_DIR")) as path:
+        before = anon_rss()
+        buffer = MemmapReplayBuffer(path, capacity)
+        start = time.perf_counter()
+        fill(buffer, capacity)
+        buffer.flush()
+        t_fill = time.perf_counter() - start
+        t_sample = time_sample(buffer, batch_size, repeat=10)
+        grown = anon_rss() - before
+        print(f"memmap capacité {capacity} | fichiers {buffer.nbytes() / 2 ** 30:.2f} Gio"
+              f" | RAM anonyme +{grown / 2 ** 20:.0f} Mio | push {capacity / t_fill:.0f}/s"
+              f" | sample({batch_size}) {t_sample * 1e3:.2f} ms")
+        buffer.close()
+
+
+if __name__ == "__main__":
+    check()
+    check(n_streams=4)
+    with tempfile.TemporaryDirectory() as path:
+        check(path=path)
+    with tempfile.TemporaryDirectory() as path:
+        check(path=path, n_streams=4)
+    run()
+    run_memmap(20_000)
@@ -0,0 +1,47 @@
+# Temps moyen de Environment.step en fonction du nombre d'entités
+# Usage : python -m benchmarks.bench_spatial_hash
+import random
+import time
+
+import numpy as np
+
+from core.enemys.enemyKamikaze import EnemyKamikaze
+from core.enemys.mine import Mine
+from core.environment import Environment
+from core.objects.projectile import Projectile
+
+
+def build_env(n_extra, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment()
+    for i in range(n_extra):
+        x, y = np.random.uniform(0, 500, 2)
+        kind = i % 3
+        if kind == 0:
+            angle = np.random.uniform(0, 2 * np.pi)
+            proj = Projectile(x, y, np.cos(angle) * 0.01, np.sin(angle) * 0.01)
+            proj.ttl = 10**9  # reste vivant pendant toute la mesure
+            env.spawn_entity(proj)
+        elif kind == 1:
+            env.spawn_entity(Mine(x, y, trigger_radius=2.0, explosion_radius=5))
+        else:
+            env.spawn_entity(EnemyKamikaze(x, y, radius=3.0))
+    return env
+
+
+def bench(n_extra, steps=50):
+    env = build_env(n_extra)
+    env.step()  # échauffement
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step()
+    elapsed = time.perf_counter() - start
+    return len(env.objects) + len(env.agents), 1000 * elapsed / steps
+
+
+if __name__ == "__main__":
+    print(f"{'entities':>10} {'ms/step':>10}")
+    for n_extra in (0, 100, 250, 500, 1000, 2000):
+        n, ms = bench(n_extra)
+        print(f"{n:>10} {ms:>10.2f}")
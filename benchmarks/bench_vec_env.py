@@ -0,0 +1,78 @@
+# N environnements RL en lot (core.rl.vec_env) vs N ShooterEnvWrapper avancés un par un
+# Le gain ne croît pas avec N (x1.1 environ de 4 à 16 mondes, rien à 32) : seule la vision est groupée,
+# la mise à jour des objets et l'index spatial, objet par objet, restent propres à chaque monde
+# Usage : python -m benchmarks.bench_vec_env
+import random
+import time
+
+import numpy as np
+
+from core.environment import Environment
+from core.rl.env_wrapper import ShooterEnvWrapper
+from core.rl.vec_env import VecShooterEnv
+
+
+def serial(n_envs, steps, seed):
+    # Référence : une boucle Python par environnement, comme main.train_dqn
+    random.seed(seed)
+    np.random.seed(seed)
+    wrappers = []
+    for _ in range(n_envs):
+        env = Environment(use_rl=True)
+        wrappers.append(ShooterEnvWrapper(env, env.agents[0]))
+    for w in wrappers:
+        w.reset()
+    rng = np.random.default_rng(seed)
+    out = []
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = rng.integers(0, len(wrappers[0].agent.action_space), n_envs)
+        # Tous les mondes avancent avant les observations, comme dans VecShooterEnv
+        for w, a in zip(wrappers, actions):
+            w.act(int(a))
+            w.env.step()
+        obs = []
+        for w, a in zip(wrappers, actions):
+            flat, minimap = w.get_state()
+            reward, done = w.reward(w.agent.action_space[int(a)])
+            obs.append((flat, minimap, reward, done))
+        out.append(obs)
+        if any(done for *_, done in obs):
+            break
+    return out, time.perf_counter() - start
+
+
+def vectorized(n_envs, steps, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    vec_env = VecShooterEnv(n_envs, max_steps=10 ** 6)
+    vec_env.reset()
+    rng = np.random.default_rng(seed)
+    out = []
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = rng.integers(0, len(vec_env.wrappers[0].agent.action_space), n_envs)
+        flat, minimaps, rewards, dones = vec_env.step(actions)
+        out.append((flat, minimaps, rewards, dones))
+        if dones.any():
+            break
+    return out, time.perf_counter() - start
+
+
+def run(n_envs, steps=100, seed=0, repeat=3):
+    # Meilleur temps sur quelques répétitions (machine bruitée)
+    ref, t_ref = min((serial(n_envs, steps, seed) for _ in range(repeat)), key=lambda r: r[1])
+    got, t_got = min((vectorized(n_envs, steps, seed) for _ in range(repeat)), key=lambda r: r[1])
+    assert len(ref) == len(got)
+    for obs, (flat, minimaps, rewards, dones) in zip(ref, got):
+        for k, (f, m, r, d) in enumerate(obs):
+            assert np.array_equal(f, flat[k]) and np.array_equal(m, minimaps[k]), "observations différentes"
+            assert np.float32(r) == rewards[k] and d == dones[k], "récompenses différentes"
+    n = len(got) * n_envs
+    print(f"{n_envs:>3} envs | un par un {n / t_ref:7.0f} steps/s | VecShooterEnv {n / t_got:7.0f} steps/s"
+          f" | x{t_ref / t_got:4.2f} | {len(got)} pas identiques")
+
+
+if __name__ == "__main__":
+    for n in (1, 4, 16, 32):
+        run(n)
@@ -0,0 +1,115 @@
+# Vision vectorisée (core.vision_engine) vs l'ancienne double boucle Agent.get_vision
+# Usage : python -m benchmarks.bench_vision
+import random
+import time
+
+import numpy as np
+
+from core.agents.combat_agents import ScoutAgent, SniperAgent
+from core.entity_types import EntityType
+from core.scene_objects import spawn_objects
+from core.utils import is_blocked_by_wall
+from core.vision_engine import EntityArrays, visible_indices
+from core.enemys.enemy_drone import EnemyDrone
+from core.objects.projectile import Projectile
+from core.objects.rockWall import RockWall
+from core.objects.smoke_zone import JammerZone, SmokeZone
+
+
+def legacy_get_vision(agent, objects):
+    # Copie de l'implémentation d'origine, gardée comme référence
+    vision = []
+    agent.effective_range = agent.range
+    agent.effective_fov = agent.fov
+    walls = []
+    vec_self = np.array([agent.x, agent.y])
+    for obj in objects:
+        if not obj.alive:
+            continue
+        dist = np.linalg.norm(np.array([obj.x, obj.y]) - vec_self)
+        if obj.etype == EntityType.WALL:
+            walls.append(obj)
+        if obj.etype == EntityType.SMOKE and dist <= obj.radius:
+            agent.effective_range *= obj.get_vision_penalty()
+        if obj.etype == EntityType.JAMMER and dist <= obj.radius:
+            agent.effective_range = 0
+            return [obj]
+    for obj in objects:
+        if not obj.alive or obj == agent:
+            continue
+        vec = np.array([obj.x, obj.y]) - vec_self
+        dist = np.linalg.norm(vec)
+        if dist > agent.effective_range:
+            continue
+        if is_blocked_by_wall(agent, obj, walls):
+            continue
+        if getattr(obj, "cloaked", False):
+            continue
+        direction = np.arctan2(vec[1], vec[0])
+        delta = (direction - agent.facing_angle + np.pi) % (2 * np.pi) - np.pi
+        if abs(delta) <= agent.effective_fov / 2:
+            vision.append(obj)
+    return vision
+
+
+def build_world(n_entities, n_agents, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    objects = spawn_objects()
+    while len(objects) < n_entities:
+        x, y = np.random.uniform(0, 500, 2)
+        kind = len(objects) % 10
+        if kind == 0:
+            objects.append(RockWall(x, y, radius=np.random.uniform(1, 4)))
+        elif kind == 1:
+            objects.append(SmokeZone(x, y, radius=10.0))
+        elif kind == 2 and np.random.rand() < 0.1:
+            objects.append(JammerZone(x, y, radius=5.0))
+        elif kind < 6:
+            objects.append(Projectile(x, y, 1.0, 0.0))
+        else:
+            objects.append(EnemyDrone(x, y, patrol_radius=10))
+        if np.random.rand() < 0.05:
+            objects[-1].alive = False
+    agents = []
+    for i in range(n_agents):
+        x, y = np.random.uniform(50, 450, 2)
+        agent = (ScoutAgent if i % 2 else SniperAgent)(x, y)
+        agent.facing_angle = np.random.uniform(-np.pi, np.pi)
+        agent.cloaked = np.random.rand() < 0.2
+        agents.append(agent)
+    return agents, objects
+
+
+def check(n_trials=200):
+    for seed in range(n_trials):
+        agents, objects = build_world(200, 5, seed)
+        pool = objects + agents
+        batched = visible_indices(agents, EntityArrays(pool))
+        for agent, idx in zip(agents, batched):
+            fast_range = agent.effective_range
+            ref = legacy_get_vision(agent, pool)
+            assert [pool[i] for i in idx] == ref, f"seed {seed}: résultat différent"
+            assert fast_range == agent.effective_range, f"seed {seed}: effective_range différent"
+    print(f"équivalence OK sur {n_trials} mondes aléatoires")
+
+
+def bench(n_entities=500, n_agents=5, repeat=20):
+    agents, objects = build_world(n_entities, n_agents, seed=0)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for agent in agents:
+            legacy_get_vision(agent, objects)
+    legacy = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        visible_indices(agents, EntityArrays(objects))
+    fast = (time.perf_counter() - start) / repeat
+    print(f"{n_agents} agents x {n_entities} entités : "
+          f"boucle {1000 * legacy:.2f} ms, vectorisé {1000 * fast:.2f} ms (x{legacy / fast:.1f})")
+
+
+if __name__ == "__main__":
+    check()
+    bench()
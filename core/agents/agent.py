@@ -1,11 +1,16 @@
 from typing import Any, Dict
 import numpy as np
-from core.entity import Entity
+from core.entity import Entity, health_column
 from core.entity_types import EntityType
-from core.utils import is_blocked_by_wall
+from core.vision_engine import EntityArrays, visible_indices
 
 
 class Agent(Entity):
+    __slots__ = ("energy", "facing_angle", "range", "fov", "effective_range", "effective_fov",
+                 "can_communicate", "inbox", "cloaked", "cloak_duration", "time_alive",
+                 "last_attack_success", "zone_interdit", "delay_timer", "delay", "env")
+    health = health_column
+
     def __init__(self, x:float, y:float, radius:float=1.0,range_radius:float=30,fov_deg:float=90):
         super().__init__(x, y, radius, etype=EntityType.AGENT)
         self.energy = 100
@@ -92,7 +97,7 @@ class Agent(Entity):
         self.zone_interdit = False
 
         if env:
-            for obj in env.objects:
+            for obj in env.spatial.query_radius(new_pos[0], new_pos[1], self.radius + 0.5, (EntityType.WALL,)):
                 if getattr(obj, "block_movement", False):
                     dist = np.linalg.norm([obj.x - new_pos[0], obj.y - new_pos[1]])
                     if dist <= self.radius + obj.radius + 0.5:
@@ -128,56 +133,17 @@ class Agent(Entity):
             
 
     def get_vision(self, objects):
-        vision = []
-        self.effective_range = self.range
-        self.effective_fov = self.fov
-        walls = []
-        vec_self = np.array([self.x, self.y])
-        
-        for obj in objects:
-            if not obj.alive:
-                continue
-
-            vec_obj = np.array([obj.x, obj.y])
-            vec = vec_obj - vec_self
-            dist = np.linalg.norm(vec)
-            
-            if obj.etype == EntityType.WALL:
-                walls.append(obj)
-
-            if obj.etype == EntityType.SMOKE and dist <= obj.radius:
-                self.effective_range *= obj.get_vision_penalty()
-
-            if obj.etype == EntityType.JAMMER and dist <= obj.radius:
-                self.effective_range =0
-                return [obj]  # Vision bloquée
-            
-            
-
-        # Deuxième passe : vision normale
-        for obj in objects:
-            if not obj.alive or obj == self:
-                continue
-
-            vec_obj = np.array([obj.x, obj.y])
-            vec = vec_obj - vec_self
-            dist = np.linalg.norm(vec)
-
-            if dist > self.effective_range:
-                continue
-            if is_blocked_by_wall(self, obj, walls):
-                continue
-            
-            if getattr(obj, "cloaked", False):
-                continue  # Ignore les agents camouflés
-
-            direction = np.arctan2(vec[1], vec[0])
-            delta = self._angle_diff(direction, self.facing_angle)
-
-            if abs(delta) <= self.effective_fov / 2:
-                vision.append(obj)
-
-        return vision
+        # Calcul vectorisé (core.vision_engine) : mêmes règles que l'ancienne double boucle
+        # (fumée, brouillage, murs, camouflage, cône de vision)
+        env = getattr(self, "env", None)
+        perception = getattr(env, "perception", None)
+        if perception is not None:
+            # Perception partagée du tick (core.perception), recalculée seulement si le monde a bougé
+            return perception.visible(self, objects)
+        objects = list(objects)
+        occlusion = getattr(env, "occlusion", None)
+        visible = visible_indices([self], EntityArrays(objects), occlusion)[0]
+        return [objects[i] for i in visible]
   
 
     def _angle_diff(self, a, b):
@@ -3,6 +3,7 @@ from .agent import Agent
 from core.entity_types import EntityType
 
 class ScoutAgent(Agent):
+    __slots__ = ("speed",)
     def __init__(self, x, y, radius=0.8):
         super().__init__(x, y, radius=radius, range_radius=90, fov_deg=120)
         self.speed = 2.0
@@ -71,6 +72,7 @@ class ScoutAgent(Agent):
 
 
 class SniperAgent(Agent):
+    __slots__ = ("attack_range", "attack_power")
     def __init__(self, x, y, radius=0.8,range_radius=100):
         super().__init__(x, y, radius=radius, range_radius=range_radius, fov_deg=90)
         self.attack_range = 10.0
@@ -86,6 +88,7 @@ class SniperAgent(Agent):
 
 
 class GuardAgent(Agent):
+    __slots__ = ("guard_position", "patrol_radius", "speed")
     def __init__(self, x, y, radius=0.8, guard_x=None, guard_y=None):
         super().__init__(x, y, radius=radius, range_radius=60, fov_deg=120)
         self.guard_position = np.array([guard_x or x, guard_y or y])
@@ -110,6 +113,7 @@ class GuardAgent(Agent):
 # cacher invisible pour les tourelle par exemple une action qui le rend invisible au tourelle pour un tempd donner 
 #a voir avec l'evolution par exemple le Decoy 
 class KamikazeAgent(Agent):
+    __slots__ = ("speed", "explosion_range", "explosion_damage")
     def __init__(self, x, y, radius=0.8):
         super().__init__(x, y, radius=radius, range_radius=60, fov_deg=100)
         self.speed = 2.5
@@ -142,6 +146,7 @@ class KamikazeAgent(Agent):
 
 
 class SupportAgent(Agent):
+    __slots__ = ("heal_range", "heal_amount")
     def __init__(self, x, y, radius=0.8):
         super().__init__(x, y, radius=radius, range_radius=70, fov_deg=120)
         self.heal_range = 5.0
@@ -165,6 +170,7 @@ class SupportAgent(Agent):
 
 
 class HeavyAgent(Agent):
+    __slots__ = ("speed",)
     def __init__(self, x, y, radius=0.8):
         super().__init__(x, y, radius=radius, range_radius=40, fov_deg=90)
         self.health = 200
@@ -2,6 +2,7 @@ from core.entity import Entity
 from core.entity_types import EntityType
 
 class CommandCenterAgent(Entity):
+    __slots__ = ("inbox", "last_action")
     def __init__(self, x, y, radius=1.0):
         super().__init__(x, y, radius=radius, etype=EntityType.COMMAND_CENTER)
         self.inbox = []
@@ -1,6 +1,7 @@
 from core.agents.combat_agents import ScoutAgent
 
 class RLScoutAgent(ScoutAgent):
+    __slots__ = ("external_action", "action_space")
     def __init__(self, x, y, radius=0.8):
         super().__init__(x, y, radius)
         self.external_action = None
@@ -0,0 +1,384 @@
+import json
+import struct
+
+import numpy as np
+
+from core.frame_writer import numpy_default
+
+MAGIC = b"MATR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQQ")  # magic, version, réservé, frames, keyframe_every, offset meta, offset index
+
+# Entités qui ne bougent pas : écrites une fois (intervalle de présence), pas dans les blocs par frame
+STATIC_TYPES = ("wall", "target", "energy", "mine")
+
+ALL_VISIBLE = 0xFFFF  # l'agent voit tous les objets de la frame (ancien format)
+MATCH_TOLERANCE = 12.0  # déplacement maximal d'une entité entre deux frames pour garder son id
+MATCH_LOOKAHEAD = 8
+
+# Codes de type des champs (stockés en float32) : f float, i int, b bool, s chaîne, n None, j autre (JSON)
+_CODES = {'f': float, 'i': int, 'b': bool}
+
+
+def table_frame(frame):
+    """ Frame au format table d'objets ; convertit l'ancien format (liste de vues d'agents complètes) """
+    if isinstance(frame, dict):
+        return frame
+    objects = frame[-1]['visible'] if frame else []
+    agents = [{**entry, 'visible': list(range(len(objects)))} for entry in frame]
+    return {'objects': objects, 'agents': agents}
+
+
+def load_frames(path):
+    """ Frames d'un replay JSON (tableau) ou JSON Lines, au format table d'objets """
+    if path.endswith(".jsonl"):
+        from core.frame_writer import read_frames
+        frames = read_frames(path)
+    else:
+        with open(path) as f:
+            frames = json.load(f)
+    return [table_frame(frame) for frame in frames]
+
+
+def _code(value):
+    if isinstance(value, (bool, np.bool_)):
+        return 'b'
+    if isinstance(value, (int, np.integer)):
+        return 'i'
+    if isinstance(value, (float, np.floating)):
+        return 'f'
+    if isinstance(value, str):
+        return 's'
+    if value is None:
+        return 'n'
+    return 'j'
+
+
+def _flat_agent(entry):
+    # Entrée d'agent à plat : agent.x, facing.angle, action.type (ou action si ce n'est pas un dict)
+    flat = {}
+    for key, value in entry.items():
+        if key == 'visible':
+            continue
+        if isinstance(value, dict):
+            for sub, v in value.items():
+                flat[f"{key}.{sub}"] = v
+        else:
+            flat[key] = value
+    return flat
+
+
+def _nested_agent(flat):
+    entry = {}
+    for key, value in flat.items():
+        head, dot, sub = key.partition(".")
+        if dot:
+            entry.setdefault(head, {})[sub] = value
+        else:
+            entry[key] = value
+    return entry
+
+
+class BinaryReplayWriter:
+    """
+    Replay binaire compact, écrit en flux (même interface que FrameWriter : Environment(writer=...)).
+    - Entités de STATIC_TYPES : écrites une fois à la fermeture avec leur intervalle de frames.
+    - Autres objets : un bloc par sorte d'entité (type + champs) et par frame, ids compacts et une
+      colonne float32 par champ ; entre deux keyframes (toutes les keyframe_every frames) les
+      colonnes sont des deltas par rapport à la frame précédente décodée, les colonnes sans
+      changement sont omises.
+    - Agents : une ligne float32 par agent et par frame (agent, facing, action), visibilité en indices.
+    Métadonnées (sortes, statiques, chaînes) en JSON puis index des offsets de frames en fin de
+    fichier : le fichier n'est lisible qu'après close(). Un run qui peut s'interrompre écrit ses
+    frames avec FrameWriter (lisible après un crash) et les convertit ensuite (convert_replay).
+    Les objets n'ont pas d'id dans leur dict : une entité garde son id d'une frame à l'autre si elle
+    reste dans le même ordre à moins de MATCH_TOLERANCE (sinon nouvel id, seul le delta est perdu).
+    """
+    def __init__(self, path, keyframe_every=32):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0, keyframe_every, 0, 0))
+        self.kinds = {}
+        self.strings = {}
+        self.statics = []      # [objet, première frame, dernière frame]
+        self.open_statics = {}  # clé JSON -> records présents à la frame précédente
+        self.previous = {}     # sorte -> (ids, valeurs décodées) de la frame précédente
+        self.next_id = 0
+        self.offsets = []
+        self.frames = 0
+
+    def _kind(self, obj):
+        key = tuple((name, _code(value)) for name, value in obj.items())
+        if key not in self.kinds:
+            self.kinds[key] = len(self.kinds)
+        return key, self.kinds[key]
+
+    def _intern(self, text):
+        if text not in self.strings:
+            self.strings[text] = len(self.strings)
+        return self.strings[text]
+
+    def _values(self, key, obj):
+        row = []
+        for (name, code), value in zip(key, obj.values()):
+            if code == 's':
+                row.append(self._intern(value))
+            elif code == 'j':
+                row.append(self._intern(json.dumps(value, default=numpy_default)))
+            elif code == 'n':
+                row.append(0.0)
+            else:
+                row.append(float(value))
+        return row
+
+    def _static_records(self, statics, t):
+        # Objets statiques identiques d'une frame à l'autre : même record (multiensemble par clé JSON)
+        current = {}
+        for obj in statics:
+            current.setdefault(json.dumps(obj, sort_keys=True, default=numpy_default), []).append(obj)
+        records = []
+        still_open = {}
+        for key, objs in current.items():
+            previous = self.open_statics.get(key, [])
+            kept = previous[:len(objs)]
+            for obj in objs[len(kept):]:
+                self.statics.append([json.loads(json.dumps(obj, default=numpy_default)), t, t])
+                kept.append(len(self.statics) - 1)
+            for record in kept:
+                self.statics[record][2] = t
+            still_open[key] = kept
+            records.extend(zip(objs, kept))
+        self.open_statics = still_open
+        return records
+
+    def _match(self, key, rows):
+        ids_prev, values_prev = self.previous.get(key, ((), None))
+        names = [name for name, _ in key]
+        xi = names.index('x') if 'x' in names else None
+        yi = names.index('y') if 'y' in names else None
+        ids = []
+        p = 0
+        for row in rows:
+            found = None
+            for q in range(p, min(p + MATCH_LOOKAHEAD, len(ids_prev))):
+                if xi is None or yi is None or (abs(values_prev[q][xi] - row[xi]) <= MATCH_TOLERANCE
+                                                and abs(values_prev[q][yi] - row[yi]) <= MATCH_TOLERANCE):
+                    found = q
+                    break
+            if found is None:
+                ids.append(self.next_id)
+                self.next_id += 1
+            else:
+                ids.append(ids_prev[found])
+                p = found + 1
+        return np.array(ids, dtype=np.uint32)
+
+    def _block(self, key, kind, rows, keyframe):
+        ids = self._match(key, rows)
+        values = np.array(rows, dtype=np.float32).reshape(len(rows), len(key))
+        ids_prev, values_prev = self.previous.get(key, ((), None))
+        same = not keyframe and len(ids_prev) == len(ids) and np.array_equal(ids_prev, ids)
+        if keyframe:
+            deltas = values
+            decoded = values
+            mask = (1 << len(key)) - 1
+        else:
+            rows_prev = {i: r for r, i in enumerate(np.asarray(ids_prev).tolist())}
+            base = np.zeros_like(values)
+            for r, i in enumerate(ids.tolist()):
+                if i in rows_prev:
+                    base[r] = values_prev[rows_prev[i]]
+            deltas = values - base
+            decoded = base + deltas  # valeurs vues par le lecteur (arrondis float32 compris)
+            changed = (deltas != 0).any(axis=0)
+            mask = sum(1 << f for f in np.flatnonzero(changed).tolist())
+        self.previous[key] = (ids, decoded)
+        parts = [struct.pack("<HHII", kind, 1 if same else 0, len(ids), mask)]
+        if not same:
+            parts.append(ids.tobytes())
+        for f in range(len(key)):
+            if mask >> f & 1:
+                parts.append(np.ascontiguousarray(deltas[:, f]).tobytes())
+        return b"".join(parts)
+
+    def write(self, frame):
+        frame = table_frame(frame)
+        t = self.frames
+        keyframe = t % self.keyframe_every == 0
+        objects = frame['objects']
+        statics = [(i, o) for i, o in enumerate(objects) if o.get('type') in STATIC_TYPES]
+        static_records = self._static_records([o for _, o in statics], t)
+
+        # Ordre des objets à la lecture : statiques par record, puis blocs par sorte
+        groups = {}
+        for i, obj in enumerate(objects):
+            if obj.get('type') in STATIC_TYPES:
+                continue
+            key, kind = self._kind(obj)
+            groups.setdefault(kind, (key, []))[1].append(i)
+        record_of = {i: record for (i, _), (_, record) in zip(statics, static_records)}
+        order = sorted(record_of, key=record_of.get)
+        for kind in sorted(groups):
+            order.extend(groups[kind][1])
+        position = np.empty(len(objects), dtype=np.int64)
+        position[order] = np.arange(len(objects))
+
+        blocks = []
+        for kind in sorted(groups):
+            key, members = groups[kind]
+            blocks.append(self._block(key, kind, [self._values(key, objects[i]) for i in members], keyframe))
+        # Sortes absentes de cette frame : leurs entités ont disparu
+        present = {groups[kind][0] for kind in groups}
+        self.previous = {k: v for k, v in self.previous.items() if k in present}
+
+        parts = [struct.pack("<BH", keyframe, len(blocks))] + blocks
+        parts.append(struct.pack("<H", len(frame['agents'])))
+        for entry in frame['agents']:
+            flat = _flat_agent(entry)
+            key, kind = self._kind(flat)
+            parts.append(struct.pack("<H", kind))
+            parts.append(np.array(self._values(key, flat), dtype=np.float32).tobytes())
+            visible = entry.get('visible', [])
+            if len(objects) and sorted(visible) == list(range(len(objects))):
+                parts.append(struct.pack("<H", ALL_VISIBLE))
+            else:
+                parts.append(struct.pack("<H", len(visible)))
+                parts.append(position[np.asarray(visible, dtype=np.int64)].astype(np.uint16).tobytes())
+
+        self.offsets.append(self.file.tell())
+        self.file.write(b"".join(parts))
+        self.frames += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        meta = {
+            'kinds': [[list(field) for field in key] for key in self.kinds],
+            'statics': self.statics,
+            'strings': list(self.strings),
+        }
+        meta_offset = self.file.tell()
+        self.file.write(json.dumps(meta, default=numpy_default).encode())
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.offsets, dtype=np.uint64).tobytes())
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, self.frames, self.keyframe_every, meta_offset, index_offset))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryReplayReader:
+    """ Lecture d'un replay de BinaryReplayWriter ; frame(t) repart de la keyframe précédente (index) """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        magic, version, _, self.n_frames, self.keyframe_every, meta_offset, index_offset = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} n'est pas un replay binaire (version {VERSION})")
+        meta = json.loads(self.data[meta_offset:index_offset])
+        self.kinds = [[tuple(field) for field in key] for key in meta['kinds']]
+        self.statics = meta['statics']
+        self.strings = meta['strings']
+        self.offsets = np.frombuffer(self.data, dtype=np.uint64, count=self.n_frames, offset=index_offset)
+        self._cursor = None  # (dernière frame décodée, état des blocs)
+
+    def __len__(self):
+        return self.n_frames
+
+    def _typed(self, key, row):
+        obj = {}
+        for (name, code), value in zip(key, row.tolist()):
+            if code == 's':
+                obj[name] = self.strings[int(value)]
+            elif code == 'j':
+                obj[name] = json.loads(self.strings[int(value)])
+            elif code == 'n':
+                obj[name] = None
+            else:
+                obj[name] = _CODES[code](value)
+        return obj
+
+    def _decode(self, t, state):
+        data = self.data
+        pos = int(self.offsets[t])
+        keyframe, n_blocks = struct.unpack_from("<BH", data, pos)
+        pos += 3
+        objects = [dict(obj) for obj, first, last in self.statics if first <= t <= last]
+        new_state = {}
+        for _ in range(n_blocks):
+            kind, flags, n, mask = struct.unpack_from("<HHII", data, pos)
+            pos += 12
+            key = self.kinds[kind]
+            ids_prev, values_prev = state.get(kind, (np.zeros(0, dtype=np.uint32), None))
+            if flags & 1:
+                ids = ids_prev
+            else:
+                ids = np.frombuffer(data, dtype=np.uint32, count=n, offset=pos)
+                pos += 4 * n
+            if keyframe:
+                values = np.zeros((n, len(key)), dtype=np.float32)
+            else:
+                rows_prev = {i: r for r, i in enumerate(ids_prev.tolist())}
+                values = np.zeros((n, len(key)), dtype=np.float32)
+                for r, i in enumerate(ids.tolist()):
+                    if i in rows_prev:
+                        values[r] = values_prev[rows_prev[i]]
+            for f in range(len(key)):
+                if mask >> f & 1:
+                    values[:, f] += np.frombuffer(data, dtype=np.float32, count=n, offset=pos)
+                    pos += 4 * n
+            new_state[kind] = (ids, values)
+            objects.extend(self._typed(key, row) for row in values)
+
+        (n_agents,) = struct.unpack_from("<H", data, pos)
+        pos += 2
+        agents = []
+        for _ in range(n_agents):
+            (kind,) = struct.unpack_from("<H", data, pos)
+            key = self.kinds[kind]
+            row = np.frombuffer(data, dtype=np.float32, count=len(key), offset=pos + 2)
+            pos += 2 + 4 * len(key)
+            (n_visible,) = struct.unpack_from("<H", data, pos)
+            pos += 2
+            if n_visible == ALL_VISIBLE:
+                visible = list(range(len(objects)))
+            else:
+                visible = np.frombuffer(data, dtype=np.uint16, count=n_visible, offset=pos).tolist()
+                pos += 2 * n_visible
+            entry = _nested_agent(self._typed(key, row))
+            entry['visible'] = visible
+            agents.append(entry)
+        return {'objects': objects, 'agents': agents}, new_state
+
+    def frame(self, t):
+        if not 0 <= t < self.n_frames:
+            raise IndexError(t)
+        if self._cursor is not None and self._cursor[0] == t - 1 and t % self.keyframe_every:
+            state = self._cursor[1]
+            start = t
+        else:
+            state = {}
+            start = t - t % self.keyframe_every
+        for i in range(start, t + 1):
+            frame, state = self._decode(i, state)
+        self._cursor = (t, state)
+        return frame
+
+    def __iter__(self):
+        for t in range(self.n_frames):
+            yield self.frame(t)
+
+
+def convert_replay(source, target, keyframe_every=32):
+    """ Replay JSON / JSON Lines -> replay binaire, renvoie le nombre de frames """
+    frames = load_frames(source)
+    with BinaryReplayWriter(target, keyframe_every) as writer:
+        for frame in frames:
+            writer.write(frame)
+    return len(frames)
@@ -0,0 +1,407 @@
+import json
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+from core.entity_store import ETYPE_NAMES
+from core.frame_writer import numpy_default
+
+# Champs de to_dict lus en bloc dans les colonnes de l'EntityStore
+STORE_FIELDS = ("type", "x", "y", "radius", "alive", "health")
+
+# Autres champs de to_dict des objets, lus sur l'entité (objets qui en ont seulement)
+OBJECT_EXTRAS = {
+    "energy": lambda o: o.energy,
+    "cooldown_timer": lambda o: o.cooldown_timer,
+    "facing_angle": lambda o: o.facing_angle,
+    "fov": lambda o: o.fov,
+    "charging": lambda o: o.explosion_timer > 0,
+}
+
+# Ligne d'agent : agent.to_dict(), get_orientation() (x / y repris de l'agent), dx / dy de l'action
+AGENT_FIELDS = ("x", "y", "health", "energy", "range", "radius", "id", "angle", "length", "fov", "dx", "dy")
+ACTION_KEYS = {"type", "dx", "dy"}
+
+_store_row = attrgetter("id")
+# AGENT_FIELDS sans dx / dy, lus en un appel
+_agent_state = attrgetter("x", "y", "health", "energy", "range", "radius", "id", "facing_angle",
+                          "effective_range", "effective_fov")
+_NO_MOVE = (np.nan, np.nan)
+
+
+class GrowableColumn:
+    """
+    Colonne NumPy typée (ou bloc de width colonnes) : chaque ajout est gardé tel quel (un append
+    de liste), les morceaux sont réunis en un seul tableau tous les MERGE_EVERY ajouts et à la lecture
+    """
+    MERGE_EVERY = 256
+
+    def __init__(self, dtype, width=None):
+        self.data = np.empty((0,) if width is None else (0, width), dtype=dtype)
+        self.chunks = []
+        self.size = 0
+
+    def extend(self, values):
+        self.chunks.append(values)
+        self.size += len(values)
+        if len(self.chunks) >= self.MERGE_EVERY:
+            self.view()
+
+    def view(self):
+        if self.chunks:
+            self.data = np.concatenate([self.data] + self.chunks).astype(self.data.dtype, copy=False)
+            self.chunks = []
+        return self.data
+
+    def __len__(self):
+        return self.size
+
+
+class ListColumn(GrowableColumn):
+    """ GrowableColumn alimentée en valeurs Python (list.extend), converties en un seul np.array par fusion """
+    MERGE_EVERY = 16384
+
+    def append(self, value):
+        self.chunks.append(value)
+        self.size += 1
+        if len(self.chunks) >= self.MERGE_EVERY:
+            self.view()
+
+    def extend(self, values):
+        self.chunks.extend(values)
+        self.size += len(values)
+        if len(self.chunks) >= self.MERGE_EVERY:
+            self.view()
+
+    def view(self):
+        if self.chunks:
+            values = np.array(self.chunks, dtype=self.data.dtype).reshape((-1,) + self.data.shape[1:])
+            self.data = np.concatenate([self.data, values])
+            self.chunks = []
+        return self.data
+
+
+def _cast_column(kind, values):
+    # _cast sur une colonne entière
+    if kind is bool:
+        return values.astype(bool).tolist()
+    if kind is int:
+        integer = values == np.floor(values)
+        if integer.all():
+            return values.astype(np.int64).tolist()
+        return [int(v) if i else v for v, i in zip(values.tolist(), integer.tolist())]
+    return values.tolist()
+
+
+def _cast(kind, value):
+    # Type d'origine du champ (relevé sur un premier to_dict) ; un int devenu non entier reste float
+    if kind is bool:
+        return bool(value)
+    if kind is int and float(value).is_integer():
+        return int(value)
+    return float(value)
+
+
+class ColumnRecorder:
+    """
+    Historique en colonnes NumPy, sans dict pendant le run (Environment(recorder=...)) :
+    - objets : une ligne par objet vivant et par frame (frame_objects : début de chaque frame),
+      x / y / radius / health copiés en bloc depuis l'EntityStore, champs propres à certaines classes
+      (énergie, orientation des tourelles...) en colonnes creuses (ligne, valeur) ;
+    - agents : une ligne par entrée d'agent (état, orientation, code d'action, dx / dy) et la liste
+      des indices d'objets vus (visible_offsets / visible) ;
+    - pistes : chaque entité reçoit une piste [première frame, dernière frame] et garde son numéro
+      tant qu'elle reste vivante (les lignes du store libérées puis réutilisées ouvrent une nouvelle piste) ;
+      type et disposition de to_dict sont rangés par piste, lus en Python pour les seules pistes nouvelles.
+    Par frame, le travail Python par objet se limite aux lignes du store et id() (map en C) et aux
+    champs hors store ; les dicts (même format que Environment.history) ne sont construits que par
+    frames() / export().
+    """
+    def __init__(self):
+        self.layouts = []        # (classe, champs de to_dict, types) par disposition
+        self.layout_of = {}
+        self.layout_extras = []  # champs hors store de chaque disposition : (nom, lecture)
+        self.has_extras = np.zeros(0, dtype=np.bool_)
+        self.action_types = []   # codes d'action -> type
+        self.action_codes = {}
+        self.clear()
+
+    def clear(self):
+        self.frame_objects = []  # première ligne d'objets / d'agents de chaque frame
+        self.frame_agents = []
+        self.obj = {name: GrowableColumn(dtype) for name, dtype in (
+            ("track", np.int32), ("x", np.float64), ("y", np.float64), ("radius", np.float64), ("health", np.float64))}
+        self.extras = {name: (ListColumn(np.int64), ListColumn(np.float64)) for name in OBJECT_EXTRAS}
+        self.agent = ListColumn(np.float64, width=len(AGENT_FIELDS))
+        self.agent_layout = ListColumn(np.int16)
+        self.agent_action = ListColumn(np.int16)
+        # Objets vus : nombre par ligne d'agent, piste de chacun (indices dans la frame calculés à la lecture)
+        self.visible_counts = ListColumn(np.int64)
+        self.visible_tracks = GrowableColumn(np.int32)
+        # Par piste : première et dernière frame, type et disposition de to_dict
+        self.n_tracks = 0
+        self.track_first = np.zeros(0, dtype=np.int32)
+        self.track_last = np.zeros(0, dtype=np.int32)
+        self.track_etype = np.zeros(0, dtype=np.int16)
+        self.track_layout = np.zeros(0, dtype=np.int16)
+        self.other_actions = {}  # ligne d'agent -> action hors format {'type', 'dx', 'dy'}
+        # Par ligne du store : piste, id(entité) et frame de la dernière apparition
+        self.row_track = np.zeros(0, dtype=np.int32)
+        self.row_pyid = np.zeros(0, dtype=np.int64)
+        self.row_frame = np.zeros(0, dtype=np.int32)
+        self.pending = []  # (agent, état, action, objets vus) de la frame en cours
+        self.frames_count = 0
+
+    def _layout(self, entity, sample, known):
+        layout = self.layout_of.get(type(entity))
+        if layout is None:
+            missing = [name for name in sample if name not in known]
+            if missing:
+                raise ValueError(f"champs de {type(entity).__name__}.to_dict sans colonne : {missing}")
+            fields = tuple(sample)
+            types = tuple(type(v) if isinstance(v, (bool, int, str)) else float for v in sample.values())
+            layout = self.layout_of[type(entity)] = len(self.layouts)
+            self.layouts.append((type(entity).__name__, fields, types))
+            self.layout_extras.append(tuple((name, OBJECT_EXTRAS[name]) for name in fields if name in OBJECT_EXTRAS))
+            self.has_extras = np.array([bool(extras) for extras in self.layout_extras])
+        return layout
+
+    def _grow_rows(self, capacity):
+        # Le store a grandi : tableaux indexés par ligne du store à la même taille
+        n = len(self.row_track)
+        self.row_track = np.concatenate([self.row_track, np.zeros(capacity - n, dtype=np.int32)])
+        self.row_pyid = np.concatenate([self.row_pyid, np.zeros(capacity - n, dtype=np.int64)])
+        self.row_frame = np.concatenate([self.row_frame, np.full(capacity - n, -2, dtype=np.int32)])
+
+    def _open_tracks(self, entities, etypes, t):
+        """ Nouvelles pistes pour entities (ouvertes à la frame t), renvoie leurs numéros """
+        first, n = self.n_tracks, len(entities)
+        if first + n > len(self.track_first):
+            capacity = max(1024, 2 * (first + n))
+            for name in ("track_first", "track_last", "track_etype", "track_layout"):
+                old = getattr(self, name)
+                column = np.zeros(capacity, dtype=old.dtype)
+                column[:first] = old[:first]
+                setattr(self, name, column)
+        layout_of = self.layout_of
+        for o in entities:
+            if type(o) not in layout_of:
+                self._layout(o, o.to_dict(), STORE_FIELDS + tuple(OBJECT_EXTRAS))
+        tracks = slice(first, first + n)
+        self.track_first[tracks] = t
+        self.track_etype[tracks] = etypes
+        self.track_layout[tracks] = [layout_of[type(o)] for o in entities]
+        self.n_tracks += n
+        return np.arange(first, first + n, dtype=np.int32)
+
+    def record_agent(self, agent, action, visible):
+        """ Entrée d'un agent, juste après son action : état copié en un appel, codé en fin de frame """
+        self.pending.append((agent, _agent_state(agent), action, visible))
+
+    def _agent_rows(self, pending):
+        # Lignes (AGENT_FIELDS), dispositions et codes d'action des agents de la frame
+        layout_of = self.layout_of
+        action_codes = self.action_codes
+        first = len(self.agent)
+        states, layouts, actions = [], [], []
+        for k, (agent, state, action, _) in enumerate(pending):
+            layout = layout_of.get(type(agent))
+            if layout is None:
+                layout = self._layout(agent, agent.to_dict(), AGENT_FIELDS + ("type",))
+            if isinstance(action, dict) and action.keys() <= ACTION_KEYS and "type" in action:
+                code = action_codes.get(action["type"])
+                if code is None:
+                    code = action_codes[action["type"]] = len(self.action_types)
+                    self.action_types.append(action["type"])
+                states.append(state + (action.get("dx", np.nan), action.get("dy", np.nan)))
+            else:
+                code = -1
+                self.other_actions[first + k] = action
+                states.append(state + _NO_MOVE)
+            layouts.append(layout)
+            actions.append(code)
+        return states, layouts, actions
+
+    def end_frame(self, objects, store):
+        """
+        Objets de la frame (liste vide : agents seuls) et store de l'environnement : colonnes copiées
+        en bloc depuis le store ; agents, champs hors store et objets vus ajoutés en listes Python,
+        converties en tableaux par lots (ListColumn) et à la lecture
+        """
+        t = self.frames_count
+        columns = self.obj
+        start = len(columns["x"])
+        self.frame_objects.append(start)
+        self.frame_agents.append(len(self.agent))
+        pending = self.pending
+        if pending:
+            states, layouts, actions = self._agent_rows(pending)
+            self.agent.extend(states)
+            self.agent_layout.extend(layouts)
+            self.agent_action.extend(actions)
+
+        # Objets vivants seulement (ceux tués pendant la frame sont encore dans la liste)
+        rows = np.fromiter(map(_store_row, objects), dtype=np.int64, count=len(objects))
+        pyids = np.fromiter(map(id, objects), dtype=np.int64, count=len(objects))
+        alive = store.alive[rows]
+        index = None
+        if np.count_nonzero(alive) < len(rows):
+            index = alive.nonzero()[0]
+            rows, pyids = rows[index], pyids[index]
+        for name in ("x", "y", "radius", "health"):
+            columns[name].extend(getattr(store, name)[rows])
+
+        # Pistes : même ligne du store et même objet Python qu'à la frame précédente -> même piste
+        if len(self.row_track) < store.capacity:
+            self._grow_rows(store.capacity)
+        tracks = self.row_track[rows]
+        new = ((self.row_frame[rows] != t - 1) | (self.row_pyid[rows] != pyids)).nonzero()[0]
+        if len(new):
+            found = new if index is None else index[new]
+            tracks[new] = self._open_tracks([objects[i] for i in found.tolist()], store.etype[rows[new]], t)
+        self.track_last[tracks] = t
+        self.row_track[rows] = tracks
+        self.row_pyid[rows] = pyids
+        self.row_frame[rows] = t
+        columns["track"].extend(tracks)
+
+        # Champs hors store, lus sur les seuls objets qui en ont
+        layouts = self.track_layout[tracks]
+        with_extras = self.has_extras[layouts].nonzero()[0]
+        if len(with_extras):
+            entities = with_extras if index is None else index[with_extras]
+            layout_extras = self.layout_extras
+            extras = self.extras
+            for i, k, layout in zip(with_extras.tolist(), entities.tolist(), layouts[with_extras].tolist()):
+                o = objects[k]
+                for name, get in layout_extras[layout]:
+                    extras[name][0].append(start + i)
+                    extras[name][1].append(get(o))
+
+        # Objets vus : piste de chacun (les lignes du store viennent d'être associées aux pistes de la frame)
+        if pending:
+            visible = [entry[3] for entry in pending]
+            self.visible_counts.extend(list(map(len, visible)))
+            seen = np.fromiter(map(_store_row, chain.from_iterable(visible)), dtype=np.int64)
+            self.visible_tracks.extend(self.row_track[seen])
+        self.pending = []
+        self.frames_count += 1
+
+    def nbytes(self):
+        columns = list(self.obj.values()) + [c for pair in self.extras.values() for c in pair]
+        columns += [self.agent, self.agent_layout, self.agent_action, self.visible_counts, self.visible_tracks]
+        tracks = (self.track_first, self.track_last, self.track_etype, self.track_layout)
+        return (sum(c.view().nbytes for c in columns) + sum(a[:self.n_tracks].nbytes for a in tracks)
+                + 8 * (len(self.frame_objects) + len(self.frame_agents)))
+
+    def tracks(self):
+        """ Pistes des entités : (type, première frame, dernière frame) """
+        n = self.n_tracks
+        return [(ETYPE_NAMES[e], f, l) for e, f, l in zip(self.track_etype[:n].tolist(), self.track_first[:n].tolist(),
+                                                         self.track_last[:n].tolist())]
+
+    def _visible_indices(self):
+        """
+        Objets vus de chaque ligne d'agent -> indices dans la table d'objets de sa frame, tous en un passage :
+        (frame, piste) de chaque objet vu cherché parmi les (frame, piste) des lignes d'objets ; un objet
+        vu absent de la table (mort pendant la frame, ou frame sans objets) est ignoré comme dans history
+        """
+        counts = self.visible_counts.view()
+        seen = self.visible_tracks.view().astype(np.int64)
+        tracks = self.obj["track"].view().astype(np.int64)
+        object_starts = np.array(self.frame_objects + [len(tracks)], dtype=np.int64)
+        agent_starts = np.array(self.frame_agents + [len(counts)], dtype=np.int64)
+        frames = np.arange(self.frames_count, dtype=np.int64)
+        width = max(1, self.n_tracks)
+        keys = np.repeat(frames, np.diff(object_starts)) * width + tracks
+        order = np.argsort(keys)
+        keys = np.append(keys[order], -1)  # sentinelle : searchsorted peut renvoyer len(keys)
+        agent_frame = np.repeat(frames, np.diff(agent_starts))
+        wanted = np.repeat(agent_frame, counts) * width + seen
+        at = np.searchsorted(keys[:-1], wanted)
+        kept = keys[at] == wanted
+        row = order[at[kept]] - np.repeat(object_starts[:-1][agent_frame], counts)[kept]
+        # Début de la liste de chaque ligne d'agent : objets vus gardés avant elle
+        kept_before = np.concatenate([[0], np.cumsum(kept)])
+        offsets = kept_before[np.concatenate([[0], np.cumsum(counts)])]
+        return row.tolist(), offsets.tolist()
+
+    def _object_dicts(self):
+        # Toutes les lignes d'objets -> dicts, dans l'ordre des champs de to_dict de chaque classe ;
+        # colonnes converties en listes Python en bloc, une disposition à la fois
+        columns = {name: c.view() for name, c in self.obj.items()}
+        n = len(columns["x"])
+        for name, (rows, values) in self.extras.items():
+            column = columns[name] = np.full(n, np.nan)
+            column[rows.view()] = values.view()
+        layouts = self.track_layout[columns["track"]]
+        etypes = np.array(ETYPE_NAMES, dtype=object)[self.track_etype[columns["track"]]]
+        dicts = [None] * n
+        for layout, (_, fields, types) in enumerate(self.layouts):
+            rows = np.flatnonzero(layouts == layout)
+            if not len(rows):
+                continue
+            values = []
+            for name, kind in zip(fields, types):
+                if name == "type":
+                    values.append(etypes[rows].tolist())
+                elif name == "alive":
+                    values.append([True] * len(rows))  # seuls les objets vivants sont enregistrés
+                else:
+                    values.append(_cast_column(kind, columns[name][rows]))
+            for row, entry in zip(rows.tolist(), zip(*values)):
+                dicts[row] = dict(zip(fields, entry))
+        return dicts
+
+    def _agent_entry(self, row, columns):
+        _, fields, types = self.layouts[columns["layout"][row]]
+        agent = {}
+        for name, kind in zip(fields, types):
+            agent[name] = "agent" if name == "type" else _cast(kind, columns[name][row])
+        facing = {
+            "x": agent["x"], "y": agent["y"], "angle": columns["angle"][row],
+            "length": _cast(int, columns["length"][row]), "fov": columns["fov"][row],
+        }
+        code = columns["action"][row]
+        if code < 0:
+            action = self.other_actions[row]
+        else:
+            action = {"type": self.action_types[code]}
+            if columns["dx"][row] == columns["dx"][row]:  # NaN : pas de déplacement
+                action["dx"] = columns["dx"][row]
+                action["dy"] = columns["dy"][row]
+        return {"agent": agent, "facing": facing, "action": action}
+
+    def frames(self):
+        """ Frames au format de Environment.history : {'objects': [...], 'agents': [...]} """
+        objects = self._object_dicts()
+        columns = dict(zip(AGENT_FIELDS, self.agent.view().T.tolist()))
+        columns["layout"] = self.agent_layout.view().tolist()
+        columns["action"] = self.agent_action.view().tolist()
+        visible, visible_offsets = self._visible_indices()
+        object_starts = self.frame_objects + [len(objects)]
+        agent_starts = self.frame_agents + [len(self.agent_layout)]
+        for t in range(self.frames_count):
+            agents = []
+            for row in range(agent_starts[t], agent_starts[t + 1]):
+                entry = self._agent_entry(row, columns)
+                entry["visible"] = visible[visible_offsets[row]:visible_offsets[row + 1]]
+                agents.append(entry)
+            yield {"objects": objects[object_starts[t]:object_starts[t + 1]], "agents": agents}
+
+    def export(self, path):
+        """
+        Mêmes frames que Environment.export, écrites une à une en JSON compact (encodeur C du
+        module json, sans indentation)
+        """
+        with open(path, "w") as f:
+            f.write("[")
+            for t, frame in enumerate(self.frames()):
+                if t:
+                    f.write(",\n")
+                f.write(json.dumps(frame, default=numpy_default))
+            f.write("]")
+
+    def __len__(self):
+        return self.frames_count
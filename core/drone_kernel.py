@@ -0,0 +1,270 @@
+import math
+
+import numpy as np
+
+from core.enemys.elite_drone import EliteDrone
+from core.enemys.enemy_drone import EnemyDrone
+from core.entity_store import gather
+from core.utils import distance_to
+
+# Tolérance absolue : en dessous, la comparaison de distance est refaite avec distance_to
+_TOL = 1e-7
+
+PATTERNS = ("circle", "ellipse", "lemniscate", "spiral", "random", "square", "square_random")
+PATTERN_CODES = {name: code for code, name in enumerate(PATTERNS)}
+CIRCLE, ELLIPSE, LEMNISCATE, SPIRAL, RANDOM, SQUARE, SQUARE_RANDOM = range(len(PATTERNS))
+
+
+def pattern_code(name):
+    # Motif inconnu : cercle, comme la branche par défaut du code scalaire
+    return PATTERN_CODES.get(name, CIRCLE)
+
+
+def _hypot(dx, dy):
+    # math.hypot élément par élément : même arrondi que le code scalaire
+    return np.array([math.hypot(a, b) for a, b in zip(dx.tolist(), dy.tolist())], dtype=np.float64)
+
+
+def patrol_step(codes, s, elite):
+    """
+    Un pas de patrouille pour tous les drones, groupés par motif.
+    s : dict de tableaux (x, y, angle, speed, cx, cy, R, timer, dir_x, dir_y, tx, ty, has_t),
+    modifiés sur place avec exactement les mêmes opérations que EnemyDrone.patrol /
+    EliteDrone._execute_single_pattern.
+    Rend le masque des drones qui doivent tirer au hasard ce tick (repris en scalaire).
+    """
+    n = len(codes)
+    scalar = np.zeros(n, dtype=bool)
+    x, y, angle, speed = s["x"], s["y"], s["angle"], s["speed"]
+    cx, cy, R = s["cx"], s["cy"], s["R"]
+
+    randomish = (codes == RANDOM) | (codes == SQUARE_RANDOM)
+    if elite:
+        angle[:] = angle + speed * np.where(randomish, 0.5, 1.0)
+    else:
+        angle[:] = angle + speed
+
+    # Cercle, ellipse et spirale : formules fermées sur tous les drones, puis sélection
+    counts = np.bincount(codes, minlength=len(PATTERNS))
+    closed = (codes == CIRCLE) | (codes == ELLIPSE) | (codes == SPIRAL)
+    if closed.any():
+        rx = np.where(codes == SPIRAL, R * (1 + 0.05 * (angle % (2 * math.pi))), R)
+        ry = np.where(codes == ELLIPSE, R * 0.6, rx)
+        x[:] = np.where(closed, cx + rx * np.cos(angle), x)
+        y[:] = np.where(closed, cy + ry * np.sin(angle), y)
+
+    for code in (LEMNISCATE, RANDOM, SQUARE, SQUARE_RANDOM):
+        if not counts[code]:
+            continue
+        i = np.flatnonzero(codes == code)
+        a = angle[i]
+        if code == LEMNISCATE:
+            t = a * 2
+            denom = 1 + np.sin(t) ** 2
+            r = (R[i] * math.sqrt(2) * np.cos(t)) / denom
+            x[i] = cx[i] + r * np.cos(t) * 0.5
+            y[i] = cy[i] + r * np.sin(t) * 0.5
+        elif code == RANDOM:
+            timer = s["timer"][i] + 1
+            s["timer"][i] = timer
+            scalar[i[timer > 60]] = True
+            nx = x[i] + s["dir_x"][i] * speed[i]
+            ny = y[i] + s["dir_y"][i] * speed[i]
+            x[i] = nx
+            y[i] = ny
+            d = _hypot(nx - cx[i], ny - cy[i])
+            back = d > R[i] * 1.5
+            j = i[back]
+            s["dir_x"][j] = (cx[j] - nx[back]) / d[back]
+            s["dir_y"][j] = (cy[j] - ny[back]) / d[back]
+        elif code == SQUARE:
+            cd = math.pi / 2
+            h = R[i]
+            corner_x = np.stack([cx[i] - h, cx[i] + h, cx[i] + h, cx[i] - h])
+            corner_y = np.stack([cy[i] - h, cy[i] - h, cy[i] + h, cy[i] + h])
+            current = (a // cd).astype(np.int64) % 4
+            nxt = (current + 1) % 4
+            progress = (a % cd) / cd
+            cols = np.arange(len(i))
+            sx, sy = corner_x[current, cols], corner_y[current, cols]
+            ex, ey = corner_x[nxt, cols], corner_y[nxt, cols]
+            x[i] = sx + (ex - sx) * progress
+            y[i] = sy + (ey - sy) * progress
+            angle[i] = a + speed[i] * 0.5
+        elif code == SQUARE_RANDOM:
+            h = R[i]
+            scalar[i[~s["has_t"][i]]] = True
+            dx = s["tx"][i] - x[i]
+            dy = s["ty"][i] - y[i]
+            dist = _hypot(dx, dy)
+            scalar[i[dist < speed[i] * 2]] = True
+            move = (dist >= speed[i] * 2) & (dist > 0)
+            safe = np.where(move, dist, 1.0)
+            nx = np.where(move, x[i] + (dx / safe) * speed[i], x[i])
+            ny = np.where(move, y[i] + (dy / safe) * speed[i], y[i])
+            x[i] = np.maximum(cx[i] - h, np.minimum(cx[i] + h, nx))
+            y[i] = np.maximum(cy[i] - h, np.minimum(cy[i] + h, ny))
+    return scalar
+
+
+def _state(drones, patterns):
+    # Colonnes de patrouille, lues une fois par tick
+    _, (x, y) = gather(drones, ("x", "y"))
+    targets = [getattr(d, "square_target", None) for d in drones]
+    s = {
+        "x": x,
+        "y": y,
+        "angle": np.array([d.angle for d in drones], dtype=np.float64),
+        "speed": np.array([d.speed for d in drones], dtype=np.float64),
+        "cx": np.array([d.center[0] for d in drones], dtype=np.float64),
+        "cy": np.array([d.center[1] for d in drones], dtype=np.float64),
+        "R": np.array([d.patrol_radius for d in drones], dtype=np.float64),
+        "timer": np.array([d.random_timer for d in drones], dtype=np.int64),
+        "dir_x": np.array([d.random_direction[0] for d in drones], dtype=np.float64),
+        "dir_y": np.array([d.random_direction[1] for d in drones], dtype=np.float64),
+        "tx": np.array([t[0] if t else 0.0 for t in targets], dtype=np.float64),
+        "ty": np.array([t[1] if t else 0.0 for t in targets], dtype=np.float64),
+        "has_t": np.array([t is not None for t in targets], dtype=bool),
+    }
+    codes = np.array([pattern_code(p) for p in patterns], dtype=np.int8)
+    return s, codes
+
+
+class DronePlan:
+    """ Résultat précalculé pour un drone : cible, poursuite et patrouille """
+    __slots__ = ("drone", "x0", "y0", "target", "far", "dx", "dy", "patrol")
+
+    def __init__(self, drone, x0, y0):
+        self.drone = drone
+        self.x0 = x0
+        self.y0 = y0
+        self.target = None
+        self.far = False
+        self.dx = self.dy = 0.0
+        self.patrol = None  # (x, y, angle, random_timer, random_direction[, current_mix]) ou None
+
+    def valid(self, drone):
+        # Le plan n'est utilisable que si rien n'a bougé le drone ni tué sa cible depuis
+        if self.drone is not drone or drone.x != self.x0 or drone.y != self.y0:
+            return False
+        return self.target is None or self.target.alive
+
+
+class DroneKernel:
+    """
+    Noyau de déplacement des drones : au début de chaque tick, ciblage, poursuite et patrouille
+    de tous les EnemyDrone / EliteDrone sont calculés en NumPy (groupés par motif).
+    Chaque drone applique ensuite son plan à son tour dans la boucle des objets, pour garder
+    l'ordre des tirages aléatoires et des interactions ; sinon il reprend le code scalaire.
+    La patrouille n'est vectorisée qu'à partir de patrol_batch_min drones : en dessous, le coût
+    fixe des appels NumPy dépasse celui des quelques drones traités en Python.
+    """
+    def __init__(self, patrol_batch_min=16):
+        self.patrol_batch_min = patrol_batch_min
+        self.plans = {}
+
+    def plan_for(self, drone):
+        plan = self.plans.get(drone.id)
+        if plan is None or not plan.valid(drone):
+            return None
+        return plan
+
+    def plan(self, env):
+        self.plans = {}
+        drones = [o for o in env.objects if type(o) is EnemyDrone]
+        elites = [o for o in env.objects if type(o) is EliteDrone]
+        if drones:
+            self._plan_drones(env, drones)
+        if elites and len(elites) >= self.patrol_batch_min:
+            self._plan_elites(elites)
+
+    def _plan_drones(self, env, drones):
+        n = len(drones)
+        _, (x0, y0) = gather(drones, ("x", "y"))
+        plans = [DronePlan(d, px, py) for d, px, py in zip(drones, x0.tolist(), y0.tolist())]
+
+        # Ciblage : premier agent vivant à portée (ordre de env.agents)
+        agents = [a for a in env.agents if a.alive]
+        target = np.full(n, -1)
+        if agents:
+            _, (ax, ay) = gather(agents, ("x", "y"))
+            dist = np.sqrt((ax[None, :] - x0[:, None]) ** 2 + (ay[None, :] - y0[:, None]) ** 2)
+            reach = np.array([d.attack_range for d in drones], dtype=np.float64)[:, None]
+            in_range = dist <= reach
+            for i, j in zip(*np.nonzero(np.abs(dist - reach) <= _TOL)):
+                in_range[i, j] = distance_to(drones[i], agents[j]) <= reach[i, 0]
+            has = in_range.any(axis=1)
+            target[has] = in_range[has].argmax(axis=1)
+
+        # Poursuite : direction normalisée et test de portée de tir
+        chasing = np.flatnonzero(target >= 0)
+        if len(chasing):
+            t = target[chasing]
+            dx = ax[t] - x0[chasing]
+            dy = ay[t] - y0[chasing]
+            mag = _hypot(dx, dy)
+            safe = np.where(mag > 0, mag, 1.0)
+            dx = np.where(mag > 0, dx / safe, dx)
+            dy = np.where(mag > 0, dy / safe, dy)
+            fire = np.array([drones[i].fire_range for i in chasing.tolist()], dtype=np.float64)
+            d = dist[chasing, t]
+            far = d > fire
+            for k in np.flatnonzero(np.abs(d - fire) <= _TOL):
+                far[k] = distance_to(drones[chasing[k]], agents[t[k]]) > fire[k]
+            for k, i in enumerate(chasing.tolist()):
+                plan = plans[i]
+                plan.target = agents[t[k]]
+                plan.far = bool(far[k])
+                plan.dx = float(dx[k])
+                plan.dy = float(dy[k])
+
+        # Patrouille des drones sans cible
+        idle = np.flatnonzero(target < 0)
+        if len(idle) and len(idle) >= self.patrol_batch_min:
+            sub, codes = _state([drones[i] for i in idle.tolist()], [drones[i].patrol_type for i in idle.tolist()])
+            scalar = patrol_step(codes, sub, elite=False)
+            self._store_patrol(plans, idle, sub, scalar)
+
+        for plan in plans:
+            self.plans[plan.drone.id] = plan
+
+    def _plan_elites(self, elites):
+        # Seule la patrouille mélangée est précalculée ; ciblage et stratégies restent
+        # scalaires (ils dépendent de l'essaim et tirent au hasard à chaque tick)
+        mixers = [d.pattern_mixer for d in elites]
+        s, base = _state(elites, [m["base_pattern"] for m in mixers])
+        mix = np.array([pattern_code(m["mix_target"]) for m in mixers], dtype=np.int8)
+        current = np.array([m["current_mix"] for m in mixers], dtype=np.int64)
+        duration = np.array([m["mix_duration"] for m in mixers], dtype=np.int64)
+        plans = [DronePlan(d, px, py) for d, px, py in zip(elites, s["x"].tolist(), s["y"].tolist())]
+
+        # Fin de transition : nouveau mélange tiré au hasard -> code scalaire
+        mixing = np.flatnonzero(current < duration)
+        if len(mixing) == 0:
+            return
+        sub = {k: v[mixing].copy() for k, v in s.items()}
+        x0, y0 = sub["x"].copy(), sub["y"].copy()
+        step = current[mixing] + 1
+        ratio = step / duration[mixing]
+
+        # Les deux motifs s'enchaînent sur le même état (angle, minuteries), seule la position repart de x0
+        scalar = patrol_step(base[mixing], sub, elite=True)
+        x1, y1 = sub["x"].copy(), sub["y"].copy()
+        sub["x"], sub["y"] = x0, y0
+        scalar |= patrol_step(mix[mixing], sub, elite=True)
+        sub["x"] = x1 * (1 - ratio) + sub["x"] * ratio * 2
+        sub["y"] = y1 * (1 - ratio) + sub["y"] * ratio * 2
+        self._store_patrol(plans, mixing, sub, scalar, step)
+
+        for plan in plans:
+            self.plans[plan.drone.id] = plan
+
+    @staticmethod
+    def _store_patrol(plans, rows, sub, scalar, current_mix=None):
+        cols = [sub[k].tolist() for k in ("x", "y", "angle", "timer", "dir_x", "dir_y")]
+        mixes = current_mix.tolist() if current_mix is not None else [None] * len(rows)
+        for k, i in enumerate(rows.tolist()):
+            if scalar[k]:
+                continue
+            x, y, angle, timer, dir_x, dir_y = (c[k] for c in cols)
+            plans[i].patrol = (x, y, angle, timer, (dir_x, dir_y), mixes[k])
@@ -1,6 +1,7 @@
 from core.entity import Entity
 
 class Decoy(Entity):
+    __slots__ = ("lifespan", "creation_time")
     def __init__(self, x:float, y:float, lifespan:float=20,radius:float=0.8):
         super().__init__(x, y, radius=radius,etype='decoy')
         self.lifespan = lifespan
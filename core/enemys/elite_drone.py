@@ -13,6 +13,11 @@ class DroneStrategy(Enum):
     TRICKSTER = 5
 
 class EliteDrone(EnemyBase):
+    __slots__ = ("patrol_radius", "center", "angle", "attack_range", "fire_range", "target",
+                 "patrol_type", "role", "last_reproduction_time", "reproduction_cooldown",
+                 "health_cost", "random_direction", "random_timer", "adaptation_timer",
+                 "learned_behaviors", "current_strategy", "pattern_mixer", "dna",
+                 "last_known_target_pos", "failed_attacks", "evasiveness", "square_target")
     DRONE_TRAITS = {
         'speed': (0.05, 0.2),
         'fire_rate': (0.5, 2.0),
@@ -102,7 +107,14 @@ class EliteDrone(EnemyBase):
         if self.target:
             self._chase_or_attack(env)
         else:
-            self._advanced_patrol()
+            kernel = getattr(env, "drones", None)
+            plan = kernel.plan_for(self) if kernel is not None else None
+            if plan is not None and plan.patrol is not None:
+                # Patrouille mélangée précalculée par core.drone_kernel
+                self.x, self.y, self.angle, self.random_timer, self.random_direction, current_mix = plan.patrol
+                self.pattern_mixer['current_mix'] = current_mix
+            else:
+                self._advanced_patrol()
             
         # Reproduction occasionnelle
         self._maybe_reproduce(env)
@@ -113,9 +125,11 @@ class EliteDrone(EnemyBase):
 
     def _get_nearby_drones(self, env):
         
-        return [e for e in env.objects 
+        swarm_range = 20 * self.dna['swarm_aggression']
+        candidates = env.spatial.query_radius(self.x, self.y, swarm_range, (EntityType.ENERGY_DRONE_ELITE,))
+        return [e for e in candidates
                 if e != self and isinstance(e, EliteDrone) 
-                and distance_to(self, e) < 20 * self.dna['swarm_aggression']]
+                and distance_to(self, e) < swarm_range]
 
     def _swarm_behavior(self, nearby_drones):
         # Partage d'information sur les cibles
@@ -417,7 +431,7 @@ class EliteDrone(EnemyBase):
         
             
     def _maybe_reproduce(self, env):
-                num_drones = sum(1 for e in env.objects if isinstance(e, EliteDrone))
+                num_drones = env.spatial.count(EntityType.ENERGY_DRONE_ELITE)
                 if num_drones >= MAX_DRONES_ELITE:
                     return
 
@@ -1,8 +1,11 @@
 from typing import Any, Dict
-from core.entity import Entity
+from core.entity import Entity, health_column
 
 
 class EnemyBase(Entity):
+    __slots__ = ("speed",)
+    health = health_column
+
     def __init__(self, x, y, radius=3.0, health=100, speed=0.1, etype="enemy"):
         super().__init__(x, y, radius, etype=etype)
         self.health = health
@@ -5,6 +5,8 @@ from core.utils import distance_to
 
 
 class EnemyKamikaze(EnemyBase):
+    __slots__ = ("explosion_radius", "explosion_damage", "activation_radius", "explosion_timer",
+                 "explosion_delay", "target")
     def __init__(self, x, y, radius=2.5, speed=0.2, explosion_radius=5.0, explosion_damage=20):
         super().__init__(x, y, radius=radius, health=50, speed=speed, etype="enemy_kamikaze")
         self.explosion_radius = explosion_radius
@@ -56,7 +58,7 @@ class EnemyKamikaze(EnemyBase):
                 in_range = True
                
         # Vérifie si un mur ou un obstacle est proche
-        for obj in env.objects:
+        for obj in env.spatial.query_radius(self.x, self.y, self.explosion_radius, (EntityType.WALL,)):
             if getattr(obj, "alive", False) and obj.etype == EntityType.WALL:
                 if distance_to(self, obj) <= self.explosion_radius:
                     in_range = True
@@ -69,7 +71,7 @@ class EnemyKamikaze(EnemyBase):
                 env.spawn_explosion(self.x, self.y, self.explosion_radius)
 
                 # Dégâts aux agents proches
-                for agent in env.agents:
+                for agent in env.spatial.query_radius(self.x, self.y, self.explosion_radius, (EntityType.AGENT,)):
                     if agent.alive and distance_to(self, agent) <= self.explosion_radius:
                         agent.take_damage(self.explosion_damage)
 
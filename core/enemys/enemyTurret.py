@@ -4,6 +4,9 @@ from core.utils import distance_to
 
 
 class EnemyTurret(EnemyBase):
+    __slots__ = ("fire_range", "cooldown_timer", "target", "health_max", "cooldown_min",
+                 "cooldown_max", "last_health", "facing_angle", "fov", "rotation_speed",
+                 "scan_mode", "cooldown")
     def __init__(self, x, y, radius=2.0, health=150, fire_range=20):
         super().__init__(x, y, radius=radius, health=health, speed=0, etype="enemy_turret")
         self.fire_range = fire_range
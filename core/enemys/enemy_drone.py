@@ -5,7 +5,10 @@ from core.utils import MAX_DRONES, distance_to
 import math
 import random
 
-class EnemyDrone(EnemyBase):  
+class EnemyDrone(EnemyBase):
+    __slots__ = ("patrol_radius", "center", "angle", "attack_range", "fire_range", "target", "patrol_type",
+                 "random_direction", "random_timer", "last_reproduction_time", "reproduction_cooldown",
+                 "health_cost", "cooldown", "cooldown_timer", "role", "square_target")
     def __init__(self, x, y, patrol_radius=10, radius=3.0,fire_range = 10.0 ,patrol_type="circle",role:str='any'):
         super().__init__(x, y, radius=radius, health=100, speed=0.1, etype=EntityType.ENERGY_DRONE)
         self.patrol_radius = patrol_radius
@@ -29,14 +32,33 @@ class EnemyDrone(EnemyBase):
 
     def update(self, env):
         self.last_reproduction_time += 1
-        self.find_target(env)
-        if self.target:
-            self.chase_or_attack(env)
+        kernel = getattr(env, "drones", None)
+        plan = kernel.plan_for(self) if kernel is not None else None
+        if plan is not None:
+            # Ciblage / poursuite / patrouille précalculés par core.drone_kernel
+            self._apply_plan(env, plan)
         else:
-            self.patrol()
+            self.find_target(env)
+            if self.target:
+                self.chase_or_attack(env)
+            else:
+                self.patrol()
             
         self._maybe_reproduce(env)
 
+    def _apply_plan(self, env, plan):
+        self.target = plan.target
+        if self.target:
+            if plan.far:
+                self.x += plan.dx * self.speed * 2
+                self.y += plan.dy * self.speed * 2
+            else:
+                self._attack(env, plan.dx, plan.dy)
+        elif plan.patrol is not None:
+            self.x, self.y, self.angle, self.random_timer, self.random_direction, _ = plan.patrol
+        else:
+            self.patrol()
+
     def find_target(self, env):
         self.target = None
         for agent in env.agents:
@@ -61,22 +83,25 @@ class EnemyDrone(EnemyBase):
             self.x += dx * self.speed * 2
             self.y += dy * self.speed * 2
         else:
-            # Attack
-            self.cooldown_timer +=1
-            if  self.cooldown_timer >= self.cooldown:
-                noisex,noisey = np.random.randint(-5,5),np.random.randint(-5,5)
-                if self.role == Role.JammerComunication:
-                    env.spawn_jammer_communication(self.x+noisex, self.y+noisey,moving=True,owner=self)
-                elif self.role == Role.SMOKER:
-                    env.spawn_smoke_zone(self.x+noisex, self.y+noisey,moving=True, owner=self)
-                    
-                else:
-                    env.spawn_projectile(self.x, self.y, dx, dy, self)
+            self._attack(env, dx, dy)
+
+    def _attack(self, env, dx, dy):
+        # Attack
+        self.cooldown_timer +=1
+        if  self.cooldown_timer >= self.cooldown:
+            noisex,noisey = np.random.randint(-5,5),np.random.randint(-5,5)
+            if self.role == Role.JammerComunication:
+                env.spawn_jammer_communication(self.x+noisex, self.y+noisey,moving=True,owner=self)
+            elif self.role == Role.SMOKER:
+                env.spawn_smoke_zone(self.x+noisex, self.y+noisey,moving=True, owner=self)
                 
-                self.cooldown_timer =0
+            else:
+                env.spawn_projectile(self.x, self.y, dx, dy, self)
+            
+            self.cooldown_timer =0
     
     
-            
+        
     def patrol(self):
         self.angle += self.speed
         
@@ -189,7 +214,7 @@ class EnemyDrone(EnemyBase):
             self.y = self.center[1] + self.patrol_radius * math.sin(self.angle)
 
     def _maybe_reproduce(self, env):
-            num_drones = sum(1 for e in env.objects if isinstance(e, EnemyDrone))
+            num_drones = env.spatial.count(EntityType.ENERGY_DRONE)
             if num_drones >= MAX_DRONES:
                 return
 
@@ -1,8 +1,10 @@
 from core.entity import Entity
+from core.entity_types import EntityType
 from core.utils import distance_to
 
 
 class Mine(Entity):
+    __slots__ = ("explosion_radius", "triggered")
     def __init__(self, x, y, trigger_radius=8.0, explosion_radius=3.0):
         super().__init__(x, y, radius=trigger_radius, etype="mine")
         self.explosion_radius = explosion_radius
@@ -12,7 +14,7 @@ class Mine(Entity):
         if self.triggered or not self.alive:
             return
 
-        for agent in env.agents:
+        for agent in env.spatial.query_radius(self.x, self.y, self.radius, (EntityType.AGENT,)):
             if agent.alive and distance_to(self, agent) <= self.radius:
                 self.triggered = True
                 env.spawn_explosion(self.x, self.y, self.explosion_radius)
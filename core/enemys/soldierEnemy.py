@@ -4,6 +4,7 @@ import numpy as np
 
 
 class SoldierEnemy(Entity):
+    __slots__ = ("vision_range", "speed", "patrol_target", "state")
     def __init__(self, x, y, radius=1.5, vision_range=15):
         super().__init__(x, y, radius)
         self.vision_range = vision_range
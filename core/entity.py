@@ -1,18 +1,73 @@
-import uuid
 from typing import Dict, Any
 
 import numpy as np
+from core.entity_store import active_store, etype_code
 
 class Entity:
+    # Vue mince sur une ligne de l'EntityStore de l'environnement actif (id : indice de la ligne) :
+    # x, y, radius, alive (et health / owner pour les sous-classes qui en ont) vivent dans des
+    # colonnes NumPy contiguës. etype ne change pas après la création : attribut simple,
+    # son code est écrit une fois dans la colonne "etype".
+    __slots__ = ("_store", "id", "etype")
+
     def __init__(self, x:float, y:float, radius:float=1.0, etype:str="generic"):
-        self.id = str(uuid.uuid4())
+        store = self._store = active_store()
+        self.id = store.allocate()
         self.x = x
         self.y = y
         self.radius = radius
         self.etype = etype
+        store.etype[self.id] = etype_code(etype)
         #self.active = True
         self.alive = True  # utile pour explosion/destruction
 
+    def __del__(self):
+        # La ligne n'est rendue au store que lorsque plus rien ne référence l'entité
+        try:
+            self._store.release(self.id)
+        except (AttributeError, TypeError):
+            pass
+
+    @property
+    def x(self):
+        return self._store._x[self.id]
+
+    @x.setter
+    def x(self, value):
+        store = self._store
+        store._x[self.id] = value
+        store.version += 1
+
+    @property
+    def y(self):
+        return self._store._y[self.id]
+
+    @y.setter
+    def y(self, value):
+        store = self._store
+        store._y[self.id] = value
+        store.version += 1
+
+    @property
+    def radius(self):
+        return self._store._radius[self.id]
+
+    @radius.setter
+    def radius(self, value):
+        store = self._store
+        store._radius[self.id] = value
+        store.version += 1
+
+    @property
+    def alive(self):
+        return self._store._alive[self.id]
+
+    @alive.setter
+    def alive(self, value):
+        store = self._store
+        store._alive[self.id] = value
+        store.version += 1
+
 
     def to_dict(self)-> Dict[str, Any]:
         return {
@@ -39,6 +94,19 @@ class Entity:
             "haut_gauche": dx < 0 and dy > 0
         }
 
+
+def _get_health(self):
+    return self._store._health[self.id]
+
+
+def _set_health(self, value):
+    self._store._health[self.id] = value
+
+
+# Colonne "health" du store, exposée seulement par les classes qui ont des points de vie
+# (hasattr(obj, "health") reste faux pour les autres entités)
+health_column = property(_get_health, _set_health)
+
         
 
 
@@ -0,0 +1,130 @@
+import numpy as np
+from core.entity_types import EntityType
+
+# Codes entiers des types d'entités (colonne "etype" du store)
+ETYPE_NAMES = []
+ETYPE_CODES = {}
+
+
+def etype_code(etype):
+    code = ETYPE_CODES.get(etype)
+    if code is None:
+        code = len(ETYPE_NAMES)
+        ETYPE_NAMES.append(etype)
+        ETYPE_CODES[etype] = code
+    return code
+
+
+for _etype in EntityType.all() + [EntityType.DECOY, EntityType.ENERGY_DRONE_ELITE, EntityType.ENEMY_TURREL,
+                                  "mine", "explosion", "object", "generic"]:
+    etype_code(_etype)
+
+
+class EntityStore:
+    """
+    Stockage en colonnes (structure-of-arrays) des données communes à toutes les entités.
+    Chaque Environment a son store ; l'id d'une entité est l'indice de sa ligne dans ce store.
+    Les lignes libérées (entité ramassée par le GC) sont réutilisées (free-list) : un id n'est
+    unique que parmi les entités vivantes d'un même environnement, pas d'un épisode à l'autre.
+    Les colonnes peuvent être réallouées quand le store grandit : ne pas garder de référence
+    à un tableau entre deux créations d'entités.
+    """
+    COLUMNS = (
+        ("x", np.float64),
+        ("y", np.float64),
+        ("radius", np.float64),
+        ("health", np.float64),
+        ("alive", np.bool_),
+        ("etype", np.int16),
+        ("owner", np.int32),
+    )
+
+    def __init__(self, capacity=256):
+        self.capacity = 0
+        self.size = 0  # nombre de lignes déjà utilisées au moins une fois
+        self.n_used = 0
+        self.version = 0  # incrémenté à chaque écriture de position / rayon / état (cache de perception)
+        self.projectiles = None  # colonnes propres aux projectiles (core.objects.projectile), au premier tir
+        self._free = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for name, dtype in self.COLUMNS:
+            column = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                column[:self.capacity] = getattr(self, name)
+            setattr(self, name, column)
+        # Vues memoryview : accès scalaire rapide pour les propriétés des entités
+        for name, _ in self.COLUMNS:
+            setattr(self, "_" + name, memoryview(getattr(self, name)))
+        self.capacity = capacity
+
+    def allocate(self):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow(2 * self.capacity)
+            slot = self.size
+            self.size += 1
+        self.x[slot] = 0.0
+        self.y[slot] = 0.0
+        self.radius[slot] = 0.0
+        self.health[slot] = np.nan
+        self.alive[slot] = True
+        self.etype[slot] = 0
+        self.owner[slot] = -1
+        self.n_used += 1
+        return slot
+
+    def release(self, slot):
+        self.alive[slot] = False
+        self.owner[slot] = -1
+        self._free.append(slot)
+        self.n_used -= 1
+
+    def touch(self):
+        # À appeler après une écriture groupée dans les colonnes (hors propriétés des entités)
+        self.version += 1
+
+    def nbytes_per_row(self):
+        return sum(np.dtype(dtype).itemsize for _, dtype in self.COLUMNS)
+
+
+# Store par défaut du processus : entités créées hors de tout environnement
+STORE = EntityStore()
+_active = STORE
+
+
+def active_store():
+    """ Store où vont les entités créées maintenant """
+    return _active
+
+
+def use_store(store):
+    # Environment active son store pendant sa construction et chacun de ses steps
+    global _active
+    _active = store
+
+
+def gather(entities, names):
+    """
+    Ids et colonnes names d'une liste d'entités, dans l'ordre. Les entités peuvent venir de
+    plusieurs environnements (minimaps de N mondes) : une lecture par store dans ce cas.
+    """
+    n = len(entities)
+    ids = np.fromiter((e.id for e in entities), dtype=np.intp, count=n)
+    stores = [e._store for e in entities]
+    first = stores[0] if n else _active
+    if all(s is first for s in stores):
+        return ids, [getattr(first, name)[ids] for name in names]
+    columns = [np.empty(n, dtype=getattr(first, name).dtype) for name in names]
+    groups = {}
+    for i, s in enumerate(stores):
+        groups.setdefault(id(s), (s, []))[1].append(i)
+    for s, rows in groups.values():
+        rows = np.array(rows, dtype=np.intp)
+        for column, name in zip(columns, names):
+            column[rows] = getattr(s, name)[ids[rows]]
+    return ids, columns
+
@@ -1,25 +1,75 @@
 import json
+from collections import deque
 from typing import Dict
 from core.enemys.decoy import Decoy
+from core.drone_kernel import DroneKernel
 from core.entity import Entity
+from core.entity_store import EntityStore, use_store
+from core.entity_types import EntityType
+from core.frame_writer import numpy_default
 from core.objects.explosion import Explosion
+from core.occlusion import WallOcclusion
+from core.perception import PerceptionCache
+from core.projectile_batch import ProjectileBatch
 from core.objects.smoke_zone import  JammerCommunication, JammerZone, SmokeZone
 from core.scene_objects import spawn_agent, spawn_objects
-from core.utils import to_serializable
+from core.spatial_hash import SpatialHash
 from core.vision import Vision
 from core.objects.projectile import Projectile
 
+# Niveaux d'enregistrement de self.history
+RECORD_OFF = "off"        # rien : aucun dict construit pendant le step
+RECORD_AGENTS = "agents"  # agents seuls (état, orientation, action), table d'objets vide
+RECORD_FULL = "full"      # agents, table des objets vivants et visibilité de chaque agent
+RECORD_LEVELS = (RECORD_OFF, RECORD_AGENTS, RECORD_FULL)
+
 
 class Environment:
-    def __init__(self, width=500, height=500, use_rl=False):
+    """
+    record : niveau d'enregistrement de history (RECORD_OFF / RECORD_AGENTS / RECORD_FULL),
+    record_every : une frame enregistrée tous les record_every ticks (la première toujours),
+    max_history : history en tampon circulaire des max_history dernières frames (None : illimité) ;
+    ValueError avec writer ou recorder, qui remplacent history et gardent toutes les frames,
+    writer : FrameWriter qui reçoit les frames au fil du run à la place de history,
+    recorder : ColumnRecorder qui enregistre les frames en colonnes NumPy à la place de history.
+    """
+    def __init__(self, width=500, height=500, use_rl=False, record=RECORD_FULL, record_every=1, max_history=None,
+                 writer=None, recorder=None):
         self.width = width
         self.height = height
         self.use_rl=use_rl
+        if record not in RECORD_LEVELS:
+            raise ValueError(f"record doit être dans {RECORD_LEVELS}, reçu {record!r}")
+        if record_every < 1:
+            raise ValueError("record_every doit être >= 1")
+        if max_history is not None and (writer is not None or recorder is not None):
+            raise ValueError("max_history ne s'applique qu'à history : incompatible avec writer et recorder")
+        self.record = record
+        self.record_every = record_every
+        self.max_history = max_history
+        self.writer = writer
+        self.recorder = recorder
+        # Entités de cet environnement : leur store, actif pendant la construction et chaque step
+        self.store = EntityStore()
+        use_store(self.store)
         
         self.agents =self._spawn_agent()
         self.vision = Vision()
         self.objects = self._spawn_objects()
-        self.history = []
+        self.clear_history()
+
+        # Index spatial partagé pour les requêtes de voisinage
+        self.spatial = SpatialHash(SpatialHash.cell_size_for(self.agents + self.objects))
+        self.spatial.rebuild(self.agents + self.objects)
+        # Occlusion statique des murs (la carte ne bouge pas)
+        self.occlusion = WallOcclusion(o for o in self.objects if o.etype == EntityType.WALL)
+        # Projectiles avancés et résolus en lot
+        self.projectiles = ProjectileBatch()
+        # Patrouille / poursuite des drones calculées en lot
+        self.drones = DroneKernel()
+        # Vision des agents mise en cache par tick (invalidée dès que le monde change)
+        self.version = 0
+        self.perception = PerceptionCache(self)
         
         
         self.time =0
@@ -36,35 +86,71 @@ class Environment:
         
     def spawn_explosion(self, x, y, radius=3.0):
         explosion = Explosion(x, y, radius)
-        self.objects.append(explosion)
+        self.spawn_entity(explosion)
         
     def spawn_projectile(self, x, y, dx, dy,owner=None):
         proj = Projectile(x, y, dx, dy,owner)
+        # Pas d'index spatial pour les projectiles : personne ne les cherche par voisinage
+        self.version += 1
         self.objects.append(proj)
+        self.projectiles.add(proj)
         
    
     def spawn_jammer_communication(self, x, y,moving, owner=None):
         jammer = JammerCommunication(x, y,radius=20.0,moving=moving,ttl=10)
-        self.objects.append(jammer)
+        self.spawn_entity(jammer)
         
     def spawn_smoke_zone(self, x, y,moving, owner=None):
         smoke = SmokeZone(x, y,radius=20.0,moving=moving,ttl=10)
-        self.objects.append(smoke)
+        self.spawn_entity(smoke)
         
     def spawn_jammer(self, x, y,moving, owner=None):
         jammerZone = JammerZone(x, y,radius=20.0,moving=moving,ttl=10)
-        self.objects.append(jammerZone)
+        self.spawn_entity(jammerZone)
         
     def spawn_entity(self,child):
+        self.version += 1
         self.objects.append(child)
+        self.spatial.insert(child)
         
     def spawn_decoy(self, x, y, lifespan=20):
         decoy = Decoy(x, y, lifespan)
-        self.objects.append(decoy)
+        self.spawn_entity(decoy)
+
+
 
+    def clear_history(self):
+        self.history = [] if self.max_history is None else deque(maxlen=self.max_history)
+        if getattr(self, "recorder", None) is not None:
+            self.recorder.clear()
 
+    def recording(self):
+        """ La frame du tick courant est-elle enregistrée ? """
+        return self.record != RECORD_OFF and (self.time - 1) % self.record_every == 0
+
+    def _record_frame(self, step_info):
+        """
+        Frame de l'historique : {'objects': table des objets vivants (sérialisés une fois),
+        'agents': [{'agent', 'facing', 'action', 'visible': indices dans objects des objets vus}]}.
+        """
+        index = {}
+        objects = []
+        if self.record == RECORD_FULL:
+            for o in self.objects:
+                if getattr(o, "alive", True):
+                    index[id(o)] = len(objects)
+                    objects.append(o.to_dict())
+        for entry, visible in step_info:
+            entry['visible'] = [index[id(o)] for o in visible if id(o) in index]
+        return {'objects': objects, 'agents': [entry for entry, _ in step_info]}
 
     def step(self):
+        self.exchange_messages()
+        self.advance()
+
+    def exchange_messages(self):
+        # Début du tick : chaque agent voit le monde tel qu'il est avant tout déplacement
+        use_store(self.store)
         self.time +=1
         all_messages = []
         for agent in self.agents:
@@ -76,15 +162,29 @@ class Environment:
         for agent in self.agents:
             agent.receive_messages(all_messages)
             agent.reset_step_flags()  #mise a jour des flags ici avant les methode update()
-            
-      
-            
+
+
+    def advance(self):
+        # Suite du tick : objets, projectiles, actions des agents, nettoyage
+        self.update_objects()
+        self.run_agents()
+
+    def update_objects(self):
+        use_store(self.store)
         # Mettre à jour les objets (mines, drones, etc.)
+        self.drones.plan(self)
         for obj in self.objects:
             if hasattr(obj, 'update'):
                 obj.update(self)
+                self.spatial.update(obj)
+        # Projectiles (y compris ceux tirés pendant la boucle ci-dessus)
+        self.projectiles.step(self)
 
-        step_info = []
+    def run_agents(self):
+        use_store(self.store)
+        recording = self.recording()
+        recorder = self.recorder if recording else None
+        step_info = [] if recording and recorder is None else None  # (entrée de l'agent, objets vus)
 
         # Boucle d'action des agents
         for agent in self.agents:
@@ -102,23 +202,41 @@ class Environment:
             else:
                 action = agent.decide_action(visible)
             agent.perform_action(action, self)
-            visible = self.objects
-           
+            self.spatial.update(agent)
+            if recorder is not None:
+                recorder.record_agent(agent, action, visible)
+            if step_info is None:
+                continue
            
-            step_info.append({
+            step_info.append(({
                 'agent': agent.to_dict(),
                 'facing': agent.get_orientation(),
                 'action': action,
-                'visible': [o.to_dict() for o in visible if getattr(o, "alive", True)]
-            })
+            }, visible))
+
+        if recorder is not None:
+            recorder.end_frame(self.objects if self.record == RECORD_FULL else (), self.store)
+        if step_info is not None:
+            frame = self._record_frame(step_info)
+            if self.writer is not None:
+                self.writer.write(frame)
+            else:
+                self.history.append(frame)
 
         # Nettoyer les objets morts
+        for o in self.objects + self.agents:
+            if not getattr(o, "alive", True):
+                self.spatial.remove(o)
+                if o.etype == EntityType.WALL:
+                    self.occlusion.remove(o)
+        n_before = len(self.objects) + len(self.agents)
         self.objects = [o for o in self.objects if getattr(o, "alive", True)]
         self.agents = [a for a in self.agents if a.alive]
+        if len(self.objects) + len(self.agents) != n_before:
+            self.version += 1
 
         #print(len(self.objects))
      
-        self.history.append(step_info)
         #print(f"[STEP] Frame {self.time} — total history size: {len(self.history)}")
 
 
@@ -127,8 +245,11 @@ class Environment:
             self.step()
 
     def export(self, path="data/output.json"): 
+        if self.recorder is not None:
+            self.recorder.export(path)
+            return
         with open(path, "w") as f:
-            json.dump(to_serializable(self.history), f, indent=2)
+            json.dump(list(self.history), f, indent=2, default=numpy_default)
     
     
     
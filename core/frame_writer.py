@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+
+def numpy_default(obj):
+    """ Hook json (default=) : appelé seulement pour les valeurs que json ne sait pas écrire """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} n'est pas sérialisable en JSON")
+
+
+class FrameWriter:
+    """
+    Enregistrement en flux (JSON Lines) : chaque frame est écrite sur une ligne dès qu'elle est
+    produite, dans un fichier tamponné ; la mémoire ne dépend pas de la longueur du run.
+    Le tampon est vidé vers le disque toutes les flush_every frames : après un crash, le fichier
+    contient toutes les frames vidées (read_frames ignore une dernière ligne coupée).
+    """
+    def __init__(self, path, flush_every=50, buffering=1 << 16):
+        self.path = path
+        self.flush_every = flush_every
+        self.file = open(path, "w", buffering=buffering)
+        # Encodeur C de json (compact, sans indent) ; types NumPy convertis par le hook
+        self.encoder = json.JSONEncoder(default=numpy_default, separators=(",", ":"))
+        self.frames = 0
+
+    def write(self, frame):
+        self.file.write(self.encoder.encode(frame) + "\n")
+        self.frames += 1
+        if self.flush_every and self.frames % self.flush_every == 0:
+            self.file.flush()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_frames(path):
+    """ Frames d'un fichier JSON Lines ; s'arrête à une ligne incomplète (run interrompu) """
+    frames = []
+    with open(path) as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            frames.append(json.loads(line))
+    return frames
@@ -1,7 +1,11 @@
 import numpy as np
 import math
 from core.agents.agent import Agent
+from core.entity import health_column
+from core.entity_store import ETYPE_NAMES, gather
 from core.entity_types import EntityType
+from core.objects.projectile import TEAM_AGENT
+from core.vision_engine import EntityArrays, visible_indices
 
 channels = {
     "agent": 0,
@@ -31,12 +35,266 @@ channel_names = [
     "Heatmap Danger", "Heatmap Energy", "projectile_ally","projectile_enemy", "Decoy"
 ]
 
-def extract_minimap_tensor(agent: Agent, env, grid_size=32):
-    tensor = np.zeros((len(channel_names), grid_size, grid_size), dtype=np.float32)
+DANGER_CLASSES = ("enemy_drone", "enemy_kamikaze", "enemy_turret", "mine", "enemy_drone_elite", "projectile_enemy")
+
+# En dessous de ce nombre d'objets visibles, pochoirs parcourus en Python (coût fixe NumPy plus faible)
+RASTER_BATCH_MIN = 32
+
+_disks = {}
+
+
+def disk_stencil(radius_cells):
+    """
+    Pochoir du disque dx² + dy² <= r² sur le carré [-r, r]², mis en cache par rayon en cellules :
+    décalages dx, dy et dx² + dy² aplatis (le disque de rayon r' <= r est d2 <= r'²)
+    """
+    stencil = _disks.get(radius_cells)
+    if stencil is None:
+        r = np.arange(-radius_cells, radius_cells + 1)
+        dy, dx = np.meshgrid(r, r, indexing="ij")
+        d2 = dx ** 2 + dy ** 2
+        stencil = _disks[radius_cells] = (dx.ravel(), dy.ravel(), d2.ravel())
+    return stencil
+
+
+_offsets = {}
+
+
+def disk_offsets(radius_cells, grid_size):
+    # Pixels du disque en liste Python : (dx, dy, décalage dans une grille grid_size aplatie)
+    key = (radius_cells, grid_size)
+    offsets = _offsets.get(key)
+    if offsets is None:
+        dx, dy, d2 = disk_stencil(radius_cells)
+        inside = d2 <= radius_cells ** 2
+        offsets = _offsets[key] = [(x, y, y * grid_size + x) for x, y in zip(dx[inside].tolist(), dy[inside].tolist())]
+    return offsets
+
+
+def add_disk(cells, values, grid_size, ch, gx, gy, radius_cells, value):
+    # Ajoute aux listes cells / values les pixels du disque centré en (gx, gy), coupé au bord de la grille
+    offsets = disk_offsets(radius_cells, grid_size)
+    base = (ch * grid_size + gy) * grid_size + gx
+    if radius_cells <= gx < grid_size - radius_cells and radius_cells <= gy < grid_size - radius_cells:
+        cells.extend([base + off for _, _, off in offsets])
+        values.extend([value] * len(offsets))
+    else:
+        n = len(cells)
+        cells.extend([base + off for x, y, off in offsets
+                      if 0 <= gx + x < grid_size and 0 <= gy + y < grid_size])
+        values.extend([value] * (len(cells) - n))
+
+
+def rasterize_disks(flat, grid_size, ch, gx, gy, radius_cells, values):
+    """
+    Trace d'un coup des disques pleins dans flat (tenseur (C, H, W) aplati) : chaque pixel garde
+    le max des valeurs qui le couvrent. Un seul pochoir (le plus grand rayon) pour tous les objets,
+    restreint au disque de chacun, puis un seul np.maximum.at, tous canaux confondus.
+    """
+    dx, dy, d2 = disk_stencil(int(radius_cells.max()))
+    x = gx[:, None] + dx
+    y = gy[:, None] + dy
+    ok = (d2 <= (radius_cells * radius_cells)[:, None]) & (x >= 0) & (x < grid_size) & (y >= 0) & (y < grid_size)
+    cell = (ch[:, None] * grid_size + y) * grid_size + x
+    np.maximum.at(flat, cell[ok], np.broadcast_to(values[:, None], ok.shape)[ok])
+
+
+def _ray_cells(angles, grid_size):
+    # Pixels (aplatis) et valeurs du regard de chaque angle : un point par pas, le dernier pas
+    # qui tombe dans une cellule l'emporte
+    center = grid_size // 2
+    i = np.arange(1, center)
+    cos = np.array([math.cos(a) for a in angles], dtype=np.float64)
+    sin = np.array([math.sin(a) for a in angles], dtype=np.float64)
+    gx = (center + cos[:, None] * i).astype(np.int64)
+    gy = (center + sin[:, None] * i).astype(np.int64)
+    # Le rayon avance d'au plus une cellule par pas : les répétitions d'une cellule se suivent,
+    # on garde la dernière (valeur la plus faible, comme l'écriture pas à pas)
+    cell = gy * grid_size + gx
+    last = np.ones(cell.shape, dtype=bool)
+    last[:, :-1] = cell[:, 1:] != cell[:, :-1]
+    last &= (gx >= 0) & (gx < grid_size) & (gy >= 0) & (gy < grid_size)
+    fade = np.broadcast_to((1.0 - (i / center)).astype(np.float32), cell.shape)
+    return cell, fade, last
+
+
+_rays = {}
+
+
+def facing_ray(tensor, angle, grid_size):
+    # Regard de l'agent, mis en cache par (angle, taille de grille) : l'orientation change
+    # rarement d'un tick à l'autre
+    key = (angle, grid_size)
+    ray = _rays.get(key)
+    if ray is None:
+        if len(_rays) >= 4096:
+            _rays.clear()
+        cell, fade, last = _ray_cells([angle], grid_size)
+        ray = _rays[key] = (cell[last], fade[last])
+    cells, fade = ray
+    tensor[channels["facing"]].reshape(-1)[cells] = fade
+
+
+def facing_rays(flat, agents, grid_size):
+    # Regards de plusieurs agents d'un coup dans flat ((A, C, H, W) aplati)
+    cell, fade, last = _ray_cells([a.facing_angle for a in agents], grid_size)
+    plane = grid_size * grid_size
+    offset = (np.arange(len(agents)) * len(channel_names) + channels["facing"]) * plane
+    flat[(cell + offset[:, None])[last]] = fade[last]
+
+
+def _classify(obj, agent):
+    # Canal et valeur d'un objet visible
+    if getattr(obj, "etype", None) == "projectile":
+        if obj.owner is agent or getattr(obj.owner, "etype", None) == EntityType.AGENT:
+            cls = "projectile_ally"
+        else:
+            cls = "projectile_enemy"
+    else:
+        cls = obj.etype if obj.etype != "agent" else "ally_agent"  # Corriger les agents alliés
+
+    if cls not in channels:
+        return None
+
+    value = 1.0
+    if hasattr(obj, "health"):
+        value = obj.health / 100.0
+    elif cls == "energy" and hasattr(obj, "energy"):
+        value = min(1.0, obj.energy / 100.0)
+    elif cls == "mine":
+        value = min(1.0, obj.explosion_radius / 4.0)
+    elif cls in ["projectile", "decoy"]:
+        value = 0.7
+    return cls, value
+
+
+# Nature de la santé par classe : 0 aucune, 1 colonne "health" du store, 2 autre attribut
+_health_kinds = {}
+
+
+def _health_kind(cls):
+    kind = _health_kinds.get(cls)
+    if kind is None:
+        if getattr(cls, "health", None) is health_column:
+            kind = 1
+        else:
+            kind = 2 if hasattr(cls, "health") else 0
+        _health_kinds[cls] = kind
+    return kind
+
+
+_PROJECTILE = -2
+_tables = {}
+
 
+def _channel_table():
+    # Table code etype -> canal (-1 : non dessiné, _PROJECTILE : selon le tireur)
+    table = _tables.get(len(ETYPE_NAMES))
+    if table is None:
+        table = np.full(len(ETYPE_NAMES), -1, dtype=np.int64)
+        for code, etype in enumerate(ETYPE_NAMES):
+            cls = etype if etype != "agent" else "ally_agent"
+            if etype == "projectile":
+                table[code] = _PROJECTILE
+            elif cls in channels:
+                table[code] = channels[cls]
+        table = _tables[len(ETYPE_NAMES)] = table
+    return table
+
+
+# Canal -> heatmap où l'objet est aussi tracé (-1 : aucune)
+HEATMAP_OF = np.full(len(channel_names), -1, dtype=np.int64)
+HEATMAP_OF[[channels[c] for c in DANGER_CLASSES]] = channels["heatmap_danger"]
+HEATMAP_OF[channels["energy"]] = channels["heatmap_energy"]
+
+
+def _classify_columns(objects):
+    """
+    _classify pour une liste d'objets à la fois, colonnes lues dans l'EntityStore de chacun.
+    Renvoie les colonnes (x, y, radius, owner), canaux (-1 : non tracé) et valeurs alignés sur objects,
+    et les indices des projectiles (alliés ici s'ils sont tirés par un agent, voir _observer_projectiles).
+    """
+    n = len(objects)
+    _, (x, y, radius, owner, etype, health_column) = gather(
+        objects, ("x", "y", "radius", "owner", "etype", "health"))
+    health = np.fromiter((_health_kind(type(o)) for o in objects), dtype=np.int8, count=n)
+
+    ch = _channel_table()[etype]
+    projectile = np.flatnonzero(ch == _PROJECTILE)
+    if len(projectile):
+        ally = np.array([objects[k].team for k in projectile.tolist()]) == TEAM_AGENT
+        ch[projectile] = np.where(ally, channels["projectile_ally"], channels["projectile_enemy"])
+
+    # Santé lue dans le store ; les autres règles (énergie, mines, leurres...) objet par objet
+    values = np.ones(n)
+    store = health == 1
+    values[store] = health_column[store] / 100.0
+    rest = np.flatnonzero(~store).tolist()
+    for k, c, kind in zip(rest, ch[rest].tolist(), health[rest].tolist()):
+        obj = objects[k]
+        if kind == 2:
+            values[k] = obj.health / 100.0
+        elif c == channels["energy"] and hasattr(obj, "energy"):
+            values[k] = min(1.0, obj.energy / 100.0)
+        elif c == channels["mine"]:
+            values[k] = min(1.0, obj.explosion_radius / 4.0)
+        elif c == channels["decoy"]:
+            values[k] = 0.7
+    return (x, y, radius, owner), ch, values, projectile
+
+
+def _rasterize_agents(flat, grid_size, agents, columns, ch, values, projectile, visible):
+    """
+    Trace en un seul appel les objets visibles de plusieurs agents dans flat ((A, C, H, W) aplati).
+    columns / ch / values / projectile : sortie de _classify_columns, visible[k] : indices visibles de l'agent k.
+    """
+    x, y, radius, owner_id = columns
+    n_channels = len(channel_names)
+    n = len(agents)
+    rows = np.concatenate(visible)
+    owner = np.repeat(np.arange(n), [len(idx) for idx in visible])
+    c = ch[rows]
+    # Les projectiles de l'observateur sont alliés même s'il n'est pas de type agent
+    if len(projectile):
+        for k, agent in enumerate(agents):
+            if agent.etype != EntityType.AGENT:
+                own = np.isin(rows, projectile) & (owner == k) & (owner_id[rows] == agent.id)
+                c[own] = channels["projectile_ally"]
+
+    keep = c >= 0
+    rows, owner, c = rows[keep], owner[keep], c[keep]
+    # Copie de chaque objet dangereux / énergie dans sa heatmap
+    heatmap = HEATMAP_OF[c]
+    extra = heatmap >= 0
+    rows = np.concatenate([rows, rows[extra]])
+    owner = np.concatenate([owner, owner[extra]])
+    c = np.concatenate([c, heatmap[extra]])
+
+    ax = np.array([a.x for a in agents], dtype=np.float64)
+    ay = np.array([a.y for a in agents], dtype=np.float64)
+    vision_range = np.array([a.range for a in agents], dtype=np.float64)
+    cell_size = np.array([(2 * a.range) / grid_size for a in agents], dtype=np.float64)
+
+    # int() tronque vers zéro : astype fait de même
+    gx = ((x[rows] - ax[owner] + vision_range[owner]) / cell_size[owner]).astype(np.int64)
+    gy = ((y[rows] - ay[owner] + vision_range[owner]) / cell_size[owner]).astype(np.int64)
+    radius_cells = np.maximum(1, (radius[rows] / cell_size[owner]).astype(np.int64))
+
+    # Corps de chaque agent au centre
+    center = grid_size // 2
+    bodies = np.array([max(1, int(a.radius / cs)) for a, cs in zip(agents, cell_size.tolist())], dtype=np.int64)
+    rasterize_disks(flat, grid_size,
+                    np.concatenate([owner * n_channels + c, np.arange(n) * n_channels + channels["agent"]]),
+                    np.concatenate([gx, np.full(n, center)]),
+                    np.concatenate([gy, np.full(n, center)]),
+                    np.concatenate([radius_cells, bodies]),
+                    np.concatenate([values[rows], np.ones(n)]).astype(np.float32))
+
+
+def _draw_few(tensor, agent, visible_objects, grid_size):
+    # Peu d'objets : pixels des pochoirs collectés en listes, un seul np.maximum.at
     ax, ay = agent.x, agent.y
     vision_range = agent.range
-    angle = agent.facing_angle
     center = grid_size // 2
     cell_size = (2 * vision_range) / grid_size
 
@@ -47,72 +305,112 @@ def extract_minimap_tensor(agent: Agent, env, grid_size=32):
         gy = int((dy + vision_range) / cell_size)
         return gx, gy
 
+    cells, values = [], []
     # Corps de l'agent au centre
-    radius_cells = max(1, int(agent.radius / cell_size))
-    for dx in range(-radius_cells, radius_cells + 1):
-        for dy in range(-radius_cells, radius_cells + 1):
-            x, y = center + dx, center + dy
-            if 0 <= x < grid_size and 0 <= y < grid_size and dx**2 + dy**2 <= radius_cells**2:
-                tensor[channels["agent"], y, x] = 1.0
+    add_disk(cells, values, grid_size, channels["agent"], center, center, max(1, int(agent.radius / cell_size)), 1.0)
+    for obj in visible_objects:
+        classified = _classify(obj, agent)
+        if classified is None:
+            continue
+        cls, value = classified
+        gx, gy = to_grid_coords(obj.x, obj.y)
+        radius_cells = max(1, int(getattr(obj, "radius", 1.0) / cell_size))
+        add_disk(cells, values, grid_size, channels[cls], gx, gy, radius_cells, value)
+        # Heatmaps danger / énergie
+        if cls in DANGER_CLASSES:
+            add_disk(cells, values, grid_size, channels["heatmap_danger"], gx, gy, radius_cells, value)
+        if cls == "energy":
+            add_disk(cells, values, grid_size, channels["heatmap_energy"], gx, gy, radius_cells, value)
+    np.maximum.at(tensor.reshape(-1), np.array(cells, dtype=np.int64), np.array(values, dtype=np.float32))
+
+
+def extract_minimap_tensor(agent: Agent, env, grid_size=32):
+    tensor = np.zeros((len(channel_names), grid_size, grid_size), dtype=np.float32)
 
     #  Regard de l'agent
-    for i in range(1, center):
-        dx = math.cos(angle) * i
-        dy = math.sin(angle) * i
-        gx = int(center + dx)
-        gy = int(center + dy)
-        if 0 <= gx < grid_size and 0 <= gy < grid_size:
-            tensor[channels["facing"], gy, gx] = 1.0 - (i / center)
-
-    # Objets visibles
-    other_agents = [a for a in env.agents if a != agent and a.alive]
-    visible_objects = agent.get_vision(env.objects + other_agents)
+    facing_ray(tensor, agent.facing_angle, grid_size)
 
-    for obj in visible_objects:
-        ox, oy = obj.x, obj.y
-        radius = getattr(obj, "radius", 1.0)
-        
-        if getattr(obj, "etype", None) == "projectile":
-            if obj.owner is agent or getattr(obj.owner, "etype", None) == EntityType.AGENT:
-                cls = "projectile_ally"
-            else:
-                cls = "projectile_enemy"
-        else:
-            cls = obj.etype if obj.etype != "agent" else "ally_agent"  # Corriger les agents alliés
+    # Objets visibles : vue du cache de perception, sans repasser par les ids de tout le monde.
+    # Murs et cibles compris : la minimap ne montre que ce que l'agent voit (cône, occlusion), centrée
+    # au pixel près sur lui ; un raster global des statiques découpé par agent ne la reproduit pas
+    objects, (idx,) = _visible_many(env, [agent])
+    visible_objects = [objects[i] for i in idx.tolist()]
 
-        if cls not in channels:
-            continue
+    if len(visible_objects) < RASTER_BATCH_MIN:
+        _draw_few(tensor, agent, visible_objects, grid_size)
+    else:
+        # Beaucoup d'objets : tout en tableaux
+        columns = _classify_columns(visible_objects)
+        _rasterize_agents(tensor.reshape(-1), grid_size, [agent], *columns, [np.arange(len(visible_objects))])
+    return tensor
 
 
-        gx, gy = to_grid_coords(ox, oy)
-        ch = channels[cls]
-        radius_cells = max(1, int(radius / cell_size))
-
-        value = 1.0
-        if hasattr(obj, "health"):
-            value = obj.health / 100.0
-        elif cls == "energy" and hasattr(obj, "energy"):
-            value = min(1.0, obj.energy / 100.0)
-        elif cls == "mine":
-            value = min(1.0, obj.explosion_radius / 4.0)
-        elif cls in ["projectile", "decoy"]:
-            value = 0.7
-
-        for dx in range(-radius_cells, radius_cells + 1):
-            for dy in range(-radius_cells, radius_cells + 1):
-                x, y = gx + dx, gy + dy
-                if 0 <= x < grid_size and 0 <= y < grid_size:
-                    if dx**2 + dy**2 <= radius_cells**2:
-                        tensor[ch, y, x] = max(tensor[ch, y, x], value)
-
-                        # Heatmap danger
-                        if cls in ["enemy_drone", "enemy_kamikaze", "enemy_turret", "mine", "enemy_drone_elite","projectile_enemy"]:
-                            tensor[channels["heatmap_danger"], y, x] = max(
-                                tensor[channels["heatmap_danger"], y, x], value)
-
-                        # Heatmap énergie
-                        if cls == "energy":
-                            tensor[channels["heatmap_energy"], y, x] = max(
-                                tensor[channels["heatmap_energy"], y, x], value)
+def _visible_many(env, agents):
+    # Monde (env.objects + env.agents) et indices visibles de chaque agent, colonnes partagées
+    perception = getattr(env, "perception", None)
+    if perception is not None:
+        return perception.visible_many(agents)
+    objects = env.objects + env.agents
+    return objects, visible_indices(agents, EntityArrays(objects), getattr(env, "occlusion", None))
 
-    return tensor
+
+def _output(out, shape):
+    # Tenseur de sortie neuf, ou out vérifié et remis à zéro
+    if out is None:
+        return np.zeros(shape, dtype=np.float32)
+    if out.shape != shape or out.dtype != np.float32:
+        raise ValueError(f"out doit être un tableau float32 de forme {shape}, reçu {out.dtype} {out.shape}")
+    out.fill(0.0)
+    return out
+
+
+def _draw_visible(out, grid_size, agents, objects, visible):
+    # Objets visibles de chaque agent (indices dans objects) tracés dans out[k]
+    if sum(len(idx) for idx in visible) < RASTER_BATCH_MIN:
+        for k, (agent, idx) in enumerate(zip(agents, visible)):
+            _draw_few(out[k], agent, [objects[i] for i in idx.tolist()], grid_size)
+    else:
+        # Seuls les objets vus par au moins un agent sont classés
+        seen = np.unique(np.concatenate(visible))
+        inv = np.empty(len(objects), dtype=np.intp)
+        inv[seen] = np.arange(len(seen))
+        visible = [inv[idx] for idx in visible]
+        _rasterize_agents(out.reshape(-1), grid_size, agents, *_classify_columns([objects[i] for i in seen.tolist()]), visible)
+
+
+def extract_minimaps(env, agents, grid_size=32, out=None):
+    """
+    Minimaps (A, C, grid_size, grid_size) de plusieurs agents en une passe, chacune identique à
+    extract_minimap_tensor(agent, env, grid_size) : une seule vision groupée sur le monde,
+    une seule classification des objets, un seul tracé pour tous les agents.
+    out : tenseur float32 de cette forme réutilisé d'un tick à l'autre (remis à zéro ici).
+    """
+    out = _output(out, (len(agents), len(channel_names), grid_size, grid_size))
+    if not agents:
+        return out
+
+    objects, visible = _visible_many(env, agents)
+    facing_rays(out.reshape(-1), agents, grid_size)
+    _draw_visible(out, grid_size, agents, objects, visible)
+    return out
+
+
+def extract_env_minimaps(envs, agents, grid_size=32, out=None):
+    """
+    Minimap de agents[k] dans envs[k] pour N environnements, (N, C, grid_size, grid_size) :
+    vision par monde (cache de perception de chacun), puis classification et tracé communs
+    à tous les mondes. Chaque minimap est identique à extract_minimap_tensor(agents[k], envs[k]).
+    """
+    out = _output(out, (len(agents), len(channel_names), grid_size, grid_size))
+    if not agents:
+        return out
+
+    # Objets visibles de tous les mondes mis bout à bout
+    objects, visible = [], []
+    for env, agent in zip(envs, agents):
+        world, (idx,) = _visible_many(env, [agent])
+        visible.append(np.arange(len(objects), len(objects) + len(idx)))
+        objects.extend([world[i] for i in idx.tolist()])
+    facing_rays(out.reshape(-1), agents, grid_size)
+    _draw_visible(out, grid_size, agents, objects, visible)
+    return out
@@ -1,15 +1,17 @@
 from typing import Any, Dict
 from core.entity import Entity
+from core.entity_types import EntityType
 from core.utils import distance_to
 
 
 class EnergySource(Entity):
+    __slots__ = ("energy",)
     def __init__(self, x, y, radius=1.0, energy=30):
         super().__init__(x, y, radius=radius, etype="energy")
         self.energy = energy
 
     def update(self, env):
-        for agent in env.agents:
+        for agent in env.spatial.query_radius(self.x, self.y, self.radius, (EntityType.AGENT,)):
             if agent.alive and distance_to(self, agent) <= self.radius:
                 if self.energy >=2:
                     agent.energy = min(agent.energy + 2, 100)
@@ -1,8 +1,10 @@
 from core.entity import Entity
+from core.entity_types import EntityType
 from core.utils import distance_to
 
 
 class Explosion(Entity):
+    __slots__ = ("timer", "domage")
     def __init__(self, x, y, radius=5.0, duration=10,domage=10):
         super().__init__(x, y, radius=radius, etype="explosion")
         self.timer = duration
@@ -12,7 +14,7 @@ class Explosion(Entity):
         if not self.alive:
             return
 
-        for agent in env.agents:
+        for agent in env.spatial.query_radius(self.x, self.y, self.radius, (EntityType.AGENT,)):
             if agent.alive and distance_to(self, agent) <= self.radius:
                 agent.take_damage(self.domage)
 
@@ -4,6 +4,7 @@ from core.entity import Entity
 
 
 class ObjectBase(Entity):
+    __slots__ = ("speed", "moving", "ttl")
     def __init__(self, x, y, radius=3.0, speed=0.1, etype="object",moving=False, ttl=15):
         super().__init__(x, y, radius, etype=etype)
         self.speed = speed
@@ -1,11 +1,78 @@
+import numpy as np
+
 from core.entity import Entity
 from core.entity_types import EntityType
-from core.utils import distance_to
+
+HOSTILE_TYPES = (EntityType.ENEMY, EntityType.ENERGY_DRONE, EntityType.ENERGY_KAMIKAZE,
+                 EntityType.ENERGY_DRONE_ELITE, EntityType.ENEMY_TURREL)
+
+# Camp du tireur (colonne "team")
+TEAM_NONE = -1
+TEAM_AGENT = 0
+TEAM_HOSTILE = 1
+
+
+class ProjectileColumns:
+    """
+    Colonnes propres aux projectiles (direction, vitesse, dégâts, ttl, camp),
+    indexées comme l'EntityStore : la ligne d'un projectile est son id. Une instance par store
+    (store.projectiles, voir projectile_columns).
+    """
+    COLUMNS = (
+        ("dx", np.float64),
+        ("dy", np.float64),
+        ("speed", np.float64),
+        ("damage", np.float64),
+        ("ttl", np.int32),
+        ("team", np.int8),
+    )
+
+    def __init__(self, store):
+        self.store = store
+        self.capacity = 0
+        self._grow(store.capacity)
+
+    def _grow(self, capacity):
+        for name, dtype in self.COLUMNS:
+            column = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                column[:self.capacity] = getattr(self, name)
+            setattr(self, name, column)
+        for name, _ in self.COLUMNS:
+            setattr(self, "_" + name, memoryview(getattr(self, name)))
+        self.capacity = capacity
+
+    def ensure(self, slot):
+        if slot >= self.capacity:
+            self._grow(max(self.store.capacity, slot + 1))
+
+
+def projectile_columns(store):
+    """ Colonnes projectiles du store, créées au premier projectile """
+    if store.projectiles is None:
+        store.projectiles = ProjectileColumns(store)
+    return store.projectiles
+
+
+def _column(name):
+    view = "_" + name
+
+    def fget(self):
+        return getattr(self._store.projectiles, view)[self.id]
+
+    def fset(self, value):
+        getattr(self._store.projectiles, view)[self.id] = value
+
+    return property(fget, fset)
 
 
 class Projectile(Entity):
+    # Pas de update() : les projectiles d'un environnement sont avancés et résolus
+    # en lot par core.projectile_batch.ProjectileBatch
+    __slots__ = ("_owner",)
     def __init__(self, x, y, dx, dy, owner=None, speed=1.5, radius=1.5, damage=15):
         super().__init__(x, y, radius, etype="projectile")
+        projectile_columns(self._store).ensure(self.id)
         self.dx = dx
         self.dy = dy
         self.speed = speed
@@ -14,50 +81,26 @@ class Projectile(Entity):
         self.alive = True
         self.ttl = 40  # Durée de vie max (steps)
 
-    def update(self, env):
-        if not self.alive:
-            return
-
-        self.ttl -= 1
-        if self.ttl <= 0:
-            self.alive = False
-            return
-
-        # Avancer le projectile
-        self.x += self.dx * self.speed
-        self.y += self.dy * self.speed
-
-        # === 1. Collision avec AGENTS ===
-        for agent in env.agents:
-            if agent is self.owner:
-                continue  # Ne pas toucher le tireur
-            if agent.alive and distance_to(self, agent) <= (self.radius + agent.radius):
-                if getattr(self.owner, "etype", None) in [EntityType.ENEMY, EntityType.ENERGY_DRONE,EntityType.ENERGY_DRONE_ELITE, EntityType.ENERGY_KAMIKAZE,EntityType.ENEMY_TURREL]:
-                    agent.take_damage(self.damage)
-                    self.alive = False
-                    return
-
-        # === 2. Collision avec ENNEMIS ===
-        for obj in env.objects:
-            if obj is self or not hasattr(obj, "alive") or not obj.alive:
-                continue
-
-            if obj.etype in [EntityType.ENEMY,EntityType.ENERGY_DRONE, EntityType.ENERGY_KAMIKAZE, EntityType.ENERGY_DRONE_ELITE,EntityType.ENEMY_TURREL]:
-                if getattr(self.owner, "etype", None) == EntityType.AGENT:
-                    if distance_to(self, obj) <= (self.radius + obj.radius):
-                        obj.take_damage(self.damage)
-                        self.owner.last_attack_success = True 
-                        self.alive = False
-                        return
-
-        # === 3. Collision avec OBJETS SPÉCIAUX ===
-        for obj in env.objects:
-            if obj is self or not hasattr(obj, "alive") or not obj.alive:
-                continue
-
-            if obj.etype in [EntityType.WALL, EntityType.AGENT, EntityType.DECOY]:
-                if distance_to(self, obj) <= (self.radius + obj.radius):
-                    self.alive = False
-                    return
+    dx = _column("dx")
+    dy = _column("dy")
+    speed = _column("speed")
+    damage = _column("damage")
+    ttl = _column("ttl")
+    team = _column("team")
 
+    @property
+    def owner(self):
+        return self._owner
 
+    @owner.setter
+    def owner(self, value):
+        # Référence Python pour la logique objet, id entier dans la colonne "owner" du store
+        self._owner = value
+        self._store.owner[self.id] = getattr(value, "id", -1)
+        etype = getattr(value, "etype", None)
+        if etype == EntityType.AGENT:
+            self.team = TEAM_AGENT
+        elif etype in HOSTILE_TYPES:
+            self.team = TEAM_HOSTILE
+        else:
+            self.team = TEAM_NONE
@@ -1,14 +1,16 @@
 from core.entity import Entity
+from core.entity_types import EntityType
 from core.utils import distance_to
 
 class ObjectiveItem(Entity):
+    __slots__ = ("collected", "reward")
     def __init__(self, x, y, radius=2.0, reward=20):
         super().__init__(x, y, radius, etype="target")
         self.collected = False
         self.reward = reward
 
     def update(self, env):
-        for agent in env.agents:
+        for agent in env.spatial.query_radius(self.x, self.y, self.radius, (EntityType.AGENT,)):
             if not self.collected and agent.alive:
                 
                 dist = distance_to(self,agent) 
@@ -2,6 +2,7 @@ from core.entity import Entity
 from core.utils import distance_to
 
 class RockWall(Entity):
+    __slots__ = ("block_movement", "block_vision")
     def __init__(self, x, y, radius=2.0):
         super().__init__(x, y, radius, etype="wall")
         self.block_movement = True
@@ -7,6 +7,7 @@ from core.objects.objectBase import ObjectBase
 
 
 class SmokeZone(ObjectBase):
+    __slots__ = ("vision_penalty",)
     def __init__(self, x, y, radius=5.0,moving=False, ttl=15, speed=1.5):
         super().__init__(x, y, radius=radius,speed=speed,moving=moving ,etype=EntityType.SMOKE,ttl=ttl)
         self.vision_penalty = 0.95  # Réduit la range de vision à 80%
@@ -17,13 +18,15 @@ class SmokeZone(ObjectBase):
     
    
 #bloc la vision
-class JammerZone(ObjectBase):  
+class JammerZone(ObjectBase):
+    __slots__ = ("block_vision",)
     def __init__(self, x, y, radius=20.0,moving=False, ttl=15, speed=1.5):
         super().__init__(x, y, radius=radius,speed=speed,moving=moving ,etype=EntityType.JAMMER,ttl=ttl)
         self.block_vision = True
 
                
 class JammerCommunication(ObjectBase):
+    __slots__ = ("fake_messages_enabled",)
     def __init__(self, x, y, radius=20.0, moving=False, speed=1.5, ttl=15,fake_messages_enabled=True):
         super().__init__(x, y, radius=radius, speed=speed, moving=moving, etype=EntityType.JammerComunication, ttl=ttl)
         self.fake_messages_enabled = fake_messages_enabled
@@ -0,0 +1,124 @@
+import numpy as np
+
+from core.mini_map import channel_names, channels
+
+# Canaux tracés à 1.0 par construction (objets sans points de vie ni valeur propre)
+BINARY_CHANNELS = ("target", "jammer", "jammer_comunication", "wall", "projectile_ally", "projectile_enemy")
+
+# Canaux valant points de vie / 100 : dépassent 1 (tourelle 150 -> 1.5, HeavyAgent 200 -> 2.0)
+HEALTH_CHANNELS = ("ally_agent", "enemy_drone", "enemy_kamikaze", "enemy_drone_elite", "enemy_turret", "heatmap_danger")
+HEALTH_SCALE = 2.0
+
+# Valeur décodée de chaque octet quantifié (octet / 255 en float32)
+_LEVELS = (np.arange(256) / 255.0).astype(np.float32)
+
+
+def quantize(values, scale=1.0):
+    """ Valeurs de [0, scale] -> octets (pas de scale/255, hors bornes ramené à 0 ou 255) """
+    scaled = np.multiply(values, np.float32(255.0) / np.asarray(scale, dtype=np.float32), dtype=np.float32)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, 0, 255, out=scaled)
+    return scaled.astype(np.uint8)
+
+
+class MinimapCodec:
+    """
+    Codage compact des minimaps (C, H, W) float32 de extract_minimap_tensor, pour les replay
+    buffers, les échanges entre processus et les jeux de données sur disque.
+    Dense (taille fixe code_size) : canaux binaires en bits (np.packbits, toute valeur non nulle
+    vaut 1), autres canaux quantifiés sur un octet sur [0, scale] (erreur <= scale/510).
+    scales : plafond par nom de canal, 1 par défaut et HEALTH_SCALE pour les canaux de santé ;
+    une valeur négative ou au-dessus du plafond de son canal lève ValueError (pas d'écrêtage silencieux).
+    Sparse (taille variable) : nombre de pixels non nuls, leurs indices (uint32) et leurs valeurs
+    quantifiées ; les minimaps sont presque vides, c'est le codage le plus compact.
+    decode_batch décode un lot de codes directement dans un tableau float32 (B, C, H, W).
+    """
+    def __init__(self, grid_size=64, binary=BINARY_CHANNELS, sparse=False, scales=None):
+        self.shape = (len(channel_names), grid_size, grid_size)
+        self.sparse = sparse
+        self.binary = np.array(sorted({channels[c] for c in binary}), dtype=np.int64)
+        self.quantized = np.setdiff1d(np.arange(self.shape[0]), self.binary)
+        if scales is None:
+            scales = dict.fromkeys(HEALTH_CHANNELS, HEALTH_SCALE)
+        # Plafond de chaque canal (1 pour les binaires)
+        self.scale = np.ones(self.shape[0], dtype=np.float32)
+        for name, scale in scales.items():
+            if channels[name] in self.binary or scale <= 0:
+                raise ValueError(f"plafond {scale} invalide pour le canal {name}")
+            self.scale[channels[name]] = scale
+        self._quantized_scale = self.scale[self.quantized][:, None, None]
+        plane = grid_size * grid_size
+        self.bits_size = (len(self.binary) * plane + 7) // 8
+        # None : taille variable (sparse)
+        self.code_size = None if sparse else self.bits_size + len(self.quantized) * plane
+
+    def _check_range(self, minimaps):
+        # minimaps (B, C, H, W) : valeurs dans [0, plafond du canal]
+        n = len(minimaps)
+        values = minimaps.reshape(n, self.shape[0], -1)
+        high = values.max(axis=2) > self.scale
+        if high.any() or values.min() < 0:
+            names = sorted({channel_names[c] for c in np.flatnonzero(high.any(axis=0)).tolist()})
+            raise ValueError(f"minimap hors de [0, plafond] (canaux {names or 'négatifs'}, plafonds"
+                             f" {dict(zip(channel_names, self.scale.tolist()))}) : passer scales= au codec")
+
+    def encode(self, minimap):
+        """ Code uint8 1D d'une minimap """
+        minimap = np.asarray(minimap)
+        if minimap.shape != self.shape:
+            raise ValueError(f"minimap de forme {self.shape} attendue, reçu {minimap.shape}")
+        self._check_range(minimap[None])
+        if self.sparse:
+            flat = minimap.reshape(-1)
+            idx = np.flatnonzero(flat != 0).astype(np.uint32)  # bien plus rapide que flatnonzero(flat) en float
+            n = np.array([len(idx)], dtype=np.uint32)
+            scale = self.scale[idx // (self.shape[1] * self.shape[2])]
+            return np.concatenate([n.view(np.uint8), idx.view(np.uint8), quantize(flat[idx], scale)])
+        code = np.empty(self.code_size, dtype=np.uint8)
+        code[:self.bits_size] = np.packbits(minimap[self.binary].reshape(-1) != 0)
+        code[self.bits_size:] = quantize(minimap[self.quantized], self._quantized_scale).reshape(-1)
+        return code
+
+    def encode_batch(self, minimaps, out=None):
+        """ Codes denses (B, code_size) d'un lot de minimaps ; en sparse, liste de codes """
+        minimaps = np.asarray(minimaps)
+        if self.sparse:
+            return [self.encode(m) for m in minimaps]
+        n = len(minimaps)
+        self._check_range(minimaps)
+        code = np.empty((n, self.code_size), dtype=np.uint8) if out is None else out
+        code[:, :self.bits_size] = np.packbits(minimaps[:, self.binary].reshape(n, -1) != 0, axis=1)
+        code[:, self.bits_size:] = quantize(minimaps[:, self.quantized], self._quantized_scale).reshape(n, -1)
+        return code
+
+    def decode(self, code, out=None):
+        return self.decode_batch([code] if self.sparse else np.asarray(code)[None],
+                                 None if out is None else out[None])[0]
+
+    def decode_batch(self, codes, out=None):
+        """ Lot de codes (tableau (B, code_size) ou liste en sparse) -> minimaps float32 (B, C, H, W) """
+        n = len(codes)
+        if out is None:
+            out = np.empty((n,) + self.shape, dtype=np.float32)
+        if self.sparse:
+            out.fill(0.0)
+            size = int(np.prod(self.shape))
+            plane = self.shape[1] * self.shape[2]
+            flat = out.reshape(-1)
+            for b, code in enumerate(codes):
+                count = int(code[:4].view(np.uint32)[0])
+                idx = code[4:4 + 4 * count].view(np.uint32).astype(np.int64)
+                flat[b * size + idx] = _LEVELS[code[4 + 4 * count:]] * self.scale[idx // plane]
+            return out
+        # Canal par canal, directement dans out (contigu) : pas de tableau float32 intermédiaire
+        codes = np.asarray(codes)
+        plane = self.shape[1] * self.shape[2]
+        planes = out.reshape(n, self.shape[0], plane)
+        bits = np.unpackbits(codes[:, :self.bits_size], axis=1, count=len(self.binary) * plane)
+        bits = bits.reshape(n, len(self.binary), plane)
+        for k, ch in enumerate(self.binary.tolist()):
+            np.copyto(planes[:, ch], bits[:, k])
+        levels = codes[:, self.bits_size:].reshape(n, len(self.quantized), plane)
+        for k, ch in enumerate(self.quantized.tolist()):
+            np.divide(levels[:, k], np.float32(255.0) / self.scale[ch], out=planes[:, ch], dtype=np.float32)
+        return out
@@ -0,0 +1,200 @@
+import math
+
+import numpy as np
+
+# Tolérance absolue : en dessous, le test vectorisé est refait avec le calcul
+# scalaire de core.utils.is_blocked_by_wall pour des résultats identiques.
+_TOL = 1e-7
+
+
+def _exact_blocked(ax, ay, tx, ty, wx, wy, wr):
+    # Même arithmétique que is_blocked_by_wall, sur des tableaux de murs
+    a = np.array([ax, ay], dtype=np.float64)
+    ab = np.array([tx, ty], dtype=np.float64) - a
+    mag = np.linalg.norm(ab)
+    if mag == 0:
+        return False
+    ab_dir = ab / mag
+    for px, py, r in zip(wx, wy, wr):
+        p = np.array([px, py])
+        proj_length = np.dot(p - a, ab_dir)
+        if proj_length < 0 or proj_length > mag:
+            continue
+        closest_point = a + proj_length * ab_dir
+        if np.linalg.norm(p - closest_point) < r:
+            return True
+    return False
+
+
+def segments_blocked(ax, ay, tx, ty, wx, wy, wr):
+    """
+    Test vectorisé segments x murs (cercles) : le segment [a, t] est bloqué si un mur
+    a son centre à moins de r de la droite, avec le pied de la perpendiculaire sur le segment.
+    ax, ay peuvent être des scalaires (un observateur, plusieurs cibles) ou des tableaux.
+    """
+    tx = np.asarray(tx, dtype=np.float64)
+    ty = np.asarray(ty, dtype=np.float64)
+    ax = np.broadcast_to(np.asarray(ax, dtype=np.float64), tx.shape)
+    ay = np.broadcast_to(np.asarray(ay, dtype=np.float64), tx.shape)
+    m = len(tx)
+    if m == 0 or len(wx) == 0:
+        return np.zeros(m, dtype=bool)
+
+    dx = tx - ax
+    dy = ty - ay
+    mag = np.sqrt(dx * dx + dy * dy)[:, None]
+    safe = np.where(mag > 0, mag, 1.0)
+    dir_x = dx[:, None] / safe
+    dir_y = dy[:, None] / safe
+    apx = wx[None, :] - ax[:, None]
+    apy = wy[None, :] - ay[:, None]
+    proj = apx * dir_x + apy * dir_y
+    cx = ax[:, None] + proj * dir_x
+    cy = ay[:, None] + proj * dir_y
+    dline = np.sqrt((wx[None, :] - cx) ** 2 + (wy[None, :] - cy) ** 2)
+
+    inside = (proj >= _TOL) & (proj <= mag - _TOL)
+    sure = inside & (dline < wr[None, :] - _TOL)
+    loose = (proj >= -_TOL) & (proj <= mag + _TOL)
+    edge = loose & (dline < wr[None, :] + _TOL) & ~sure
+
+    # Segment de longueur nulle : jamais bloqué
+    valid = mag[:, 0] > 0
+    blocked = sure.any(axis=1) & valid
+    for i in np.flatnonzero(edge.any(axis=1) & valid & ~blocked):
+        blocked[i] = _exact_blocked(ax[i], ay[i], tx[i], ty[i], wx, wy, wr)
+    return blocked
+
+
+class WallOcclusion:
+    """
+    Structure d'occlusion statique pour les RockWall, construite une fois par carte.
+    Chaque mur est enregistré dans toutes les cellules couvertes par son disque ;
+    une requête ne teste que les murs des cellules traversées (DDA) ou couvertes.
+    """
+    def __init__(self, walls, cell_size=8.0):
+        self.walls = list(walls)
+        self.cell_size = float(cell_size)
+        self.wx = np.array([w.x for w in self.walls], dtype=np.float64)
+        self.wy = np.array([w.y for w in self.walls], dtype=np.float64)
+        self.wr = np.array([w.radius for w in self.walls], dtype=np.float64)
+        self.active = np.ones(len(self.walls), dtype=bool)
+        self._index = {id(w): i for i, w in enumerate(self.walls)}
+        self._build()
+
+    def _build(self):
+        cs = self.cell_size
+        if not self.walls:
+            self.x0 = self.y0 = 0.0
+            self.nx = self.ny = 0
+            self.occupancy = np.zeros((0, 0), dtype=bool)
+            self.cell_walls = []
+            return
+
+        self.x0 = math.floor(float(np.min(self.wx - self.wr)) / cs) * cs - cs
+        self.y0 = math.floor(float(np.min(self.wy - self.wr)) / cs) * cs - cs
+        self.nx = int(math.ceil((float(np.max(self.wx + self.wr)) - self.x0) / cs)) + 2
+        self.ny = int(math.ceil((float(np.max(self.wy + self.wr)) - self.y0) / cs)) + 2
+
+        cells = [[] for _ in range(self.nx * self.ny)]
+        for i in range(len(self.walls)):
+            cx0, cy0, cx1, cy1 = self._cell_box(self.wx[i] - self.wr[i] - _TOL, self.wy[i] - self.wr[i] - _TOL,
+                                                self.wx[i] + self.wr[i] + _TOL, self.wy[i] + self.wr[i] + _TOL)
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    cells[cy * self.nx + cx].append(i)
+        self.cell_walls = [np.array(c, dtype=np.intp) for c in cells]
+        self.occupancy = np.array([len(c) > 0 for c in cells], dtype=bool).reshape(self.ny, self.nx)
+
+    def _cell_box(self, xmin, ymin, xmax, ymax):
+        # Cellules couvertes par une boîte, bornées à la grille
+        cs = self.cell_size
+        cx0 = max(0, math.floor((xmin - self.x0) / cs))
+        cy0 = max(0, math.floor((ymin - self.y0) / cs))
+        cx1 = min(self.nx - 1, math.floor((xmax - self.x0) / cs))
+        cy1 = min(self.ny - 1, math.floor((ymax - self.y0) / cs))
+        return cx0, cy0, cx1, cy1
+
+    def remove(self, wall):
+        i = self._index.get(id(wall))
+        if i is not None:
+            self.active[i] = False
+
+    def matches(self, walls):
+        """ Vrai si walls est exactement l'ensemble des murs actifs de la structure """
+        if len(walls) != int(self.active.sum()):
+            return False
+        for w in walls:
+            i = self._index.get(id(w))
+            if i is None or not self.active[i]:
+                return False
+        return True
+
+    def _traverse(self, ax, ay, tx, ty):
+        # DDA (Amanatides & Woo) : cellules traversées par le segment
+        cs = self.cell_size
+        gx0, gy0 = (ax - self.x0) / cs, (ay - self.y0) / cs
+        gx1, gy1 = (tx - self.x0) / cs, (ty - self.y0) / cs
+        cx, cy = math.floor(gx0), math.floor(gy0)
+        ex, ey = math.floor(gx1), math.floor(gy1)
+        ddx, ddy = gx1 - gx0, gy1 - gy0
+        step_x = 1 if ddx > 0 else -1
+        step_y = 1 if ddy > 0 else -1
+        t_delta_x = abs(1.0 / ddx) if ddx else math.inf
+        t_delta_y = abs(1.0 / ddy) if ddy else math.inf
+        t_max_x = ((cx + 1 - gx0) if ddx > 0 else (gx0 - cx)) * t_delta_x if ddx else math.inf
+        t_max_y = ((cy + 1 - gy0) if ddy > 0 else (gy0 - cy)) * t_delta_y if ddy else math.inf
+
+        cells = [(cx, cy)]
+        while cx != ex or cy != ey:
+            if cx != ex and (t_max_x < t_max_y or cy == ey):
+                cx += step_x
+                t_max_x += t_delta_x
+            else:
+                cy += step_y
+                t_max_y += t_delta_y
+            cells.append((cx, cy))
+        return cells
+
+    def segment_candidates(self, ax, ay, tx, ty):
+        """ Indices des murs actifs pouvant intersecter le segment [a, t] """
+        found = set()
+        for cx, cy in self._traverse(ax, ay, tx, ty):
+            if 0 <= cx < self.nx and 0 <= cy < self.ny and self.occupancy[cy, cx]:
+                found.update(self.cell_walls[cy * self.nx + cx].tolist())
+        idx = np.array(sorted(found), dtype=np.intp)
+        return idx[self.active[idx]]
+
+    def box_candidates(self, xmin, ymin, xmax, ymax):
+        """ Indices des murs actifs dont le disque peut toucher la boîte donnée """
+        if not self.walls:
+            return np.zeros(0, dtype=np.intp)
+        cx0, cy0, cx1, cy1 = self._cell_box(xmin, ymin, xmax, ymax)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.zeros(0, dtype=np.intp)
+        rows, cols = np.nonzero(self.occupancy[cy0:cy1 + 1, cx0:cx1 + 1])
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.intp)
+        flat = (rows + cy0) * self.nx + (cols + cx0)
+        idx = np.unique(np.concatenate([self.cell_walls[c] for c in flat]))
+        return idx[self.active[idx]]
+
+    def is_blocked(self, ax, ay, tx, ty):
+        """ Équivalent de is_blocked_by_wall pour un segment, en ne testant que les murs proches """
+        if not self.walls:
+            return False
+        idx = self.segment_candidates(ax, ay, tx, ty)
+        if len(idx) == 0:
+            return False
+        return _exact_blocked(ax, ay, tx, ty, self.wx[idx], self.wy[idx], self.wr[idx])
+
+    def blocked_batch(self, ax, ay, tx, ty):
+        """ Version vectorisée : plusieurs segments (même observateur ou non) testés en une fois """
+        tx = np.asarray(tx, dtype=np.float64)
+        ty = np.asarray(ty, dtype=np.float64)
+        if len(tx) == 0 or not self.walls:
+            return np.zeros(len(tx), dtype=bool)
+        xs = np.concatenate([np.atleast_1d(ax), tx])
+        ys = np.concatenate([np.atleast_1d(ay), ty])
+        idx = self.box_candidates(xs.min(), ys.min(), xs.max(), ys.max())
+        return segments_blocked(ax, ay, tx, ty, self.wx[idx], self.wy[idx], self.wr[idx])
@@ -0,0 +1,239 @@
+import numpy as np
+
+from core.utils import distance_to
+from core.vision_engine import (_TOL, JAMMER, SMOKE, WALL, EntityArrays, _angle_diff, _scalar_visible,
+                                visible_indices, visible_objects)
+
+
+class _World:
+    """ Instantané de env.objects + env.agents pour une version donnée du monde """
+    __slots__ = ("key", "members", "store", "objects", "arrays", "inv", "is_modifier", "modifiers")
+
+    def __init__(self, key, members, store, objects):
+        self.key = key
+        self.store = store
+        self.members = members
+        self.objects = objects
+        self.arrays = EntityArrays(objects)
+        # Ligne du store -> indice dans le monde
+        self.inv = np.full(store.capacity, -1, dtype=np.intp)
+        self.inv[self.arrays.ids] = np.arange(len(objects))
+        self._modifiers()
+
+    def _modifiers(self):
+        # Murs, fumées et brouilleurs : les seules entités qui changent la vision des autres
+        self.is_modifier = self.arrays.alive & np.isin(self.arrays.etype, (WALL, SMOKE, JAMMER))
+        self.modifiers = np.flatnonzero(self.is_modifier)
+
+    def refresh(self, key, agents):
+        # Mêmes entités, seules les colonnes ont changé : relecture dans le store
+        arrays = self.arrays
+        store = self.store
+        self.key = key
+        arrays.x = store.x[arrays.ids]
+        arrays.y = store.y[arrays.ids]
+        arrays.radius = store.radius[arrays.ids]
+        arrays.alive = store.alive[arrays.ids]
+        arrays.etype = store.etype[arrays.ids]
+        offset = len(self.objects) - len(agents)
+        for k, a in enumerate(agents):
+            arrays.cloaked[offset + k] = a.cloaked
+        self._modifiers()
+
+
+class _View:
+    """ Perception d'un observateur sur tout le monde : visibles, distances, écarts d'angle """
+    __slots__ = ("params", "visible", "effective_range", "effective_fov", "dist", "delta")
+
+
+class PerceptionCache:
+    """
+    Cache de vision par tick : la perception d'un agent est calculée une fois sur tout le monde
+    (env.objects + env.agents) puis réutilisée par la messagerie, la décision, l'observation,
+    la minimap et la récompense, tant que rien n'a bougé.
+    Clé : version de l'EntityStore de l'environnement (toute écriture de position / rayon / état
+    de ses entités), version de l'environnement (apparitions / disparitions), camouflage des
+    agents, et pour chaque observateur son orientation, sa portée et son champ de vision.
+    Une requête sur un sous-ensemble du monde est servie par le cache s'il contient les mêmes
+    murs / fumées / brouilleurs (la visibilité de chaque cible ne dépend que d'eux), ou aucun.
+    """
+    def __init__(self, env):
+        self.env = env
+        self._world_cache = None
+        self._views = {}
+        self._distances = {}
+        self.queries = 0
+        self.hits = 0
+        self.evaluations = 0
+        self.distance_queries = 0
+        self.distance_hits = 0
+
+    def _world(self):
+        env = self.env
+        members = (getattr(env, "version", 0), len(env.objects), len(env.agents))
+        key = (env.store.version, tuple(a.cloaked for a in env.agents))
+        world = self._world_cache
+        if world is None or world.members != members:
+            world = self._world_cache = _World(key, members, env.store, env.objects + env.agents)
+        elif world.key != key:
+            world.refresh(key, env.agents)
+        else:
+            return world
+        self._views = {}
+        self._distances = {}
+        return world
+
+    def _evaluate(self, agents, world):
+        # Vues de plusieurs observateurs calculées en un seul appel au moteur de vision
+        visible = visible_indices(agents, world.arrays, self.env.occlusion)
+        return [self._store_view(agent, idx, world) for agent, idx in zip(agents, visible)]
+
+    def _store_view(self, agent, idx, world):
+        # idx : indices visibles dans le monde, effective_range / fov tout juste mis à jour
+        self.evaluations += 1
+        view = _View()
+        view.params = (agent.facing_angle, agent.range, agent.fov)
+        view.visible = np.zeros(len(world.arrays), dtype=bool)
+        view.visible[idx] = True
+        view.effective_range = agent.effective_range
+        view.effective_fov = agent.effective_fov
+        view.dist = view.delta = None
+        self._views[agent.id] = view
+        return view
+
+    def _view(self, agent):
+        view = self._views.get(agent.id)
+        if view is not None and view.params != (agent.facing_angle, agent.range, agent.fov):
+            return None
+        return view
+
+    def _direct(self, agent, objects):
+        # Hors cache : même calcul que Agent.get_vision sans environnement
+        self.evaluations += 1
+        return visible_objects([agent], objects, self.env.occlusion)[0]
+
+    def visible(self, agent, objects):
+        """ Même résultat (et mêmes effective_range / effective_fov) que la vision vectorisée """
+        self.queries += 1
+        objects = list(objects)
+        world = self._world()
+        ids = np.fromiter((o.id for o in objects), dtype=np.intp, count=len(objects))
+        if len(ids) and ids.max() >= len(world.inv):
+            return self._direct(agent, objects)
+        pos = world.inv[ids]
+        if (pos < 0).any():
+            return self._direct(agent, objects)
+
+        view = self._view(agent)
+        mods = pos[world.is_modifier[pos]]
+        if np.array_equal(mods, world.modifiers):
+            if view is None:
+                view = self._evaluate([agent], world)[0]
+            else:
+                self.hits += 1
+            agent.effective_range = view.effective_range
+            agent.effective_fov = view.effective_fov
+            return [objects[k] for k in np.flatnonzero(view.visible[pos])]
+        if len(mods) == 0 and view is not None:
+            self.hits += 1
+            return self._unmodified(agent, objects, pos, world, view)
+        return self._direct(agent, objects)
+
+    def visible_many(self, agents):
+        """
+        Vision de plusieurs agents sur tout le monde : (objets du monde, indices visibles de chaque agent).
+        Même résultat que agent.get_vision(env.objects + autres agents vivants), vues manquantes
+        calculées ensemble.
+        """
+        world = self._world()
+        views = [self._view(a) for a in agents]
+        missing = [a for a, v in zip(agents, views) if v is None]
+        self.queries += len(agents)
+        self.hits += len(agents) - len(missing)
+        if missing:
+            computed = iter(self._evaluate(missing, world))
+            views = [v if v is not None else next(computed) for v in views]
+        for agent, view in zip(agents, views):
+            agent.effective_range = view.effective_range
+            agent.effective_fov = view.effective_fov
+        return world.objects, [np.flatnonzero(v.visible) for v in views]
+
+    def _unmodified(self, agent, objects, pos, world, view):
+        # Sous-ensemble sans mur / fumée / brouilleur : portée et cône bruts, distances du cache
+        arrays = world.arrays
+        agent.effective_range = agent.range
+        agent.effective_fov = agent.fov
+        mask = arrays.alive[pos] & ~arrays.cloaked[pos]
+        self_i = arrays.index.get(id(agent))
+        if self_i is not None:
+            mask &= pos != self_i
+        if view.dist is None:
+            # Distances et écarts d'angle calculés comme dans visible_indices, une fois par vue
+            dx = arrays.x - agent.x
+            dy = arrays.y - agent.y
+            view.dist = np.sqrt(dx * dx + dy * dy)
+            view.delta = np.abs(_angle_diff(np.arctan2(dy, dx), agent.facing_angle))
+        rng = agent.range
+        half_fov = agent.fov / 2
+        d = view.dist[pos]
+        delta = view.delta[pos]
+        certain = mask & (d <= rng - _TOL) & (delta <= half_fov - _TOL)
+        unsure = mask & ~certain & (d <= rng + _TOL) & (delta <= half_fov + _TOL)
+        for k in np.flatnonzero(unsure):
+            certain[k] = _scalar_visible(agent, objects[k], [], rng, agent.fov)
+        return [objects[k] for k in np.flatnonzero(certain)]
+
+    def distance(self, agent, obj):
+        """ distance_to(agent, obj), mémorisée jusqu'au prochain changement du monde """
+        self.distance_queries += 1
+        self._world()
+        key = (agent.id, obj.id)
+        d = self._distances.get(key)
+        if d is None:
+            d = self._distances[key] = distance_to(agent, obj)
+        else:
+            self.distance_hits += 1
+        return d
+
+    def stats(self):
+        return {
+            "queries": self.queries,
+            "hits": self.hits,
+            "evaluations": self.evaluations,
+            "saved": self.hits,
+            "hit_rate": self.hits / self.queries if self.queries else 0.0,
+            "distance_hit_rate": self.distance_hits / self.distance_queries if self.distance_queries else 0.0,
+        }
+
+    def reset_stats(self):
+        self.queries = self.hits = self.evaluations = 0
+        self.distance_queries = self.distance_hits = 0
+
+
+def evaluate_worlds(caches, agents):
+    """
+    Vues manquantes de agents[k] dans le monde de caches[k] (un PerceptionCache par environnement,
+    plusieurs agents par cache possibles), calculées en un seul appel au moteur de vision sur
+    tous les mondes mis bout à bout. Les requêtes suivantes de chaque environnement sont ensuite
+    servies par son cache.
+    """
+    worlds = {}  # id(cache) -> (cache, monde, numéro du monde)
+    observers, groups = [], []
+    for cache, agent in zip(caches, agents):
+        entry = worlds.get(id(cache))
+        if entry is None:
+            entry = worlds[id(cache)] = (cache, cache._world(), len(worlds))
+        if cache._view(agent) is None:
+            observers.append((agent, entry))
+            groups.append(entry[2])
+    if not observers:
+        return
+    entries = list(worlds.values())
+    sizes = np.array([len(world.arrays) for _, world, _ in entries])
+    offsets = np.cumsum(sizes) - sizes
+    arrays = EntityArrays.concat([world.arrays for _, world, _ in entries])
+    visible = visible_indices([agent for agent, _ in observers], arrays,
+                              [cache.env.occlusion for cache, _, _ in entries],
+                              (np.array(groups, dtype=np.intp), np.repeat(np.arange(len(entries)), sizes)))
+    for (agent, (cache, world, g)), idx in zip(observers, visible):
+        cache._store_view(agent, idx - offsets[g], world)
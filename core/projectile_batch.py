@@ -0,0 +1,220 @@
+import numpy as np
+
+from core.entity_store import ETYPE_NAMES, etype_code
+from core.entity_types import EntityType
+from core.objects.projectile import HOSTILE_TYPES, TEAM_AGENT, TEAM_HOSTILE
+
+# Catégories de cibles, dans l'ordre de priorité en cas de contact simultané
+CAT_NONE = -1
+CAT_AGENT = 0
+CAT_HOSTILE = 1
+CAT_BLOCKER = 2  # murs et leurres : arrêtent le projectile sans dégâts
+
+
+def _categories():
+    # Table code etype -> catégorie de cible
+    table = np.full(len(ETYPE_NAMES), CAT_NONE, dtype=np.int8)
+    table[etype_code(EntityType.AGENT)] = CAT_AGENT
+    for etype in HOSTILE_TYPES:
+        table[etype_code(etype)] = CAT_HOSTILE
+    table[etype_code(EntityType.WALL)] = CAT_BLOCKER
+    table[etype_code(EntityType.DECOY)] = CAT_BLOCKER
+    return table
+
+
+def _ranges(starts, counts):
+    # Concatène les plages [start, start + count) en un seul tableau d'indices
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.intp)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+def sweep_pairs(sx, sy, ex, ey, pr, tx, ty, tr):
+    """
+    Phase large : paires (projectile, cible) dont les boîtes englobantes se recouvrent
+    (segment balayé élargi du rayon du projectile, disque de la cible).
+    Grille uniforme vectorisée : chaque cible dans une cellule, 3x3 cellules par projectile.
+    """
+    if len(sx) == 0 or len(tx) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    pxmin = np.minimum(sx, ex) - pr
+    pxmax = np.maximum(sx, ex) + pr
+    pymin = np.minimum(sy, ey) - pr
+    pymax = np.maximum(sy, ey) + pr
+    pcx = 0.5 * (pxmin + pxmax)
+    pcy = 0.5 * (pymin + pymax)
+    half = np.maximum(pxmax - pxmin, pymax - pymin) * 0.5
+
+    # Cellule assez grande pour que toute cible touchable soit dans le voisinage 3x3
+    cs = max(float(half.max() + tr.max()), 1.0)
+    tcx = np.floor(tx / cs).astype(np.int64)
+    tcy = np.floor(ty / cs).astype(np.int64)
+    qcx = np.floor(pcx / cs).astype(np.int64)
+    qcy = np.floor(pcy / cs).astype(np.int64)
+    gx0 = min(tcx.min(), qcx.min()) - 1
+    gy0 = min(tcy.min(), qcy.min()) - 1
+    ny = int(max(tcy.max(), qcy.max()) - gy0) + 2
+
+    keys = (tcx - gx0) * ny + (tcy - gy0)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    pi, ti = [], []
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            k = (qcx + ox - gx0) * ny + (qcy + oy - gy0)
+            lo = np.searchsorted(sorted_keys, k, side="left")
+            hi = np.searchsorted(sorted_keys, k, side="right")
+            counts = hi - lo
+            pi.append(np.repeat(np.arange(len(sx)), counts))
+            ti.append(order[_ranges(lo, counts)])
+    pi = np.concatenate(pi)
+    ti = np.concatenate(ti)
+
+    overlap = ((pxmin[pi] <= tx[ti] + tr[ti]) & (pxmax[pi] >= tx[ti] - tr[ti]) &
+               (pymin[pi] <= ty[ti] + tr[ti]) & (pymax[pi] >= ty[ti] - tr[ti]))
+    return pi[overlap], ti[overlap]
+
+
+def sweep_circle_toi(sx, sy, dx, dy, cx, cy, r):
+    """
+    Instant t dans [0, 1] du premier contact du point s + t * d avec le disque (c, r),
+    inf s'il n'y a pas de contact. Un point déjà dans le disque touche à t = 0.
+    """
+    fx = sx - cx
+    fy = sy - cy
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    c = fx * fx + fy * fy - r * r
+    disc = b * b - a * c
+
+    t = np.full(len(sx), np.inf)
+    inside = c <= 0
+    t[inside] = 0.0
+    ok = ~inside & (a > 0) & (b < 0) & (disc >= 0)
+    t_ok = (-b[ok] - np.sqrt(disc[ok])) / a[ok]
+    t[ok] = np.where(t_ok <= 1.0, t_ok, np.inf)
+    return t
+
+
+class ProjectileBatch:
+    """
+    Projectiles vivants d'un environnement, avancés et résolus en un seul pas vectorisé :
+    ttl, déplacement, puis collision balayée (segment parcouru pendant le tick contre le disque
+    élargi de chaque cible) -> plus d'effet tunnel à travers les petits murs.
+    Chaque projectile s'arrête sur son premier contact le long du segment.
+    """
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.intp)
+        self.entities = {}  # id -> Projectile (garde la ligne du store réservée)
+        self._pending = []
+        self._table = None
+
+    def add(self, projectile):
+        self.entities[projectile.id] = projectile
+        self._pending.append(projectile.id)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def _flush(self, store):
+        if self._pending:
+            self.ids = np.concatenate([self.ids, np.array(self._pending, dtype=np.intp)])
+            self._pending = []
+        # Oublier les projectiles morts (la ligne est libérée quand l'entité disparaît)
+        alive = store.alive[self.ids]
+        for i in self.ids[~alive].tolist():
+            del self.entities[i]
+        self.ids = self.ids[alive]
+
+    def step(self, env):
+        store = env.store
+        self._flush(store)
+        ids = self.ids
+        if len(ids) == 0:
+            return
+        columns = store.projectiles
+
+        # Durée de vie : un projectile expiré disparaît sans bouger
+        ttl = columns.ttl[ids] - 1
+        columns.ttl[ids] = ttl
+        expired = ttl <= 0
+        store.alive[ids[expired]] = False
+        moving = ids[~expired]
+
+        sx = store.x[moving]
+        sy = store.y[moving]
+        speed = columns.speed[moving]
+        ex = sx + columns.dx[moving] * speed
+        ey = sy + columns.dy[moving] * speed
+        store.x[moving] = ex
+        store.y[moving] = ey
+        store.touch()
+
+        self._resolve(env, moving, sx, sy, ex, ey)
+        self._flush(store)
+
+    def _resolve(self, env, rows, sx, sy, ex, ey):
+        if len(rows) == 0:
+            return
+        if self._table is None or len(self._table) != len(ETYPE_NAMES):
+            self._table = _categories()
+
+        store = env.store
+        columns = store.projectiles
+        targets = env.agents + env.objects
+        tids = np.fromiter((t.id for t in targets), dtype=np.intp, count=len(targets))
+        cat = self._table[store.etype[tids]]
+        keep = np.flatnonzero((cat != CAT_NONE) & store.alive[tids])
+        tids = tids[keep]
+        cat = cat[keep]
+
+        pr = store.radius[rows]
+        tx = store.x[tids]
+        ty = store.y[tids]
+        tr = store.radius[tids]
+        pi, ti = sweep_pairs(sx, sy, ex, ey, pr, tx, ty, tr)
+        if len(pi) == 0:
+            return
+
+        # Règles de camp : les agents ne blessent que les ennemis, les ennemis que les agents,
+        # murs et leurres arrêtent tout le monde ; jamais le tireur lui-même
+        team = columns.team[rows[pi]]
+        tcat = cat[ti]
+        valid = ((tcat == CAT_BLOCKER) |
+                 ((tcat == CAT_AGENT) & (team == TEAM_HOSTILE)) |
+                 ((tcat == CAT_HOSTILE) & (team == TEAM_AGENT)))
+        valid &= store.owner[rows[pi]] != tids[ti]
+        pi = pi[valid]
+        ti = ti[valid]
+        if len(pi) == 0:
+            return
+
+        t = sweep_circle_toi(sx[pi], sy[pi], ex[pi] - sx[pi], ey[pi] - sy[pi],
+                             tx[ti], ty[ti], pr[pi] + tr[ti])
+        hit = np.isfinite(t)
+        pi, ti, t = pi[hit], ti[hit], t[hit]
+        if len(pi) == 0:
+            return
+
+        # Premier contact de chaque projectile : t croissant, puis catégorie, puis ordre des cibles
+        order = np.lexsort((keep[ti], cat[ti], t, pi))
+        pi, ti = pi[order], ti[order]
+        first = np.ones(len(pi), dtype=bool)
+        first[1:] = pi[1:] != pi[:-1]
+        pi, ti = pi[first], ti[first]
+
+        store.alive[rows[pi]] = False
+        store.touch()
+
+        # Dégâts cumulés par cible, appliqués en une fois
+        damaging = cat[ti] != CAT_BLOCKER
+        if damaging.any():
+            totals = np.bincount(ti[damaging], weights=columns.damage[rows[pi[damaging]]],
+                                 minlength=len(tids))
+            for j in np.flatnonzero(totals):
+                targets[keep[j]].take_damage(float(totals[j]))
+        for row in rows[pi[cat[ti] == CAT_HOSTILE]].tolist():
+            self.entities[row].owner.last_attack_success = True
@@ -0,0 +1,177 @@
+import multiprocessing as mp
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.mini_map import channel_names
+from core.rl.env_wrapper import flat_state_dim
+
+
+class SharedArrays:
+    """
+    Tableaux NumPy posés dans des blocs multiprocessing.shared_memory.
+    Le processus qui les crée (owner) les libère ; les autres s'y rattachent par nom
+    (les processus lancés par multiprocessing partagent le suivi de ressources du créateur).
+    """
+    def __init__(self, specs, names=None):
+        # specs : {nom: (forme, dtype)}
+        self.specs = specs
+        self.owner = names is None
+        self.blocks = {}
+        self.arrays = {}
+        for key, (shape, dtype) in specs.items():
+            nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            if self.owner:
+                block = shared_memory.SharedMemory(create=True, size=nbytes)
+            else:
+                block = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = block
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def names(self):
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def close(self):
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks = {}
+
+
+def _buffer_specs(n_envs, grid_size, flat_dim):
+    minimap = (n_envs, len(channel_names), grid_size, grid_size)
+    return {
+        "actions": ((n_envs,), np.int64),
+        "flat": ((n_envs, flat_dim), np.float32),
+        "minimaps": (minimap, np.float32),
+        "rewards": ((n_envs,), np.float32),
+        "dones": ((n_envs,), np.bool_),
+        "truncated": ((n_envs,), np.bool_),
+        "final_flat": ((n_envs, flat_dim), np.float32),
+        "final_minimaps": (minimap, np.float32),
+    }
+
+
+def _worker(conn, names, specs, start, count, max_steps, grid_size, seed):
+    """
+    Processus d'un groupe d'environnements : un VecShooterEnv qui écrit directement dans les
+    lignes [start, start + count) des tableaux partagés. Messages reçus : "reset", "step", "close".
+    """
+    from core.rl.vec_env import VecShooterEnv
+
+    shared = SharedArrays(specs, names)
+    rows = slice(start, start + count)
+    random.seed(seed)
+    np.random.seed(seed)
+    vec_env = VecShooterEnv(count, max_steps=max_steps, grid_size=grid_size,
+                            out=(shared["flat"][rows], shared["minimaps"][rows]))
+    try:
+        while True:
+            cmd = conn.recv()
+            if cmd == "reset":
+                vec_env.reset()
+                conn.send([])
+            elif cmd == "step":
+                n_done = len(vec_env.completed)
+                _, _, rewards, dones = vec_env.step(shared["actions"][rows])
+                shared["rewards"][rows] = rewards
+                shared["dones"][rows] = dones
+                shared["truncated"][rows] = vec_env.truncated
+                for k in np.flatnonzero(dones | vec_env.truncated):
+                    shared["final_flat"][start + k] = vec_env.final_flat[k]
+                    shared["final_minimaps"][start + k] = vec_env.final_minimaps[k]
+                # Seules les fins d'épisode (récompense cumulée, longueur) passent par le pipe
+                conn.send(vec_env.completed[n_done:])
+            elif cmd == "close":
+                break
+    finally:
+        shared.close()
+        conn.close()
+
+
+class ShooterEnvPool:
+    """
+    Version multi-processus de VecShooterEnv : n_workers processus, chacun avec envs_per_worker
+    environnements, écrivent états plats, minimaps, récompenses et fins d'épisode directement dans
+    des tableaux multiprocessing.shared_memory. Seuls de petits messages de contrôle passent par
+    les pipes ; les tableaux renvoyés sont des vues sur la mémoire partagée (aucune copie), réécrites
+    au step suivant : copier ce qu'on veut garder (replay buffer...).
+    Même interface que VecShooterEnv : reset(), step(actions), truncated, final_flat / final_minimaps,
+    completed.
+    """
+    def __init__(self, n_workers, envs_per_worker=1, max_steps=1000, grid_size=64, seed=0, context=None):
+        self.n_envs = n_workers * envs_per_worker
+        self.completed = []
+        specs = _buffer_specs(self.n_envs, grid_size, flat_state_dim())
+        self.shared = SharedArrays(specs)
+        ctx = mp.get_context(context)
+        self.conns, self.processes = [], []
+        for w in range(n_workers):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, daemon=True,
+                                  args=(child, self.shared.names(), specs, w * envs_per_worker,
+                                        envs_per_worker, max_steps, grid_size, seed + w))
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+        self.closed = False
+
+    def _broadcast(self, cmd):
+        for conn in self.conns:
+            conn.send(cmd)
+        for conn in self.conns:
+            self.completed.extend(conn.recv())
+
+    def reset(self):
+        self._broadcast("reset")
+        return self.shared["flat"], self.shared["minimaps"]
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        if actions.shape != (self.n_envs,):
+            raise ValueError(f"actions doit être de forme ({self.n_envs},), reçu {actions.shape}")
+        self.shared["actions"][:] = actions
+        self._broadcast("step")
+        return self.shared["flat"], self.shared["minimaps"], self.shared["rewards"], self.shared["dones"]
+
+    @property
+    def truncated(self):
+        return self.shared["truncated"]
+
+    @property
+    def final_flat(self):
+        return self.shared["final_flat"]
+
+    @property
+    def final_minimaps(self):
+        return self.shared["final_minimaps"]
+
+    def close(self):
+        if self.closed:
+            return
+        for conn in self.conns:
+            try:
+                conn.send("close")
+            except (BrokenPipeError, OSError):
+                pass  # worker déjà arrêté
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        for conn in self.conns:
+            conn.close()
+        self.shared.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -7,6 +7,27 @@ from core.objects.energy import EnergySource
 from core.objects.quest_item import ObjectiveItem
 from core.utils import distance_to
 
+TYPE_TO_INDEX = {
+    EntityType.ENERGY_DRONE: 0,
+    EntityType.ENERGY_KAMIKAZE: 1,
+    EntityType.AGENT: 2,
+    EntityType.ENERGY: 3,
+    EntityType.TARGET: 4,
+    EntityType.DANGER: 5,
+    EntityType.JAMMER: 6,
+    EntityType.SMOKE: 7,
+    EntityType.PROJECTILE: 8,
+    EntityType.DECOY: 9,
+    EntityType.ENERGY_DRONE_ELITE: 10,
+    EntityType.JammerComunication: 11,
+    EntityType.WALL: 12
+}
+
+
+def flat_state_dim(max_objects=5):
+    # Infos de l'agent (7) + par objet : dx, dy, dist, 4 directions, onehot du type
+    return 7 + max_objects * (3 + 4 + len(TYPE_TO_INDEX))
+
 
 class ShooterEnvWrapper:
     def __init__(self, env: Environment, agent):
@@ -14,39 +35,33 @@ class ShooterEnvWrapper:
         self.agent = agent
 
     def reset(self):
-        self.env.history = [] 
+        self.env.clear_history()
         self.agent = self.env.agents[0]  # à adapter si plusieurs agents
         return self.get_state()
 
     
     def get_state(self, max_objects=5):
-        type_to_index = {
-            EntityType.ENERGY_DRONE: 0,
-            EntityType.ENERGY_KAMIKAZE: 1,
-            EntityType.AGENT: 2,
-            EntityType.ENERGY: 3,
-            EntityType.TARGET: 4,
-            EntityType.DANGER: 5,
-            EntityType.JAMMER: 6,
-            EntityType.SMOKE: 7,
-            EntityType.PROJECTILE: 8,
-            EntityType.DECOY: 9,
-            EntityType.ENERGY_DRONE_ELITE: 10,
-            EntityType.JammerComunication: 11,
-            EntityType.WALL: 12
-        }
+        flat_state = self.get_flat_state(max_objects)
+        minimap_tensor = extract_minimap_tensor(self.agent, self.env,grid_size=64)  # (C, H, W)
+        
+        return flat_state, minimap_tensor
+
+    def get_flat_state(self, max_objects=5):
+        type_to_index = TYPE_TO_INDEX
         onehot_size = len(type_to_index)
         object_features = []
 
         other_agents = [a for a in self.env.agents if a != self.agent and a.alive]
         visible_objects = self.agent.get_vision(self.env.objects + other_agents)
 
-        visible_objects = sorted(visible_objects, key=lambda e: distance_to(self.agent, e))
+        # Distances mémorisées par le cache de perception (calculées une fois par tick)
+        perception = self.env.perception
+        visible_objects = sorted(visible_objects, key=lambda e: perception.distance(self.agent, e))
 
         for obj in visible_objects[:max_objects]:
             dx = (obj.x - self.agent.x) / self.env.width
             dy = (obj.y - self.agent.y) / self.env.height
-            dist = distance_to(self.agent, obj) / max(self.env.width, self.env.height)
+            dist = perception.distance(self.agent, obj) / max(self.env.width, self.env.height)
 
             onehot = [0.0] * onehot_size
             etype = getattr(obj, "etype", None)
@@ -78,21 +93,27 @@ class ShooterEnvWrapper:
             float(self.agent.alive),
             float(self.agent.zone_interdit)
         ]
-        flat_state = np.array(agent_info + object_features, dtype=np.float32)
-        minimap_tensor = extract_minimap_tensor(self.agent, self.env,grid_size=64)  # (C, H, W)
-        
-        return flat_state, minimap_tensor
+        return np.array(agent_info + object_features, dtype=np.float32)
 
     
-    def step(self, action_idx):
+    def act(self, action_idx):
+        # Action injectée pour le prochain env.step()
         action = self.agent.action_space[action_idx]
         self.agent.external_action = action
+        return action
+
+    def step(self, action_idx):
+        action = self.act(action_idx)
 
         self.env.step()
 
         # next_state = self.get_state()
         next_flat, next_minimap = self.get_state()
+        reward, done = self.reward(action)
+        return next_flat, next_minimap, reward, done
 
+    def reward(self, action):
+        """ Récompense et fin d'épisode après env.step() pour l'action jouée """
         # === Récompense ===
         reward = 0.0
         if action['type'] == "attack":
@@ -114,7 +135,7 @@ class ShooterEnvWrapper:
             
             for o in visible:
                 if o.etype in [EntityType.ENERGY_DRONE, EntityType.ENERGY_KAMIKAZE,EntityType.ENEMY_TURREL]:
-                    dist = distance_to(self.agent, o)
+                    dist = self.env.perception.distance(self.agent, o)
                     if dist > 15:
                         reward += 0.2
 
@@ -152,4 +173,4 @@ class ShooterEnvWrapper:
             reward -= 0.4
             
         done = not self.agent.alive
-        return next_flat, next_minimap, reward, done
+        return reward, done
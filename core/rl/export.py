@@ -0,0 +1,94 @@
+import copy
+
+import torch
+import torch.nn as nn
+
+from core.rl.models.dqn_model import CombinedDQN, DQN
+
+
+def fold_batchnorm(conv, bn):
+    """ Conv2d suivie d'un BatchNorm2d (statistiques courantes, mode eval) -> une seule Conv2d """
+    scale = bn.weight.detach() / torch.sqrt(bn.running_var + bn.eps)
+    fused = nn.Conv2d(conv.in_channels, conv.out_channels, conv.kernel_size, conv.stride,
+                      conv.padding, conv.dilation, conv.groups, bias=True)
+    bias = conv.bias.detach() if conv.bias is not None else torch.zeros_like(bn.running_mean)
+    with torch.no_grad():
+        fused.weight.copy_(conv.weight.detach() * scale.reshape(-1, 1, 1, 1))
+        fused.bias.copy_((bias - bn.running_mean) * scale + bn.bias.detach())
+    return fused
+
+
+def _fold_sequential(block):
+    # Conv2d, BatchNorm2d, ... -> Conv2d repliée, ...
+    layers = list(block)
+    out = []
+    i = 0
+    while i < len(layers):
+        if isinstance(layers[i], nn.Conv2d) and i + 1 < len(layers) and isinstance(layers[i + 1], nn.BatchNorm2d):
+            out.append(fold_batchnorm(layers[i], layers[i + 1]))
+            i += 2
+        else:
+            out.append(layers[i])
+            i += 1
+    return nn.Sequential(*out)
+
+
+def freeze(model):
+    """
+    Copie figée (eval) d'un CombinedDQN / DQN : BatchNorm repliés dans les convolutions.
+    Les LayerNorm de DQN restent : leurs statistiques sont propres à chaque entrée et un ReLU
+    les sépare de la couche suivante, il n'y a rien à replier.
+    """
+    frozen = copy.deepcopy(model).cpu().eval()
+    if isinstance(frozen, CombinedDQN):
+        frozen.conv1 = _fold_sequential(frozen.conv1)
+        frozen.conv2 = _fold_sequential(frozen.conv2)
+        frozen.conv3 = _fold_sequential(frozen.conv3)
+    elif not isinstance(frozen, DQN):
+        raise TypeError(f"CombinedDQN ou DQN attendu, reçu {type(frozen).__name__}")
+    for p in frozen.parameters():
+        p.requires_grad_(False)
+    return frozen
+
+
+class FlatPolicy(nn.Module):
+    """ DQN avec la signature de CombinedDQN (flat_input, minimap_input), minimap ignorée """
+    def __init__(self, dqn):
+        super(FlatPolicy, self).__init__()
+        self.dqn = dqn
+
+    def forward(self, flat_input, minimap_input):
+        return self.dqn(flat_input)
+
+
+def example_inputs(model, batch_size=1):
+    # Entrées factices aux dimensions du réseau, pour le traçage
+    if isinstance(model, CombinedDQN):
+        channels = model.conv1[0].in_channels
+        size = 8 * int(round((model.conv_output_size / 128) ** 0.5))  # 3 MaxPool2d(2), 128 canaux
+        return torch.zeros(batch_size, model.flat_fc1.in_features), torch.zeros(batch_size, channels, size, size)
+    return torch.zeros(batch_size, model.fc1.in_features), torch.zeros(batch_size, 1, 1, 1)
+
+
+def export_policy(model, path=None, quantize=False):
+    """
+    Policy CPU figée : freeze, quantification int8 dynamique des nn.Linear si quantize,
+    puis torch.jit.trace. Sauvegardée dans path (torch.jit.save) si donné ; renvoie le module tracé.
+    Le module exporté prend toujours (flat_input, minimap_input), DQN compris (FlatPolicy).
+    """
+    frozen = freeze(model)
+    if quantize:
+        frozen = torch.ao.quantization.quantize_dynamic(frozen, {nn.Linear}, dtype=torch.qint8)
+    if isinstance(model, DQN):
+        frozen = FlatPolicy(frozen).eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(frozen, example_inputs(model), check_trace=False)
+    traced = torch.jit.freeze(traced.eval())
+    if path is not None:
+        torch.jit.save(traced, path)
+    return traced
+
+
+def load_policy(path):
+    """ Policy exportée par export_policy, prête pour torch_policy / PolicyInference """
+    return torch.jit.load(path, map_location="cpu").eval()
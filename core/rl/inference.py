@@ -0,0 +1,162 @@
+import threading
+import time
+
+import numpy as np
+
+
+def torch_policy(model, device='cpu'):
+    """
+    Policy NumPy -> NumPy autour d'un réseau torch (CombinedDQN...) : un passage sous
+    torch.inference_mode, entrées enveloppées sans copie quand elles sont déjà en float32.
+    Le passage se fait en mode eval, mode d'origine rétabli ensuite : la BatchNorm utilise ses
+    statistiques courantes sans les modifier, l'action d'une ligne ne dépend pas des autres du lot.
+    Ne pas appeler pendant un train_step du même réseau dans un autre thread.
+    """
+    import torch
+
+    device = torch.device(device)
+
+    def policy(flat_states, minimaps):
+        training = model.training
+        model.eval()
+        try:
+            with torch.inference_mode():
+                q_values = model(torch.as_tensor(flat_states, dtype=torch.float32, device=device),
+                                 torch.as_tensor(minimaps, dtype=torch.float32, device=device))
+        finally:
+            model.train(training)
+        return q_values.cpu().numpy()
+    return policy
+
+
+class InferenceRequest:
+    __slots__ = ("service", "flat_state", "minimap", "action", "submitted", "done")
+
+    def __init__(self, service, flat_state, minimap):
+        self.service = service
+        self.flat_state = flat_state
+        self.minimap = minimap
+        self.action = None
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+
+    def result(self, timeout=None):
+        """ Action choisie ; sans thread de service, force le passage des requêtes en attente """
+        if not self.done.is_set() and self.service.thread is None:
+            self.service.flush()
+        if not self.done.wait(timeout):
+            raise TimeoutError("pas de réponse du service d'inférence")
+        if self.action is None:
+            raise RuntimeError("la policy a échoué sur ce lot") from self.service.error
+        return self.action
+
+
+class PolicyInference:
+    """
+    Choix d'actions en lot pour tous les agents de tous les environnements : un seul passage
+    de la policy (q-values (B, action_dim)) par lot au lieu d'un par agent, epsilon-greedy vectorisé.
+    - act(flat_states, minimaps) : lot déjà constitué (VecShooterEnv), découpé en lots de max_batch.
+    - submit(flat_state, minimap) -> InferenceRequest : observation isolée ; les requêtes sont
+      regroupées jusqu'à max_batch ou jusqu'à ce que la plus ancienne attende max_delay secondes
+      (thread lancé par start()), sinon au premier request.result() ou flush().
+    Les exploratoires (probabilité epsilon) ne passent pas dans le réseau.
+    rng : np.random.Generator (ou graine) des tirages epsilon-greedy, propre au service (le thread
+    de start() ne touche pas au générateur global) ; par défaut, graine tirée du générateur global.
+    """
+    def __init__(self, policy, action_dim, max_batch=256, max_delay=0.002, epsilon=0.0, rng=None):
+        self.policy = policy
+        self.rng = np.random.default_rng(rng if rng is not None else np.random.randint(2 ** 31))
+        self.action_dim = action_dim
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.epsilon = epsilon
+        self.pending = []
+        self.cond = threading.Condition()
+        self.thread = None
+        self.closing = False
+        self.forwards = 0
+        self.requests = 0
+        self.error = None
+
+    def act(self, flat_states, minimaps, epsilon=None):
+        epsilon = self.epsilon if epsilon is None else epsilon
+        n = len(flat_states)
+        # Même ordre de tirages que DQNTrainer.select_actions : actions aléatoires puis exploration
+        actions = self.rng.integers(0, self.action_dim, size=n)
+        explore = self.rng.random(n) < epsilon
+        greedy = np.flatnonzero(~explore)
+        if len(greedy) == n:
+            greedy = slice(None)  # pas de copie des entrées
+        flat_states = np.asarray(flat_states)[greedy]
+        minimaps = np.asarray(minimaps)[greedy]
+        rows = np.arange(n)[greedy]
+        for start in range(0, len(rows), self.max_batch):
+            chunk = slice(start, start + self.max_batch)
+            q_values = self.policy(flat_states[chunk], minimaps[chunk])
+            actions[rows[chunk]] = np.asarray(q_values).argmax(axis=1)
+            self.forwards += 1
+        self.requests += n
+        return actions
+
+    def submit(self, flat_state, minimap):
+        request = InferenceRequest(self, flat_state, minimap)
+        with self.cond:
+            self.pending.append(request)
+            full = len(self.pending) >= self.max_batch
+            # Réveil du thread : première requête (départ du délai) ou lot plein
+            if full or len(self.pending) == 1:
+                self.cond.notify()
+        if full and self.thread is None:
+            self.flush()
+        return request
+
+    def flush(self):
+        """ Passe toutes les requêtes en attente, renvoie leur nombre """
+        with self.cond:
+            batch, self.pending = self.pending, []
+        if batch:
+            self._answer(batch)
+        return len(batch)
+
+    def _answer(self, batch):
+        try:
+            actions = self.act(np.stack([r.flat_state for r in batch]), np.stack([r.minimap for r in batch])).tolist()
+        except Exception as error:  # remontée par request.result(), le thread continue
+            self.error = error
+            actions = [None] * len(batch)
+        for request, action in zip(batch, actions):
+            request.action = action
+            request.done.set()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closing:
+                    self.cond.wait()
+                if self.closing and not self.pending:
+                    return
+                # Attente d'un lot plein, au plus max_delay après la plus ancienne requête
+                deadline = self.pending[0].submitted + self.max_delay
+                while len(self.pending) < self.max_batch and not self.closing:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch, self.pending = self.pending[:self.max_batch], self.pending[self.max_batch:]
+            self._answer(batch)
+
+    def start(self):
+        if self.thread is None:
+            self.closing = False
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+
+    def close(self):
+        if self.thread is not None:
+            with self.cond:
+                self.closing = True
+                self.cond.notify()
+            self.thread.join(timeout=5)
+            self.thread = None
+        self.flush()
@@ -0,0 +1,80 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class BatchPrefetcher:
+    """
+    Thread qui tire à l'avance des lots du replay buffer, dans depth + 1 jeux de tableaux
+    préalloués recyclés (aucune allocation en régime établi).
+    allocate(forme, dtype) fournit ces tableaux : np.empty par défaut, mémoire épinglée torch
+    (pin_memory) côté DQNTrainer quand le réseau est sur GPU.
+    get() rend le lot suivant (7 tableaux, cases tirées, poids d'importance ou None) ; le lot
+    précédent est rendu au thread à ce moment-là, il faut donc avoir fini de s'en servir.
+    wait_time : temps passé par get() à attendre un lot, sample_time : temps de tirage du thread.
+    """
+    def __init__(self, replay_buffer, batch_size, depth=2, allocate=None):
+        self.replay_buffer = replay_buffer
+        self.batch_size = batch_size
+        self.allocate = allocate or (lambda shape, dtype: np.empty(shape, dtype=dtype))
+        self.slots = None
+        self.depth = depth
+        self.ready = queue.Queue()
+        self.free = queue.Queue()
+        self.current = None
+        self.wait_time = 0.0
+        self.sample_time = 0.0
+        self.batches = 0
+        self.error = None
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _make_slots(self):
+        # Formes et dtypes pris sur un premier tirage (le buffer a alors au moins un lot)
+        reference = self.replay_buffer.sample(self.batch_size)
+        self.slots = [tuple(self.allocate(a.shape, a.dtype) for a in reference) for _ in range(self.depth + 1)]
+        for slot in self.slots:
+            self.free.put(slot)
+
+    def _run(self):
+        try:
+            buffer = self.replay_buffer
+            while len(buffer) < self.batch_size:
+                if self.stop.wait(0.001):
+                    return
+            self._make_slots()
+            while not self.stop.is_set():
+                try:
+                    slot = self.free.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                start = time.perf_counter()
+                with buffer.lock:
+                    buffer.sample(self.batch_size, out=slot)
+                    positions = getattr(buffer, "last_positions", None)
+                    weights = getattr(buffer, "weights", None)
+                self.sample_time += time.perf_counter() - start
+                self.ready.put((slot, positions, weights))
+        except Exception as error:  # remontée dans get()
+            self.error = error
+            self.ready.put(None)
+
+    def get(self):
+        if self.current is not None:
+            self.free.put(self.current[0])
+            self.current = None
+        start = time.perf_counter()
+        item = self.ready.get()
+        self.wait_time += time.perf_counter() - start
+        if item is None:
+            raise RuntimeError("le thread de préchargement s'est arrêté") from self.error
+        self.current = item
+        self.batches += 1
+        return item
+
+    def close(self):
+        self.stop.set()
+        self.thread.join(timeout=5)
@@ -1,27 +1,279 @@
-import random
+import json
+import os
+import threading
+
 import numpy as np
-from collections import deque
+
+from core.rl.sum_tree import SumTree
+
 
 class ReplayBuffer:
-    def __init__(self, capacity):
-        self.buffer = deque(maxlen=capacity)
-        
-    def push(self, flat_state, minimap, action, reward, flat_next_state, next_minimap, done):
-        self.buffer.append((flat_state, minimap, action, reward, flat_next_state, next_minimap, done))
-
-    def sample(self, batch_size):
-        samples = random.sample(self.buffer, batch_size)
-        flat_s, minimap_s, a, r, flat_s2, minimap_s2, d = zip(*samples)
-
-        return (
-            np.array(flat_s),
-            np.array(minimap_s),
-            np.array(a),
-            np.array(r),
-            np.array(flat_s2),
-            np.array(minimap_s2),
-            np.array(d)
-        )
+    """
+    Replay buffer circulaire sur tableaux NumPy préalloués (au premier push, formes et dtypes
+    tirés de la première transition).
+    Chaque observation (état plat + minimap) n'est stockée qu'une fois : une transition garde
+    l'indice de son état et de son état suivant. Quand l'état poussé est l'état suivant de la
+    transition précédente du même flux (stream : numéro de l'environnement quand plusieurs
+    environnements poussent à tour de rôle), son observation est réutilisée ; en début d'épisode
+    (ou après une troncature) il est écrit à part. Il faut donc obs_capacity un peu au-dessus
+    de capacity : si les débuts d'épisode dépassent la marge, les plus vieilles transitions
+    sont évincées plus tôt.
+    sample remplit des tableaux de sortie réutilisés (écrasés au sample suivant) que
+    torch.from_numpy enveloppe sans copie.
+    codec : MinimapCodec dense (core.obs_codec) ; les minimaps sont alors stockées codées
+    (environ 5,6 fois moins de place, valeurs quantifiées au 1/255) et décodées au sample.
+    push / sample prennent lock : un thread peut tirer des lots (BatchPrefetcher) pendant
+    que la boucle d'entraînement pousse.
+    rng : np.random.Generator (ou graine) des tirages, propre au buffer : le thread de préchargement
+    ne touche pas au générateur global. Par défaut, graine tirée du générateur global (un run fixé
+    par np.random.seed reste reproductible).
+    """
+    def __init__(self, capacity, obs_capacity=None, codec=None, rng=None):
+        if codec is not None and codec.code_size is None:
+            raise ValueError("le replay buffer demande un codec de taille fixe (MinimapCodec(sparse=False))")
+        self.capacity = capacity
+        self.codec = codec
+        self.rng = np.random.default_rng(rng if rng is not None else np.random.randint(2 ** 31))
+        self.obs_capacity = obs_capacity or capacity + max(2, capacity // 50)
+        self.size = 0
+        self.head = 0        # prochaine case de transition
+        self.obs_written = 0  # observations écrites depuis le début (case = obs_written % obs_capacity)
+        self.last_next = {}  # flux -> numéro de l'état suivant de sa dernière transition
+        self.flat = None
+        self._outputs = {}
+        self.lock = threading.RLock()
+
+    def _zeros(self, name, shape, dtype):
+        return np.zeros(shape, dtype=dtype)
+
+    def _allocate(self, flat_state, minimap):
+        flat_state, minimap = np.asarray(flat_state), np.asarray(minimap)
+        self.flat = self._zeros("flat", (self.obs_capacity,) + flat_state.shape, np.float32)
+        if self.codec is None:
+            self.minimap = self._zeros("minimap", (self.obs_capacity,) + minimap.shape, np.float32)
+        else:
+            self.minimap = self._zeros("minimap", (self.obs_capacity, self.codec.code_size), np.uint8)
+        # Transitions : numéros (pas cases) des observations, pour savoir si elles sont écrasées
+        self.state = self._zeros("state", (self.capacity,), np.int64)
+        self.next_state = self._zeros("next_state", (self.capacity,), np.int64)
+        self.action = self._zeros("action", (self.capacity,), np.int64)
+        self.reward = self._zeros("reward", (self.capacity,), np.float32)
+        self.done = self._zeros("done", (self.capacity,), np.float32)
+
+    def _write_obs(self, flat_state, minimap):
+        number = self.obs_written
+        slot = number % self.obs_capacity
+        self.flat[slot] = flat_state
+        self.minimap[slot] = minimap
+        self.obs_written += 1
+        # Les plus vieilles transitions dont l'état vient d'être écrasé sortent du buffer
+        oldest = self.obs_written - self.obs_capacity
+        while self.size and self.state[(self.head - self.size) % self.capacity] < oldest:
+            self._evict((self.head - self.size) % self.capacity)
+            self.size -= 1
+        return number
+
+    def _evict(self, position):
+        pass
+
+    def _continues(self, stream, flat_state, minimap):
+        """ L'état poussé est-il l'état suivant de la transition précédente du flux (encore en mémoire) ? """
+        number = self.last_next.get(stream, -1)
+        if number < 0 or number < self.obs_written - self.obs_capacity:
+            return False
+        slot = number % self.obs_capacity
+        return np.array_equal(self.flat[slot], flat_state) and np.array_equal(self.minimap[slot], minimap)
+
+    def push(self, flat_state, minimap, action, reward, flat_next_state, next_minimap, done, stream=0):
+        if self.codec is not None:
+            minimap, next_minimap = self.codec.encode(minimap), self.codec.encode(next_minimap)
+        with self.lock:
+            if self.flat is None:
+                self._allocate(flat_state, minimap)
+            if self._continues(stream, flat_state, minimap):
+                state = self.last_next[stream]
+            else:
+                state = self._write_obs(flat_state, minimap)
+            next_state = self._write_obs(flat_next_state, next_minimap)
+
+            i = self.head
+            self.state[i] = state
+            self.next_state[i] = next_state
+            self.action[i] = action
+            self.reward[i] = reward
+            self.done[i] = done
+            self.head = (i + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.last_next[stream] = next_state
+
+    def _output(self, batch_size):
+        out = self._outputs.get(batch_size)
+        if out is None:
+            minimap_shape = self.minimap.shape[1:] if self.codec is None else self.codec.shape
+            out = self._outputs[batch_size] = (
+                np.empty((batch_size,) + self.flat.shape[1:], dtype=np.float32),
+                np.empty((batch_size,) + minimap_shape, dtype=np.float32),
+                np.empty(batch_size, dtype=np.int64),
+                np.empty(batch_size, dtype=np.float32),
+                np.empty((batch_size,) + self.flat.shape[1:], dtype=np.float32),
+                np.empty((batch_size,) + minimap_shape, dtype=np.float32),
+                np.empty(batch_size, dtype=np.float32),
+            )
+        return out
+
+    def positions(self, batch_size):
+        """ Cases de transitions tirées uniformément (avec remise) """
+        return (self.head - self.size + self.rng.integers(0, self.size, batch_size)) % self.capacity
+
+    def gather(self, positions, out=None):
+        """ Transitions aux cases positions, écrites dans out (7 tableaux) ou les tableaux de sortie réutilisés """
+        flat_s, minimap_s, a, r, flat_s2, minimap_s2, d = out = out or self._output(len(positions))
+        states = self.state[positions] % self.obs_capacity
+        next_states = self.next_state[positions] % self.obs_capacity
+        np.take(self.flat, states, axis=0, out=flat_s, mode="clip")
+        np.take(self.action, positions, out=a, mode="clip")
+        np.take(self.reward, positions, out=r, mode="clip")
+        np.take(self.flat, next_states, axis=0, out=flat_s2, mode="clip")
+        np.take(self.done, positions, out=d, mode="clip")
+        if self.codec is None:
+            np.take(self.minimap, states, axis=0, out=minimap_s, mode="clip")
+            np.take(self.minimap, next_states, axis=0, out=minimap_s2, mode="clip")
+        else:
+            self.codec.decode_batch(self.minimap[states], out=minimap_s)
+            self.codec.decode_batch(self.minimap[next_states], out=minimap_s2)
+        return out
+
+    def sample(self, batch_size, out=None):
+        with self.lock:
+            return self.gather(self.positions(batch_size), out)
+
+    def nbytes(self):
+        if self.flat is None:
+            return 0
+        return sum(a.nbytes for a in (self.flat, self.minimap, self.state, self.next_state,
+                                      self.action, self.reward, self.done))
 
     def __len__(self):
-        return len(self.buffer)
+        return self.size
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay priorisé (Schaul et al.) : transition tirée avec une probabilité proportionnelle à
+    (|erreur TD| + eps) ** alpha, via un SumTree sur les cases de transitions.
+    Une nouvelle transition reçoit la plus grande priorité vue. sample renvoie les mêmes tableaux
+    que ReplayBuffer et garde les cases tirées (last_positions) et les poids d'importance (weights,
+    normalisés par le max du lot, beta croissant linéairement jusqu'à 1 en beta_steps tirages) ;
+    update_priorities(td_errors) met à jour les priorités de ces cases.
+    """
+    def __init__(self, capacity, obs_capacity=None, codec=None, alpha=0.6, beta=0.4, beta_steps=100_000, eps=1e-3,
+                 rng=None):
+        super().__init__(capacity, obs_capacity, codec, rng)
+        self.alpha = alpha
+        self.beta_start = beta
+        self.beta_steps = beta_steps
+        self.eps = eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+        self.samples = 0
+        self.last_positions = None
+        self.weights = None
+
+    def _evict(self, position):
+        self.tree.set(position, 0.0)
+
+    def push(self, *transition, **kwargs):
+        with self.lock:
+            position = self.head
+            super().push(*transition, **kwargs)
+            self.tree.set(position, self.max_priority)
+
+    def beta(self):
+        return min(1.0, self.beta_start + (1.0 - self.beta_start) * self.samples / self.beta_steps)
+
+    def positions(self, batch_size):
+        positions = self.tree.sample(batch_size, self.rng)
+        probs = self.tree.get(positions) / self.tree.total()
+        weights = (self.size * probs) ** -self.beta()
+        self.weights = (weights / weights.max()).astype(np.float32)
+        self.last_positions = positions
+        self.samples += 1
+        return positions
+
+    def update_priorities(self, td_errors, positions=None):
+        positions = self.last_positions if positions is None else positions
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        with self.lock:
+            self.tree.update(positions, priorities)
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+
+
+class MemmapReplayBuffer(ReplayBuffer):
+    """
+    ReplayBuffer dont les tableaux sont des fichiers .npy projetés en mémoire (numpy memmap)
+    dans le dossier path : la capacité n'est plus bornée par la RAM mais par le disque, seules
+    les pages récemment lues ou écrites restent en cache. Les tirages sont triés pour parcourir
+    les fichiers dans l'ordre.
+    flush() écrit les compteurs (et les plafonds du codec) dans path/meta.json : un buffer recréé
+    sur le même dossier (mêmes capacités, même codec) reprend les transitions de l'entraînement précédent.
+    """
+    arrays = ("flat", "minimap", "state", "next_state", "action", "reward", "done")
+    counters = ("size", "head", "obs_written")
+
+    def __init__(self, path, capacity, obs_capacity=None, codec=None, rng=None):
+        super().__init__(capacity, obs_capacity, codec, rng)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(self._meta_path()):
+            self._reload()
+
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def _zeros(self, name, shape, dtype):
+        # Fichier creux : les pages jamais écrites ne prennent pas de place et se lisent à zéro
+        return np.lib.format.open_memmap(os.path.join(self.path, name + ".npy"), mode="w+", dtype=dtype, shape=shape)
+
+    def _reload(self):
+        with open(self._meta_path()) as f:
+            meta = json.load(f)
+        if (meta["capacity"], meta["obs_capacity"]) != (self.capacity, self.obs_capacity):
+            raise ValueError(f"{self.path} contient un buffer de capacité {meta['capacity']} / {meta['obs_capacity']}"
+                             f" observations, demandé {self.capacity} / {self.obs_capacity}")
+        for name in self.arrays:
+            setattr(self, name, np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r+"))
+        coded = self.minimap.dtype == np.uint8
+        if coded != (self.codec is not None) or coded and self.minimap.shape[1] != self.codec.code_size:
+            raise ValueError(f"{self.path} : minimaps stockées {'codées' if coded else 'en float32'},"
+                             f" incompatible avec codec={self.codec!r}")
+        # Plafonds des canaux quantifiés (ancien format : 1 partout, santé écrêtée)
+        if coded and meta.get("codec_scale", [1.0] * len(self.codec.scale)) != self.codec.scale.tolist():
+            raise ValueError(f"{self.path} : minimaps codées avec les plafonds {meta.get('codec_scale')},"
+                             f" le codec utilise {self.codec.scale.tolist()}")
+        for name in self.counters:
+            setattr(self, name, meta[name])
+        last_next = meta["last_next"]
+        # Ancien format : un seul flux
+        self.last_next = {int(k): v for k, v in last_next.items()} if isinstance(last_next, dict) else {0: last_next}
+
+    def positions(self, batch_size):
+        return np.sort(super().positions(batch_size))
+
+    def flush(self):
+        if self.flat is None:
+            return
+        for name in self.arrays:
+            getattr(self, name).flush()
+        meta = {name: int(getattr(self, name)) for name in ("capacity", "obs_capacity") + self.counters}
+        meta["last_next"] = {str(k): int(v) for k, v in self.last_next.items()}
+        if self.codec is not None:
+            meta["codec_scale"] = self.codec.scale.tolist()
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path())  # meta.json toujours complet
+
+    def close(self):
+        self.flush()
+        for name in self.arrays:
+            setattr(self, name, None)
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class SumTree:
+    """
+    Arbre de sommes à branching fils par noeud, rangé par niveaux : levels[0] est la racine
+    (somme totale), levels[-1] les feuilles (complétées par des zéros jusqu'à branching ** depth),
+    un noeud de levels[d] est la somme de ses fils levels[d + 1][branching * i : branching * (i + 1)].
+    Tirages et mises à jour en lot, quelques opérations vectorisées par niveau : O(B log N).
+    16 fils plutôt que 2 : 4 niveaux pour 10 000 feuilles au lieu de 14, moins d'appels NumPy.
+    """
+    def __init__(self, capacity, branching=16):
+        self.capacity = capacity
+        self.branching = branching
+        self.depth = 1
+        while branching ** self.depth < capacity:
+            self.depth += 1
+        self.levels = [np.zeros(branching ** d) for d in range(self.depth + 1)]
+        # Sommes cumulées des fils d'un noeud par un produit matriciel (plus rapide que np.cumsum(axis=1))
+        self.triangle = np.triu(np.ones((branching, branching)))
+
+    def total(self):
+        return self.levels[0][0]
+
+    def get(self, positions):
+        return self.levels[-1][positions]
+
+    def set(self, position, value):
+        """ Une feuille (push) : boucle scalaire, moins chère qu'un passage en lot de taille 1 """
+        k = self.branching
+        self.levels[-1][position] = value
+        for d in range(self.depth - 1, -1, -1):
+            position //= k
+            self.levels[d][position] = self.levels[d + 1][k * position:k * (position + 1)].sum()
+
+    def update(self, positions, values):
+        # Parents recalculés depuis leurs fils : les doublons dans positions ne faussent rien
+        k = self.branching
+        self.levels[-1][positions] = values
+        for d in range(self.depth - 1, -1, -1):
+            positions = positions // k
+            self.levels[d][positions] = self.levels[d + 1].reshape(-1, k)[positions].sum(axis=1)
+
+    def find(self, values):
+        """ Feuilles dont l'intervalle de somme cumulée contient chaque valeur de values """
+        k = self.branching
+        values = np.array(values, dtype=np.float64)
+        rows = np.arange(len(values))
+        i = np.zeros(len(values), dtype=np.int64)
+        for level in self.levels[1:]:
+            cumsum = level.reshape(-1, k)[i] @ self.triangle
+            # Arrondis : rester sous la somme des fils, un fils nul n'est alors jamais choisi
+            np.minimum(values, np.nextafter(cumsum[:, -1], 0), out=values)
+            child = (cumsum <= values[:, None]).sum(axis=1)
+            values -= cumsum[rows, child] - level[i * k + child]
+            i = i * k + child
+        return i
+
+    def sample(self, batch_size, rng=np.random):
+        """
+        batch_size feuilles tirées proportionnellement à leur valeur (une par tranche de la somme),
+        rng : np.random.Generator (générateur global par défaut)
+        """
+        total = self.levels[0][0]
+        return self.find((np.arange(batch_size) + rng.random(batch_size)) * (total / batch_size))
@@ -0,0 +1,252 @@
+import multiprocessing as mp
+import random
+import time
+
+import numpy as np
+import torch
+
+from core.mini_map import channel_names
+from core.rl.env_pool import SharedArrays
+from core.rl.env_wrapper import flat_state_dim
+from core.rl.trainers.train_dqn import DQNTrainer
+from core.rl.vec_env import VecShooterEnv
+
+
+class SharedWeights:
+    """
+    state_dict d'un réseau mis à plat (float32) en mémoire partagée : le learner publie,
+    les acteurs relisent. Le compteur de version est impair pendant une écriture (seqlock),
+    un acteur ne charge donc jamais un mélange de deux versions.
+    """
+    def __init__(self, model, names=None):
+        size = sum(value.numel() for value in model.state_dict().values())
+        self.shared = SharedArrays({"weights": ((size,), np.float32), "version": ((1,), np.int64)}, names)
+        self.loaded = 0
+
+    def names(self):
+        return self.shared.names()
+
+    def publish(self, model):
+        version = self.shared["version"]
+        weights = self.shared["weights"]
+        version[0] += 1  # impair : écriture en cours
+        offset = 0
+        for value in model.state_dict().values():
+            n = value.numel()
+            weights[offset:offset + n] = value.detach().cpu().reshape(-1).float().numpy()
+            offset += n
+        version[0] += 1
+
+    def load(self, model):
+        """ Charge la dernière version publiée si elle est nouvelle, renvoie True dans ce cas """
+        version = self.shared["version"]
+        while True:
+            start = int(version[0])
+            if start == self.loaded:
+                return False
+            if start % 2:
+                time.sleep(0.0005)
+                continue
+            snapshot = self.shared["weights"].copy()
+            if int(version[0]) == start:
+                break
+        state = {}
+        offset = 0
+        for key, value in model.state_dict().items():
+            n = value.numel()
+            state[key] = torch.from_numpy(snapshot[offset:offset + n]).reshape(value.shape).to(value.dtype)
+            offset += n
+        model.load_state_dict(state)
+        self.loaded = start
+        return True
+
+    def close(self):
+        self.shared.close()
+
+
+class TransitionRing:
+    """
+    File circulaire de transitions en mémoire partagée entre un acteur (écrit) et le learner (lit).
+    counters = [écrites, lues] ; l'acteur attend quand le learner a capacity transitions de retard.
+    stream : flux de la transition (environnement qui l'a jouée), transmis au replay buffer.
+    """
+    def __init__(self, capacity, flat_dim, minimap_shape, names=None):
+        self.capacity = capacity
+        self.shared = SharedArrays({
+            "flat": ((capacity, flat_dim), np.float32),
+            "minimap": ((capacity,) + minimap_shape, np.float32),
+            "action": ((capacity,), np.int64),
+            "reward": ((capacity,), np.float32),
+            "next_flat": ((capacity, flat_dim), np.float32),
+            "next_minimap": ((capacity,) + minimap_shape, np.float32),
+            "done": ((capacity,), np.bool_),
+            "stream": ((capacity,), np.int64),
+            "counters": ((2,), np.int64),
+        }, names)
+
+    def names(self):
+        return self.shared.names()
+
+    def push(self, flat, minimap, action, reward, next_flat, next_minimap, done, stream=0, stop=None):
+        counters = self.shared["counters"]
+        while counters[0] - counters[1] >= self.capacity:
+            if stop is not None and stop.is_set():
+                return False
+            time.sleep(0.0005)
+        i = int(counters[0]) % self.capacity
+        shared = self.shared
+        shared["flat"][i] = flat
+        shared["minimap"][i] = minimap
+        shared["action"][i] = action
+        shared["reward"][i] = reward
+        shared["next_flat"][i] = next_flat
+        shared["next_minimap"][i] = next_minimap
+        shared["done"][i] = done
+        shared["stream"][i] = stream
+        counters[0] += 1  # publiée une fois entièrement écrite
+        return True
+
+    def drain(self, replay_buffer):
+        """ Copie dans replay_buffer les transitions pas encore lues, renvoie leur nombre """
+        counters = self.shared["counters"]
+        written, read = int(counters[0]), int(counters[1])
+        shared = self.shared
+        for j in range(read, written):
+            i = j % self.capacity
+            # Le replay buffer recopie les observations dans ses propres tableaux
+            replay_buffer.push(shared["flat"][i], shared["minimap"][i], int(shared["action"][i]),
+                               float(shared["reward"][i]), shared["next_flat"][i],
+                               shared["next_minimap"][i], bool(shared["done"][i]), stream=int(shared["stream"][i]))
+        counters[1] = written
+        return written - read
+
+    def close(self):
+        self.shared.close()
+
+
+def _actor(rank, config, weight_names, ring_names, global_steps, stop):
+    """
+    Processus acteur : VecShooterEnv de config["envs_per_actor"] environnements, copie locale du
+    réseau rechargée toutes les config["sync_every"] itérations, epsilon lu sur le nombre total
+    de pas de tous les acteurs (même décroissance que la boucle série).
+    """
+    torch.set_num_threads(1)
+    random.seed(config["seed"] + rank)
+    np.random.seed(config["seed"] + rank)
+    torch.manual_seed(config["seed"] + rank)
+
+    trainer = DQNTrainer(state_dim=config["state_dim"], action_dim=config["action_dim"], seed=config["seed"] + rank)
+    weights = SharedWeights(trainer.q_net, weight_names)
+    ring = TransitionRing(config["ring_capacity"], config["state_dim"], config["minimap_shape"], ring_names)
+    vec_env = VecShooterEnv(config["envs_per_actor"], max_steps=config["max_steps"])
+    flat_states, minimaps = vec_env.reset()
+    iteration = 0
+    try:
+        while not stop.is_set():
+            if iteration % config["sync_every"] == 0:
+                weights.load(trainer.q_net)
+            iteration += 1
+            trainer.epsilon = trainer.epsilon_after(global_steps.value)
+            actions = trainer.select_actions(flat_states, minimaps)
+            next_states, next_minimaps, rewards, dones = vec_env.step(actions)
+            ended = dones | vec_env.truncated
+            for k in range(vec_env.n_envs):
+                next_state = vec_env.final_flat[k] if ended[k] else next_states[k]
+                next_minimap = vec_env.final_minimaps[k] if ended[k] else next_minimaps[k]
+                # Un flux par environnement, tous acteurs confondus
+                if not ring.push(flat_states[k], minimaps[k], actions[k], rewards[k],
+                                 next_state, next_minimap, dones[k], rank * vec_env.n_envs + k, stop):
+                    return
+            with global_steps.get_lock():
+                global_steps.value += vec_env.n_envs
+            flat_states, minimaps = next_states, next_minimaps
+    finally:
+        weights.close()
+        ring.close()
+
+
+def train_actor_learner(state_dim=20*5+7, action_dim=13, n_actors=2, envs_per_actor=4, total_steps=100_000,
+                        max_steps=1000, sync_every=25, publish_every=50, target_every=None,
+                        updates_per_step=1.0, ring_capacity=32, report_every=10.0, seed=0, context=None):
+    """
+    Mode acteurs / learner de DQNTrainer : n_actors processus jouent (VecShooterEnv) avec une copie
+    du CombinedDQN, le processus courant consomme leurs transitions et entraîne le réseau.
+    Mêmes cibles Double-DQN (DQNTrainer.train_step) et même epsilon par pas d'environnement que la
+    boucle série ; au plus updates_per_step mises à jour par pas d'acteur (1.0 : comme la boucle série).
+    Poids diffusés par mémoire partagée toutes les publish_every mises à jour, réseau cible recopié
+    toutes les target_every (None : jamais, comme main.train_dqn).
+    Un acteur arrêté avant la fin (exception, mémoire...) lève RuntimeError avec son rang.
+    À l'arrêt, chaque acteur a 10 s pour finir son pas avant terminate() ; les transitions publiées
+    dans sa file sont toutes reprises, celle qu'un acteur tué écrivait (non publiée) est perdue.
+    Renvoie le trainer et les débits (pas d'acteurs / s, mises à jour / s).
+    """
+    if state_dim != flat_state_dim():
+        raise ValueError(f"state_dim doit valoir {flat_state_dim()} (taille de l'état plat), reçu {state_dim}")
+    trainer = DQNTrainer(state_dim=state_dim, action_dim=action_dim, seed=seed)
+    minimap_shape = (len(channel_names), 64, 64)
+
+    ctx = mp.get_context(context)
+    weights = SharedWeights(trainer.q_net)
+    weights.publish(trainer.q_net)
+    rings = [TransitionRing(ring_capacity, state_dim, minimap_shape) for _ in range(n_actors)]
+    global_steps = ctx.Value("q", 0)
+    stop = ctx.Event()
+    config = {
+        "state_dim": state_dim, "action_dim": action_dim, "envs_per_actor": envs_per_actor,
+        "max_steps": max_steps, "sync_every": sync_every, "ring_capacity": ring_capacity,
+        "minimap_shape": minimap_shape, "seed": seed,
+    }
+    actors = [ctx.Process(target=_actor, daemon=True,
+                          args=(rank, config, weights.names(), ring.names(), global_steps, stop))
+              for rank, ring in enumerate(rings)]
+    for actor in actors:
+        actor.start()
+
+    start = last_report = time.perf_counter()
+    updates = 0
+    try:
+        while global_steps.value < total_steps:
+            # Un acteur ne s'arrête de lui-même qu'après stop : sinon il a planté
+            for rank, actor in enumerate(actors):
+                if actor.exitcode is not None:
+                    raise RuntimeError(f"acteur {rank} arrêté (code de sortie {actor.exitcode})"
+                                       f" après {global_steps.value} pas")
+            for ring in rings:
+                ring.drain(trainer.replay_buffer)
+            steps = global_steps.value
+            if len(trainer.replay_buffer) < trainer.batch_size or updates >= updates_per_step * steps:
+                time.sleep(0.001)
+                continue
+            trainer.train_step()
+            updates += 1
+            if updates % publish_every == 0:
+                weights.publish(trainer.q_net)
+            if target_every and updates % target_every == 0:
+                trainer.update_target()
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                elapsed = now - start
+                print(f"acteurs {steps / elapsed:7.1f} pas/s | learner {updates / elapsed:6.1f} mises à jour/s"
+                      f" | epsilon {trainer.epsilon_after(steps):.3f}")
+                last_report = now
+    finally:
+        stop.set()
+        for actor in actors:
+            actor.join(timeout=10)
+            if actor.is_alive():
+                actor.terminate()
+        # Transitions publiées encore dans les files (les acteurs sont tous arrêtés : counters[0] ne bouge plus)
+        for ring in rings:
+            ring.drain(trainer.replay_buffer)
+            ring.close()
+        weights.close()
+
+    elapsed = time.perf_counter() - start
+    trainer.epsilon = trainer.epsilon_after(global_steps.value)
+    return trainer, {
+        "actor_steps": global_steps.value,
+        "updates": updates,
+        "actor_steps_per_s": global_steps.value / elapsed,
+        "updates_per_s": updates / elapsed,
+    }
@@ -1,6 +1,9 @@
+from core.rl.inference import PolicyInference, torch_policy
 from core.rl.models.dqn_model import DQN, CombinedDQN
-from core.rl.replay_buffer import ReplayBuffer
+from core.rl.prefetch import BatchPrefetcher
+from core.rl.replay_buffer import PrioritizedReplayBuffer, ReplayBuffer
 
+import time
 import torch
 import torch.nn as nn
 import numpy as np
@@ -8,7 +11,13 @@ import torch.optim as optim
 import torch.nn.functional as F
 
 class DQNTrainer:
-    def __init__(self, state_dim, action_dim, device='cpu'):
+    """
+    seed : graine des tirages du trainer (epsilon-greedy, lots du replay buffer par défaut, y compris
+    dans le thread de préchargement) ; None : tirée du générateur global
+    """
+    def __init__(self, state_dim, action_dim, device='cpu', replay_buffer=None, seed=None):
+        self.rng = np.random.default_rng(seed if seed is not None else np.random.randint(2 ** 31))
+        buffer_rng, inference_rng = self.rng.spawn(2)
         self.device = torch.device(device)
         self.q_net = CombinedDQN(flat_input_dim=state_dim, output_dim=action_dim).to(self.device)
         self.target_net = CombinedDQN(flat_input_dim=state_dim, output_dim=action_dim).to(self.device)
@@ -19,17 +28,26 @@ class DQNTrainer:
         self.target_net.eval()
 
         self.optimizer = optim.Adam(self.q_net.parameters(), lr=1e-3)
-        self.replay_buffer = ReplayBuffer(capacity=10000)
+        # replay_buffer : autre stockage de même interface (ex. MemmapReplayBuffer sur disque)
+        self.replay_buffer = replay_buffer if replay_buffer is not None else ReplayBuffer(capacity=10000, rng=buffer_rng)
         self.batch_size = 64
         self.gamma = 0.99
 
         # Exploration params
-        self.epsilon = 1.0
+        self.epsilon_start = 1.0
+        self.epsilon = self.epsilon_start
         self.epsilon_min = 0.1
         self.epsilon_decay = 0.995
         
         self.action_dim =action_dim
 
+        # Choix d'actions en lot (select_actions), un passage du réseau par lot de max_batch
+        self.inference = PolicyInference(torch_policy(self.q_net, self.device), action_dim, rng=inference_rng)
+
+        # Lots tirés en arrière-plan (start_prefetch) et temps de train_step : attente des données / calcul
+        self.prefetcher = None
+        self.timing = {"steps": 0, "data": 0.0, "compute": 0.0}
+
     # def select_action(self, state):
     #     if np.random.rand() < self.epsilon:
     #         action= np.random.randint(0, self.action_dim)
@@ -46,33 +64,87 @@ class DQNTrainer:
         flat_state_tensor = torch.FloatTensor(flat_state).unsqueeze(0).to(self.device)
         minimap_tensor = torch.FloatTensor(minimap_tensor).unsqueeze(0).to(self.device)  # (1, C, H, W)
 
-        if np.random.rand() < self.epsilon:
-            action = np.random.randint(0, self.action_dim)
+        if self.rng.random() < self.epsilon:
+            action = int(self.rng.integers(0, self.action_dim))
         else:
+            # Mode eval le temps du choix (comme select_actions) : BatchNorm sur ses statistiques
+            # courantes, mises à jour seulement par train_step
+            self.q_net.eval()
             with torch.no_grad():
                 q_values = self.q_net(flat_state_tensor, minimap_tensor)
                 action = q_values.argmax().item()
+            self.q_net.train()
 
         self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
         return action
 
+    def select_actions(self, flat_states, minimaps):
+        """
+        select_action pour N environnements (VecShooterEnv) : un seul passage du réseau en lot,
+        en mode eval (torch_policy) ; l'action de chaque environnement est celle de select_action
+        """
+        n = len(flat_states)
+        actions = self.inference.act(flat_states, minimaps, epsilon=self.epsilon)
+
+        # Même décroissance par pas d'environnement que select_action
+        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay ** n)
+        return actions
+
+
+    def epsilon_after(self, steps):
+        """ Valeur de epsilon après steps actions choisies (décroissance de select_action) """
+        return max(self.epsilon_min, self.epsilon_start * self.epsilon_decay ** steps)
+
+    def start_prefetch(self, depth=2):
+        """ Tire les lots dans un thread (core.rl.prefetch) : train_step n'attend plus le replay buffer """
+        allocate = None
+        if self.device.type == 'cuda':
+            # Mémoire épinglée : copies vers le GPU asynchrones (non_blocking)
+            def allocate(shape, dtype):
+                return torch.empty(shape, dtype=torch.from_numpy(np.empty(0, dtype)).dtype, pin_memory=True).numpy()
+        self.prefetcher = BatchPrefetcher(self.replay_buffer, self.batch_size, depth, allocate)
+
+    def stop_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    def timing_report(self):
+        """ Temps moyen par train_step passé à attendre les données et à calculer (ms), part d'attente """
+        steps = max(1, self.timing["steps"])
+        data, compute = self.timing["data"], self.timing["compute"]
+        return {
+            "steps": self.timing["steps"],
+            "data_ms": 1e3 * data / steps,
+            "compute_ms": 1e3 * compute / steps,
+            "stalled": data / max(1e-12, data + compute),
+        }
+
+    def _next_batch(self):
+        if self.prefetcher is not None:
+            return self.prefetcher.get()
+        batch = self.replay_buffer.sample(self.batch_size)
+        return batch, getattr(self.replay_buffer, "last_positions", None), getattr(self.replay_buffer, "weights", None)
 
     def train_step(self):
         if len(self.replay_buffer) < self.batch_size:
             return  # Pas assez d'échantillons
 
         # === Sample ===
-        flat_states, minimaps, actions, rewards, flat_next_states, next_minimaps, dones = self.replay_buffer.sample(self.batch_size)
+        start = time.perf_counter()
+        batch, positions, weights = self._next_batch()
+        flat_states, minimaps, actions, rewards, flat_next_states, next_minimaps, dones = batch
 
-        # === Conversion en tensors ===
-        flat_states = torch.FloatTensor(flat_states).to(self.device)
-        minimaps = torch.FloatTensor(minimaps).to(self.device)
+        # === Conversion en tensors (sans copie : tableaux de sortie float32 / int64 du buffer) ===
+        flat_states = torch.from_numpy(flat_states).to(self.device, non_blocking=True)
+        minimaps = torch.from_numpy(minimaps).to(self.device, non_blocking=True)
 
-        actions = torch.LongTensor(actions).unsqueeze(1).to(self.device)
-        rewards = torch.FloatTensor(rewards).unsqueeze(1).to(self.device)
-        flat_next_states = torch.FloatTensor(flat_next_states).to(self.device)
-        next_minimaps = torch.FloatTensor(next_minimaps).to(self.device)
-        dones = torch.FloatTensor(dones).unsqueeze(1).to(self.device)
+        actions = torch.from_numpy(actions).unsqueeze(1).to(self.device, non_blocking=True)
+        rewards = torch.from_numpy(rewards).unsqueeze(1).to(self.device, non_blocking=True)
+        flat_next_states = torch.from_numpy(flat_next_states).to(self.device, non_blocking=True)
+        next_minimaps = torch.from_numpy(next_minimaps).to(self.device, non_blocking=True)
+        dones = torch.from_numpy(dones).unsqueeze(1).to(self.device, non_blocking=True)
+        data_ready = time.perf_counter()
 
         # === Q(s, a) ===
         q_values = self.q_net(flat_states, minimaps).gather(1, actions)
@@ -84,13 +156,23 @@ class DQNTrainer:
             target_q = rewards + self.gamma * next_q_values * (1 - dones)
 
         # === Perte et descente de gradient ===
-        loss = F.smooth_l1_loss(q_values, target_q)
+        if isinstance(self.replay_buffer, PrioritizedReplayBuffer):
+            # Replay priorisé : perte pondérée par les poids d'importance, erreurs TD renvoyées au buffer
+            weights = torch.from_numpy(weights).unsqueeze(1).to(self.device)
+            loss = (weights * F.smooth_l1_loss(q_values, target_q, reduction='none')).mean()
+            self.replay_buffer.update_priorities((target_q - q_values).detach().squeeze(1).cpu().numpy(), positions)
+        else:
+            loss = F.smooth_l1_loss(q_values, target_q)
 
         self.optimizer.zero_grad()
         loss.backward()
         nn.utils.clip_grad_norm_(self.q_net.parameters(), max_norm=1.0)
         self.optimizer.step()
 
+        self.timing["steps"] += 1
+        self.timing["data"] += data_ready - start
+        self.timing["compute"] += time.perf_counter() - data_ready
+
     
     def update_target(self):
         """ Met à jour le réseau cible avec les poids du réseau principal """
@@ -0,0 +1,94 @@
+import numpy as np
+
+from core.environment import RECORD_OFF, Environment
+from core.mini_map import channel_names, extract_env_minimaps
+from core.perception import evaluate_worlds
+from core.rl.env_wrapper import ShooterEnvWrapper
+
+
+class VecShooterEnv:
+    """
+    N environnements RL avancés au même pas, avec l'interface de ShooterEnvWrapper en lot :
+    step prend un tableau (N,) d'actions et renvoie états plats (N, flat_dim), minimaps
+    (N, 18, grid_size, grid_size), récompenses (N,) et fins d'épisode (N,).
+    Un épisode terminé (agent mort, ou max_steps atteint : truncated) repart dans un nouvel
+    Environment : sa ligne contient alors le premier état du nouvel épisode, le dernier état
+    de l'épisode fini est dans final_flat / final_minimaps.
+    La vision (messages, boucle d'action, observation) et les minimaps des N mondes sont calculées
+    ensemble (evaluate_worlds, extract_env_minimaps) ; la physique reste propre à chaque monde.
+    Les tableaux renvoyés sont neufs à chaque step (on peut les garder dans un replay buffer),
+    sauf si out = (états plats, minimaps) est donné : ils sont alors écrits dedans à chaque step.
+    """
+    def __init__(self, n_envs, max_steps=1000, grid_size=64, env_fn=None, out=None):
+        self.n_envs = n_envs
+        self.out = out
+        self.max_steps = max_steps
+        self.grid_size = grid_size
+        # Mondes d'entraînement : pas d'historique (env_fn pour en enregistrer un)
+        self.env_fn = env_fn or (lambda: Environment(use_rl=True, record=RECORD_OFF))
+        self.wrappers = [None] * n_envs
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self.returns = np.zeros(n_envs)
+        self.truncated = np.zeros(n_envs, dtype=bool)
+        self.completed = []  # (récompense cumulée, longueur) des épisodes finis
+        self.final_flat = None
+        self.final_minimaps = np.zeros((n_envs, len(channel_names), grid_size, grid_size), dtype=np.float32)
+
+    def _reset_env(self, k):
+        env = self.env_fn()
+        wrapper = self.wrappers[k] = ShooterEnvWrapper(env, env.agents[0])
+        self.steps[k] = 0
+        self.returns[k] = 0.0
+        return wrapper.reset()
+
+    def reset(self):
+        states = [self._reset_env(k) for k in range(self.n_envs)]
+        flat_out, minimap_out = self.out or (None, None)
+        flat = np.stack([f for f, _ in states], out=flat_out)
+        if self.final_flat is None:
+            self.final_flat = np.zeros_like(flat)
+        return flat, np.stack([m for _, m in states], out=minimap_out)
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        if actions.shape != (self.n_envs,):
+            raise ValueError(f"actions doit être de forme ({self.n_envs},), reçu {actions.shape}")
+        wrappers = self.wrappers
+        played = [w.act(int(a)) for w, a in zip(wrappers, actions)]
+        # Env.step en deux phases : la vision du début de tick (messages) est calculée pour
+        # tous les mondes en un appel, avant que l'un d'eux ne bouge
+        envs = [w.env for w in wrappers]
+        evaluate_worlds([env.perception for env in envs for _ in env.agents], [a for env in envs for a in env.agents])
+        for env in envs:
+            env.exchange_messages()
+        for env in envs:
+            env.update_objects()
+        # Vision du premier agent vivant de chaque monde (objets déplacés, aucun agent n'a encore agi) :
+        # un appel pour tous les mondes, la boucle d'action de chacun la lit dans son cache
+        first = [(env, next((a for a in env.agents if a.alive), None)) for env in envs]
+        first = [(env, a) for env, a in first if a is not None]
+        evaluate_worlds([env.perception for env, _ in first], [a for _, a in first])
+        for env in envs:
+            env.run_agents()
+
+        # Vision des N agents sur leurs mondes en un appel, puis même ordre que
+        # ShooterEnvWrapper.step : état plat, minimap, récompense (servis par les caches)
+        evaluate_worlds([w.env.perception for w in wrappers], [w.agent for w in wrappers])
+        flat_out, minimap_out = self.out or (None, None)
+        flat = np.stack([w.get_flat_state() for w in wrappers], out=flat_out)
+        minimaps = extract_env_minimaps([w.env for w in wrappers], [w.agent for w in wrappers],
+                                        grid_size=self.grid_size, out=minimap_out)
+        rewards = np.zeros(self.n_envs, dtype=np.float32)
+        dones = np.zeros(self.n_envs, dtype=bool)
+        for k, (w, action) in enumerate(zip(wrappers, played)):
+            rewards[k], dones[k] = w.reward(action)
+
+        self.steps += 1
+        self.returns += rewards
+        self.truncated = ~dones & (self.steps >= self.max_steps)
+        for k in np.flatnonzero(dones | self.truncated):
+            self.completed.append((float(self.returns[k]), int(self.steps[k])))
+            self.final_flat[k] = flat[k]
+            self.final_minimaps[k] = minimaps[k]
+            flat[k], minimaps[k] = self._reset_env(k)
+        return flat, minimaps, rewards, dones
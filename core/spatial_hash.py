@@ -0,0 +1,131 @@
+import math
+from collections import defaultdict
+
+
+class SpatialHash:
+    """
+    Grille uniforme (hash de cellules) pour les requêtes de voisinage.
+    Chaque entité est rangée dans toutes les cellules couvertes par son disque,
+    les résultats sont rendus dans l'ordre d'insertion (celui de env.agents / env.objects).
+    """
+    def __init__(self, cell_size=10.0):
+        self.cell_size = float(cell_size)
+        self.cells = defaultdict(dict)
+        self._entries = {}  # entité -> [seq, bornes des cellules, etype]
+        self._counts = defaultdict(int)
+        self._seq = 0
+
+    @staticmethod
+    def cell_size_for(entities, factor=4.0, min_size=8.0, max_size=32.0):
+        # Taille de cellule dérivée du rayon médian des entités
+        radii = sorted(e.radius for e in entities)
+        if not radii:
+            return min_size
+        median = radii[len(radii) // 2]
+        return min(max_size, max(min_size, factor * median))
+
+    def _bounds(self, x, y, r):
+        s = self.cell_size
+        return (math.floor((x - r) / s), math.floor((y - r) / s),
+                math.floor((x + r) / s), math.floor((y + r) / s))
+
+    def _add_cells(self, entity, bounds, entry):
+        cx0, cy0, cx1, cy1 = bounds
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells[(cx, cy)][entity] = entry
+
+    def _remove_cells(self, entity, bounds):
+        cx0, cy0, cx1, cy1 = bounds
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is not None:
+                    cell.pop(entity, None)
+                    if not cell:
+                        del self.cells[(cx, cy)]
+
+    def rebuild(self, entities):
+        self.cells.clear()
+        self._entries.clear()
+        self._counts.clear()
+        for e in entities:
+            self.insert(e)
+
+    def insert(self, entity):
+        if entity in self._entries:
+            self.update(entity)
+            return
+        bounds = self._bounds(entity.x, entity.y, entity.radius)
+        entry = [self._seq, bounds, entity.etype]
+        self._entries[entity] = entry
+        self._seq += 1
+        self._counts[entry[2]] += 1
+        self._add_cells(entity, bounds, entry)
+
+    def remove(self, entity):
+        entry = self._entries.pop(entity, None)
+        if entry is None:
+            return
+        self._counts[entry[2]] -= 1
+        self._remove_cells(entity, entry[1])
+
+    def update(self, entity):
+        """ À appeler après un déplacement : ne re-range l'entité que si ses cellules changent """
+        entry = self._entries.get(entity)
+        if entry is None:
+            self.insert(entity)
+            return
+        bounds = self._bounds(entity.x, entity.y, entity.radius)
+        if bounds != entry[1]:
+            self._remove_cells(entity, entry[1])
+            self._add_cells(entity, bounds, entry)
+            entry[1] = bounds
+
+    def count(self, etype):
+        return self._counts.get(etype, 0)
+
+    def query_radius(self, x, y, r, etype_mask=None):
+        """
+        Entités dont le disque intersecte le cercle (x, y, r), triées par ordre d'insertion.
+        C'est un sur-ensemble des tests exacts faits par les appelants (tolérance 1e-9).
+        """
+        found = {}
+        cx0, cy0, cx1, cy1 = self._bounds(x, y, r)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self.cells.get((cx, cy))
+                if not cell:
+                    continue
+                for e, entry in cell.items():
+                    if e in found:
+                        continue
+                    if etype_mask is not None and entry[2] not in etype_mask:
+                        continue
+                    if math.hypot(e.x - x, e.y - y) <= r + e.radius + 1e-9:
+                        found[e] = entry[0]
+        return sorted(found, key=found.__getitem__)
+
+    def query_pairs(self, r, etype_mask_a=None, etype_mask_b=None):
+        """
+        Paires (a, b) dont les disques sont à moins de r l'un de l'autre.
+        Avec un seul masque, chaque paire n'est rendue qu'une fois.
+        """
+        symmetric = etype_mask_b is None
+        if symmetric:
+            etype_mask_b = etype_mask_a
+        pairs = []
+        for a, (seq_a, _, etype_a) in sorted(self._entries.items(), key=lambda kv: kv[1][0]):
+            if etype_mask_a is not None and etype_a not in etype_mask_a:
+                continue
+            for b in self.query_radius(a.x, a.y, r + a.radius, etype_mask_b):
+                if b is a or (symmetric and self._entries[b][0] < seq_a):
+                    continue
+                pairs.append((a, b))
+        return pairs
+
+    def __contains__(self, entity):
+        return entity in self._entries
+
+    def __len__(self):
+        return len(self._entries)
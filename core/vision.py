@@ -1,6 +1,7 @@
 import math
 
 from core.agents.agent import Agent
+from core.vision_engine import visible_objects
 
 class Vision:
     def __init__(self):
@@ -9,4 +10,8 @@ class Vision:
        
         return agent.get_vision(objects)
 
+    def get_visible_batch(self, agents, objects, occlusion=None):
+        # Une seule passe vectorisée pour tous les agents (positions / types partagés)
+        return visible_objects(agents, list(objects), occlusion)
+
     
@@ -0,0 +1,209 @@
+import numpy as np
+from core.entity_store import etype_code, gather
+from core.entity_types import EntityType
+from core.occlusion import segments_blocked
+from core.utils import is_blocked_by_wall
+
+# Tolérance absolue : en dessous, le test vectorisé est refait en scalaire
+# pour garantir exactement les mêmes résultats que la version objet par objet.
+_TOL = 1e-7
+
+AGENT = etype_code(EntityType.AGENT)
+WALL = etype_code(EntityType.WALL)
+SMOKE = etype_code(EntityType.SMOKE)
+JAMMER = etype_code(EntityType.JAMMER)
+
+
+class EntityArrays:
+    """
+    Colonnes NumPy (position, rayon, type, état) d'une liste d'entités, lues en une fois
+    dans l'EntityStore à partir des ids. etype contient les codes entiers du store.
+    """
+    __slots__ = ("objects", "ids", "x", "y", "radius", "alive", "cloaked", "etype", "index")
+
+    def __init__(self, objects):
+        n = len(objects)
+        self.objects = objects
+        self.ids, (self.x, self.y, self.radius, self.alive, self.etype) = gather(
+            objects, ("x", "y", "radius", "alive", "etype"))
+        # Seuls les agents peuvent être camouflés
+        self.cloaked = np.zeros(n, dtype=bool)
+        for i in np.flatnonzero(self.etype == AGENT):
+            self.cloaked[i] = getattr(objects[i], "cloaked", False)
+        self.index = {id(o): i for i, o in enumerate(objects)}
+
+    def __len__(self):
+        return len(self.objects)
+
+    @classmethod
+    def concat(cls, parts):
+        """ Colonnes de plusieurs listes d'entités mises bout à bout (sans relire le store) """
+        arrays = cls.__new__(cls)
+        arrays.objects = [o for p in parts for o in p.objects]
+        for name in ("ids", "x", "y", "radius", "alive", "cloaked", "etype"):
+            setattr(arrays, name, np.concatenate([getattr(p, name) for p in parts]))
+        arrays.index = _ChainedIndex([p.index for p in parts])
+        return arrays
+
+
+class _ChainedIndex:
+    # Index id(objet) -> position des colonnes concaténées, sans fusionner les dictionnaires
+    __slots__ = ("parts",)
+
+    def __init__(self, indexes):
+        offsets = np.cumsum([0] + [len(index) for index in indexes[:-1]]).tolist()
+        self.parts = list(zip(indexes, offsets))
+
+    def get(self, key, default=None):
+        for index, offset in self.parts:
+            i = index.get(key)
+            if i is not None:
+                return i + offset
+        return default
+
+
+def _angle_diff(a, b):
+    return (a - b + np.pi) % (2 * np.pi) - np.pi
+
+
+def _exact_dist(agent, obj):
+    return np.linalg.norm(np.array([obj.x, obj.y]) - np.array([agent.x, agent.y]))
+
+
+def _within(dist, limit, agent, objects, idx):
+    """ dist <= limit, avec recalcul scalaire exact pour les cas limites """
+    ok = dist <= limit
+    near = np.abs(dist - limit) <= _TOL
+    for i in np.flatnonzero(near):
+        ok[i] = _exact_dist(agent, objects[idx[i]]) <= limit[i]
+    return ok
+
+
+def _scalar_visible(agent, obj, walls, effective_range, fov):
+    # Reprise exacte du test de la deuxième passe pour un seul objet
+    vec = np.array([obj.x, obj.y]) - np.array([agent.x, agent.y])
+    if np.linalg.norm(vec) > effective_range:
+        return False
+    if is_blocked_by_wall(agent, obj, walls):
+        return False
+    if getattr(obj, "cloaked", False):
+        return False
+    direction = np.arctan2(vec[1], vec[0])
+    return abs(_angle_diff(direction, agent.facing_angle)) <= fov / 2
+
+
+def visible_indices(observers, arrays, occlusion=None, groups=None):
+    """
+    Vision de plusieurs agents sur le même ensemble d'entités.
+    Mêmes règles que Agent.get_vision : pénalité de fumée, brouillage (jammer),
+    occlusion par les murs, camouflage et cône de vision.
+    occlusion (WallOcclusion) n'est utilisée que si ses murs sont exactement ceux de la liste.
+    groups : (monde de chaque observateur, monde de chaque entité) pour plusieurs mondes mis
+    bout à bout (EntityArrays.concat) ; un observateur ne voit alors que son monde, occlusion
+    est la liste des WallOcclusion de chaque monde.
+    Met à jour agent.effective_range / effective_fov et retourne, pour chaque agent,
+    le tableau trié des indices visibles dans arrays.objects.
+    """
+    objects = arrays.objects
+    results = []
+    if not observers:
+        return results
+
+    ax = np.array([a.x for a in observers], dtype=np.float64)
+    ay = np.array([a.y for a in observers], dtype=np.float64)
+    dx = arrays.x[None, :] - ax[:, None]
+    dy = arrays.y[None, :] - ay[:, None]
+    dist = np.sqrt(dx * dx + dy * dy)
+    angles = np.arctan2(dy, dx)
+
+    alive = arrays.alive
+    is_wall = alive & (arrays.etype == WALL)
+    smoke_idx = np.flatnonzero(alive & (arrays.etype == SMOKE))
+    jammer_idx = np.flatnonzero(alive & (arrays.etype == JAMMER))
+    wall_idx = np.flatnonzero(is_wall)
+    base_mask = alive & ~arrays.cloaked
+
+    # Murs de chaque monde (un seul monde sans groups)
+    n = len(observers)
+    if groups is None:
+        obs_group, obj_group = np.zeros(n, dtype=np.intp), None
+        occlusions = [occlusion]
+    else:
+        obs_group, obj_group = groups
+        occlusions = list(occlusion) if occlusion is not None else [None] * (int(obs_group.max()) + 1)
+    world_walls = []
+    for g, occ in enumerate(occlusions):
+        w_idx = wall_idx if obj_group is None else wall_idx[obj_group[wall_idx] == g]
+        walls = [objects[i] for i in w_idx]
+        if occ is not None and not occ.matches(walls):
+            occ = None
+        world_walls.append((w_idx, walls, occ))
+
+    # Première passe, agent par agent : brouillage puis pénalités de fumée (dans l'ordre des objets)
+    jammed = [None] * n
+    rng = np.empty(n)
+    half_fov = np.empty(n)
+    facing = np.empty(n)
+    self_i = np.full(n, -1, dtype=np.intp)
+    for k, agent in enumerate(observers):
+        agent.effective_range = agent.range
+        agent.effective_fov = agent.fov
+        d = dist[k]
+        jammers, smokes = jammer_idx, smoke_idx
+        if obj_group is not None:
+            jammers = jammer_idx[obj_group[jammer_idx] == obs_group[k]]
+            smokes = smoke_idx[obj_group[smoke_idx] == obs_group[k]]
+        if len(jammers):
+            hit = _within(d[jammers], arrays.radius[jammers], agent, objects, jammers)
+            if hit.any():
+                agent.effective_range = 0
+                jammed[k] = jammers[hit][:1]
+        if jammed[k] is None and len(smokes):
+            hit = _within(d[smokes], arrays.radius[smokes], agent, objects, smokes)
+            for i in smokes[hit]:
+                agent.effective_range *= objects[i].get_vision_penalty()
+        rng[k] = agent.effective_range
+        half_fov[k] = agent.effective_fov / 2
+        facing[k] = agent.facing_angle
+        self_i[k] = arrays.index.get(id(agent), -1)
+
+    # Deuxième passe, tous les agents ensemble : portée, cône, camouflage puis occlusion
+    mask = np.broadcast_to(base_mask, dist.shape).copy()
+    if obj_group is not None:
+        mask &= obj_group[None, :] == obs_group[:, None]
+    own = np.flatnonzero(self_i >= 0)
+    mask[own, self_i[own]] = False
+    mask[[k for k in range(n) if jammed[k] is not None]] = False
+    delta = np.abs(_angle_diff(angles, facing[:, None]))
+
+    certain = mask & (dist <= (rng - _TOL)[:, None]) & (delta <= (half_fov - _TOL)[:, None])
+    unsure = mask & ~certain & (dist <= (rng + _TOL)[:, None]) & (delta <= (half_fov + _TOL)[:, None])
+
+    pk, pi = np.nonzero(certain & (arrays.etype != WALL)[None, :])
+    for g, (w_idx, walls, occ) in enumerate(world_walls):
+        if obj_group is not None:
+            sel = np.flatnonzero(obs_group[pk] == g)
+            gk, gi = pk[sel], pi[sel]
+        else:
+            gk, gi = pk, pi
+        tx, ty = arrays.x[gi], arrays.y[gi]
+        if occ is not None:
+            blocked = occ.blocked_batch(ax[gk], ay[gk], tx, ty)
+        else:
+            blocked = segments_blocked(ax[gk], ay[gk], tx, ty, arrays.x[w_idx], arrays.y[w_idx], arrays.radius[w_idx])
+        certain[gk[blocked], gi[blocked]] = False
+
+    for k, i in zip(*np.nonzero(unsure)):
+        agent = observers[k]
+        walls = world_walls[obs_group[k]][1]
+        certain[k, i] = _scalar_visible(agent, objects[i], walls, agent.effective_range, agent.effective_fov)
+
+    for k in range(n):
+        results.append(jammed[k] if jammed[k] is not None else np.flatnonzero(certain[k]))
+    return results
+
+
+def visible_objects(observers, objects, occlusion=None):
+    """ Variante qui retourne directement les listes d'objets visibles """
+    arrays = EntityArrays(objects)
+    return [[objects[i] for i in idx] for idx in visible_indices(observers, arrays, occlusion)]
@@ -1,15 +1,41 @@
 # main.py
 import json
-from core.environment import Environment
+import os
+from core.environment import RECORD_FULL, RECORD_OFF, Environment
+from core.binary_replay import convert_replay
+from core.frame_writer import FrameWriter
 from core.rl.env_wrapper import ShooterEnvWrapper
 from core.rl.q_learning import QLearningAgent
 import sys
 
-def run_simulation():
-    env = Environment()
-    env.run(steps=1000)
-    env.export(path="viewer/data/output.json")
-    print("✅ Simulation terminée : fichier exporté dans data/output.json")
+def run_simulation(policy_path=None):
+    # Frames écrites au fil du run (JSON Lines), lisibles même si le run est interrompu
+    writer = FrameWriter("viewer/data/output.jsonl")
+    if policy_path is None:
+        env = Environment(writer=writer)
+        env.run(steps=1000)
+    else:
+        # Agent RL piloté par une policy figée (core.rl.export), sans entraînement
+        from core.rl.export import load_policy
+        from core.rl.inference import PolicyInference, torch_policy
+
+        env = Environment(use_rl=True, writer=writer)
+        wrapper = ShooterEnvWrapper(env, env.agents[0])
+        inference = PolicyInference(torch_policy(load_policy(policy_path)), len(env.agents[0].action_space))
+        flat_state, minimap = wrapper.reset()
+        for _ in range(1000):
+            action = inference.act(flat_state[None], minimap[None])[0]
+            flat_state, minimap, _, done = wrapper.step(action)
+            if done:
+                break
+    writer.close()
+    print("✅ Simulation terminée : frames écrites dans viewer/data/output.jsonl")
+
+def export_replay(writer, episode_id):
+    # Épisode écrit en JSON Lines pendant le run (lisible après un crash), converti en replay binaire une fois fini
+    writer.close()
+    convert_replay(writer.path, f"viewer/data/{episode_id}.replay")
+    os.remove(writer.path)
   
 def train_rl():
     rl_agent = QLearningAgent(n_states=5, n_actions=9)
@@ -19,7 +45,11 @@ def train_rl():
     available_episodes = []
     
     for episode in range(20):
-        env = Environment(use_rl=True)
+        # Historique enregistré pour les seuls épisodes exportés
+        exported = (episode + 1) % episodes_to_export == 0
+        episode_id = f"episode_{episode + 1}"
+        writer = FrameWriter(f"viewer/data/{episode_id}.jsonl") if exported else None
+        env = Environment(use_rl=True, record=RECORD_FULL if exported else RECORD_OFF, writer=writer)
         wrapper = ShooterEnvWrapper(env, env.agents[0])
         state = wrapper.reset()
         
@@ -35,11 +65,11 @@ def train_rl():
         print(f"Épisode {episode + 1} terminé.")
 
         # Sauvegarde les épisodes intéressants
-        if (episode + 1)%episodes_to_export==0:
-            episode_id = f"episode_{episode + 1}"
-            env.export(path=f"viewer/data/{episode_id}.json")
+        if exported:
+            export_replay(writer, episode_id)
             available_episodes.append({
                 "id": episode_id,
+                "file": f"{episode_id}.replay",
                 "name": f"Episode {episode + 1} - {'Entrainement' if episode + 1 < 300 else 'Combat'}"
             })
             print(f"Épisode {episode + 1} exporté.")
@@ -50,20 +80,28 @@ def train_rl():
     
     print("🏁 Entraînement RL terminé.")
 
-def train_dqn():
+def train_dqn(replay_path=None):
 
     from core.rl.trainers.train_dqn import DQNTrainer
     from core.rl.env_wrapper import ShooterEnvWrapper
     from core.environment import Environment
+    from core.rl.replay_buffer import MemmapReplayBuffer
+    from core.obs_codec import MinimapCodec
 
-    trainer = DQNTrainer(state_dim=20*5+7, action_dim=13)
+    # replay_path : replay sur disque, minimaps codées (reprend celui d'un entraînement précédent)
+    replay_buffer = MemmapReplayBuffer(replay_path, capacity=200_000, codec=MinimapCodec()) if replay_path else None
+    trainer = DQNTrainer(state_dim=20*5+7, action_dim=13, replay_buffer=replay_buffer)
     episodes_to_export = 20  # Épisodes à exporter
     
     # Liste des épisodes disponibles pour l'interface
     available_episodes = []
 
     for episode in range(500):
-        env = Environment(use_rl=True)
+        # Historique enregistré pour les seuls épisodes exportés
+        exported = (episode + 1) % episodes_to_export == 0
+        episode_id = f"episode_{episode + 1}"
+        writer = FrameWriter(f"viewer/data/{episode_id}.jsonl") if exported else None
+        env = Environment(use_rl=True, record=RECORD_FULL if exported else RECORD_OFF, writer=writer)
         wrapper = ShooterEnvWrapper(env, env.agents[0])
         flat_state,minimap = wrapper.reset()
 
@@ -80,12 +118,14 @@ def train_dqn():
             
             
         print(f"✅ Episode {episode + 1} done")
+        if replay_buffer is not None:
+            replay_buffer.flush()
         # Sauvegarde les épisodes intéressants
-        if (episode + 1)%episodes_to_export==0:
-            episode_id = f"episode_{episode + 1}"
-            env.export(path=f"viewer/data/{episode_id}.json")
+        if exported:
+            export_replay(writer, episode_id)
             available_episodes.append({
                 "id": episode_id,
+                "file": f"{episode_id}.replay",
                 "name": f"Episode {episode + 1} - {'Entrainement' if episode + 1 < 5000 else 'Combat'}"
             })
             print(f"Épisode {episode + 1} exporté.")
@@ -96,15 +136,81 @@ def train_dqn():
     
     print("🏁 Entraînement DQN terminé.")
 
+def train_dqn_vec(n_envs=8, episodes=500):
+
+    from core.rl.trainers.train_dqn import DQNTrainer
+    from core.rl.vec_env import VecShooterEnv
+
+    trainer = DQNTrainer(state_dim=20*5+7, action_dim=13)
+    trainer.start_prefetch()
+    vec_env = VecShooterEnv(n_envs, max_steps=1000)
+    flat_states, minimaps = vec_env.reset()
+
+    while len(vec_env.completed) < episodes:
+        n_done = len(vec_env.completed)
+        actions = trainer.select_actions(flat_states, minimaps)
+        next_states, next_minimaps, rewards, dones = vec_env.step(actions)
+        ended = dones | vec_env.truncated
+        for k in range(n_envs):
+            # Épisode relancé : la transition finit sur le dernier état de l'ancien épisode
+            if ended[k]:
+                next_state, next_minimap = vec_env.final_flat[k], vec_env.final_minimaps[k]
+            else:
+                next_state, next_minimap = next_states[k], next_minimaps[k]
+            trainer.replay_buffer.push(flat_states[k], minimaps[k], actions[k], rewards[k], next_state, next_minimap, dones[k],
+                                       stream=k)
+            trainer.train_step()
+        for episode in range(n_done, len(vec_env.completed)):
+            total, length = vec_env.completed[episode]
+            print(f"✅ Episode {episode + 1} done ({length} steps, récompense {total:.1f})")
+        flat_states, minimaps = next_states, next_minimaps
+
+    trainer.stop_prefetch()
+    # Policy figée pour run_simulation / les workers (python main.py simulation data/policy.pt)
+    from core.rl.export import export_policy
+    export_policy(trainer.q_net, "data/policy.pt")
+    timing = trainer.timing_report()
+    print(f"⏱️ train_step : attente des données {timing['data_ms']:.2f} ms, calcul {timing['compute_ms']:.2f} ms"
+          f" ({timing['stalled']:.0%} du temps à attendre)")
+    print("🏁 Entraînement DQN vectorisé terminé.")
+
+def train_dqn_async(n_actors=2, envs_per_actor=4):
+
+    from core.rl.trainers.actor_learner import train_actor_learner
+
+    _, stats = train_actor_learner(n_actors=n_actors, envs_per_actor=envs_per_actor, total_steps=500 * 1000)
+    print(f"🏁 Entraînement DQN acteurs / learner terminé : {stats['actor_steps']} pas, {stats['updates']} mises à jour"
+          f" ({stats['actor_steps_per_s']:.1f} pas/s, {stats['updates_per_s']:.1f} mises à jour/s)")
+
+def convert_replays():
+    # Épisodes JSON de viewer/data -> replays binaires, référencés dans available_episodes.json
+    with open("viewer/data/available_episodes.json") as f:
+        available_episodes = json.load(f)
+    for episode in available_episodes:
+        source = f"viewer/data/{episode['id']}.json"
+        if episode.get("file", "").endswith(".replay") or not os.path.exists(source):
+            continue
+        convert_replay(source, f"viewer/data/{episode['id']}.replay")
+        episode["file"] = f"{episode['id']}.replay"
+        print(f"Épisode {episode['id']} converti.")
+    with open("viewer/data/available_episodes.json", "w") as f:
+        json.dump(available_episodes, f)
+
 
 if __name__ == "__main__":
     mode = sys.argv[1] if len(sys.argv) > 1 else "simulation"
 
     if mode == "simulation":
-        run_simulation()
+        run_simulation(sys.argv[2] if len(sys.argv) > 2 else None)
     elif mode == "train_rl":
         train_rl()
     elif mode == "train_dqn":
-        train_dqn()
+        train_dqn(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif mode == "train_dqn_vec":
+        train_dqn_vec()
+    elif mode == "train_dqn_async":
+        train_dqn_async()
+    elif mode == "convert_replays":
+        convert_replays()
     else:
         print("❌ Mode inconnu. Utilise 'simulation' ou 'train_rl'")
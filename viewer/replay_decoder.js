@@ -0,0 +1,155 @@
+// Decoder for the binary replay format written by core/binary_replay.py (BinaryReplayWriter).
+// Layout (little-endian): 32-byte header, frames, JSON metadata, u64 frame-offset index.
+class BinaryReplay {
+    constructor(buffer) {
+        this.buffer = buffer;
+        this.view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        const version = this.view.getUint16(4, true);
+        if (magic !== 'MATR' || version !== 1) {
+            throw new Error('Not a binary replay (version 1)');
+        }
+        this.length = this.view.getUint32(8, true);
+        this.keyframeEvery = this.view.getUint32(12, true);
+        const metaOffset = Number(this.view.getBigUint64(16, true));
+        const indexOffset = Number(this.view.getBigUint64(24, true));
+
+        const meta = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, metaOffset, indexOffset - metaOffset)));
+        this.kinds = meta.kinds;
+        this.statics = meta.statics;
+        this.strings = meta.strings;
+        this.offsets = [];
+        for (let t = 0; t < this.length; t++) {
+            this.offsets.push(Number(this.view.getBigUint64(indexOffset + 8 * t, true)));
+        }
+        this.cursor = null; // { t, state } of the last decoded frame
+    }
+
+    static isReplay(buffer) {
+        return buffer.byteLength >= 4 && String.fromCharCode(...new Uint8Array(buffer, 0, 4)) === 'MATR';
+    }
+
+    float32Array(offset, count) {
+        // Copy: frame blocks are not 4-byte aligned in the file
+        return new Float32Array(this.buffer.slice(offset, offset + 4 * count));
+    }
+
+    typed(kind, values) {
+        const obj = {};
+        kind.forEach(([name, code], f) => {
+            const value = values[f];
+            if (code === 's') obj[name] = this.strings[value];
+            else if (code === 'j') obj[name] = JSON.parse(this.strings[value]);
+            else if (code === 'n') obj[name] = null;
+            else if (code === 'b') obj[name] = value !== 0;
+            else if (code === 'i') obj[name] = Math.round(value);
+            else obj[name] = value;
+        });
+        return obj;
+    }
+
+    nested(flat) {
+        // agent.x, facing.angle, action.type -> { agent: { x }, facing: { angle }, action: { type } }
+        const entry = {};
+        for (const [key, value] of Object.entries(flat)) {
+            const dot = key.indexOf('.');
+            if (dot < 0) {
+                entry[key] = value;
+            } else {
+                const head = key.slice(0, dot);
+                entry[head] = entry[head] || {};
+                entry[head][key.slice(dot + 1)] = value;
+            }
+        }
+        return entry;
+    }
+
+    decode(t, state) {
+        const view = this.view;
+        let pos = this.offsets[t];
+        const keyframe = view.getUint8(pos) === 1;
+        const nBlocks = view.getUint16(pos + 1, true);
+        pos += 3;
+
+        const objects = this.statics
+            .filter(([, first, last]) => first <= t && t <= last)
+            .map(([obj]) => ({ ...obj }));
+        const newState = new Map();
+
+        for (let b = 0; b < nBlocks; b++) {
+            const kindId = view.getUint16(pos, true);
+            const flags = view.getUint16(pos + 2, true);
+            const n = view.getUint32(pos + 4, true);
+            const mask = view.getUint32(pos + 8, true);
+            pos += 12;
+            const kind = this.kinds[kindId];
+            const previous = state.get(kindId) || { ids: new Uint32Array(0), values: [] };
+
+            let ids = previous.ids;
+            if (!(flags & 1)) {
+                ids = new Uint32Array(this.buffer.slice(pos, pos + 4 * n));
+                pos += 4 * n;
+            }
+
+            // Start from the previous decoded values of each entity (zeros on keyframes / new entities)
+            const rowOf = new Map();
+            if (!keyframe) previous.ids.forEach((id, r) => rowOf.set(id, r));
+            const values = Array.from(ids, id => rowOf.has(id) ? Float32Array.from(previous.values[rowOf.get(id)])
+                                                                : new Float32Array(kind.length));
+            for (let f = 0; f < kind.length; f++) {
+                if ((mask >>> f) & 1) {
+                    const column = this.float32Array(pos, n);
+                    for (let r = 0; r < n; r++) values[r][f] += column[r];
+                    pos += 4 * n;
+                }
+            }
+            newState.set(kindId, { ids, values });
+            values.forEach(row => objects.push(this.typed(kind, row)));
+        }
+
+        const nAgents = view.getUint16(pos, true);
+        pos += 2;
+        const agents = [];
+        for (let a = 0; a < nAgents; a++) {
+            const kind = this.kinds[view.getUint16(pos, true)];
+            const row = this.float32Array(pos + 2, kind.length);
+            pos += 2 + 4 * kind.length;
+            const nVisible = view.getUint16(pos, true);
+            pos += 2;
+            let visible;
+            if (nVisible === 0xFFFF) {
+                visible = objects.map((_, i) => i);
+            } else {
+                visible = [];
+                for (let i = 0; i < nVisible; i++) visible.push(view.getUint16(pos + 2 * i, true));
+                pos += 2 * nVisible;
+            }
+            const entry = this.nested(this.typed(kind, row));
+            entry.visible = visible;
+            agents.push(entry);
+        }
+        return { frame: { objects, agents }, state: newState };
+    }
+
+    frame(t) {
+        // Random access: decode from the previous keyframe (or continue from the last frame)
+        let start = t - (t % this.keyframeEvery);
+        let state = new Map();
+        if (this.cursor && this.cursor.t === t - 1 && t % this.keyframeEvery !== 0) {
+            start = t;
+            state = this.cursor.state;
+        }
+        let frame = null;
+        for (let i = start; i <= t; i++) {
+            ({ frame, state } = this.decode(i, state));
+        }
+        this.cursor = { t, state };
+        return frame;
+    }
+
+    frames() {
+        const frames = [];
+        for (let t = 0; t < this.length; t++) frames.push(this.frame(t));
+        return frames;
+    }
+}
@@ -208,8 +208,7 @@ class SimulationViewer {
 
     async loadData() {
         try {
-            const response = await fetch(`../data/${this.currentEpisode}.json`);
-            this.frames = await response.json();
+            this.frames = (await this.fetchFrames(this.currentEpisode)).map(frame => this.normalizeFrame(frame));
             this.frameIndex = 0;
             this.trajectories.clear();
             this.updateFrameInfo();
@@ -225,11 +224,54 @@ class SimulationViewer {
         }
     }
 
+    async fetchFrames(episodeId) {
+        // Binary replay (replay_decoder.js) first, then streamed .jsonl, then the JSON array export
+        const episode = this.availableEpisodes.find(e => e.id === episodeId);
+        const files = episode && episode.file ? [episode.file]
+            : [`${episodeId}.replay`, `${episodeId}.jsonl`, `${episodeId}.json`];
+        for (const file of files) {
+            const response = await fetch(`../data/${file}`);
+            if (!response.ok) continue;
+            if (file.endsWith('.replay')) {
+                return new BinaryReplay(await response.arrayBuffer()).frames();
+            }
+            const text = await response.text();
+            return file.endsWith('.jsonl') ? this.parseJsonLines(text) : JSON.parse(text);
+        }
+        throw new Error(`No replay file found for ${episodeId}`);
+    }
+
+    parseJsonLines(text) {
+        // A truncated last line (interrupted run) is skipped
+        const frames = [];
+        for (const line of text.split('\n')) {
+            if (!line) continue;
+            try {
+                frames.push(JSON.parse(line));
+            } catch (error) {
+                break;
+            }
+        }
+        return frames;
+    }
+
+    normalizeFrame(frame) {
+        // Frame format: { objects: [...], agents: [{ agent, facing, action, visible: [object indices] }] }
+        if (!Array.isArray(frame)) return frame;
+
+        // Legacy format: list of agent views, each with its own copy of every live object
+        // (objects have no id: the last view is the frame's table, every agent sees all of it)
+        const objects = frame.length ? frame[frame.length - 1].visible : [];
+        const all = objects.map((_, i) => i);
+        const agents = frame.map(agentView => ({ ...agentView, visible: all }));
+        return { objects, agents };
+    }
+
     calculateTrajectories() {
         // Calculate trajectories for all agents
         for (let i = 0; i < this.frames.length; i++) {
             const frame = this.frames[i];
-            frame.forEach(agentView => {
+            frame.agents.forEach(agentView => {
                 const agent = agentView.agent;
                 if (!this.trajectories.has(agent.id)) {
                     this.trajectories.set(agent.id, []);
@@ -525,8 +567,35 @@ class SimulationViewer {
         let totalHealth = 0;
         let totalEnergy = 0;
 
+        // Objects seen by the selected agent
+        const selectedView = this.selectedAgent &&
+            frame.agents.find(agentView => agentView.agent.id === this.selectedAgent.id);
+        const seen = new Set(selectedView ? selectedView.visible : []);
+
+        // Draw the frame's objects once
+        frame.objects.forEach((obj, index) => {
+            if (obj.alive !== false) {
+                objectsCount++;
+                const objColor = this.colorMap[obj.type] || '#ffffff';
+                this.drawEntity(obj, objColor);
+
+                if (obj.facing) {
+                    this.drawDirection(obj.x, obj.y, obj.facing.angle, obj.facing.fov || 0, obj.facing.length || 10, objColor);
+                }
+
+                // Draw health for enemies
+                if (obj.health !== undefined) {
+                    this.drawHealthBar(obj.x, obj.y, obj.radius || 1, obj.health, obj.maxHealth || 100);
+                }
+
+                if (seen.has(index)) {
+                    this.drawVisibilityMarker(obj);
+                }
+            }
+        });
+
         // Draw all agent views
-        frame.forEach((agentView, i) => {
+        frame.agents.forEach((agentView, i) => {
             const agent = agentView.agent;
             const facing = agentView.facing;
             const color = this.agentColors[i % this.agentColors.length];
@@ -546,24 +615,6 @@ class SimulationViewer {
             if (facing) {
                 this.drawDirection(facing.x, facing.y, facing.angle, facing.fov, facing.length, color);
             }
-
-            // Draw visible objects
-            agentView.visible.forEach(obj => {
-                if (obj.alive !== false) {
-                    objectsCount++;
-                    const objColor = this.colorMap[obj.type] || '#ffffff';
-                    this.drawEntity(obj, objColor);
-
-                    if (obj.facing) {
-                        this.drawDirection(obj.x, obj.y, obj.facing.angle, obj.facing.fov || 0, obj.facing.length || 10, objColor);
-                    }
-
-                    // Draw health for enemies
-                    if (obj.health !== undefined) {
-                        this.drawHealthBar(obj.x, obj.y, obj.radius || 1, obj.health, obj.maxHealth || 100);
-                    }
-                }
-            });
         });
 
         // Update stats
@@ -577,6 +628,21 @@ class SimulationViewer {
         }
     }
 
+    drawVisibilityMarker(entity) {
+        // Dashed ring around an object seen by the selected agent
+        const x = (entity.x + this.panOffset.x) * this.scale;
+        const y = (entity.y + this.panOffset.y) * this.scale;
+        const radius = ((entity.radius || 1) + 2) * this.scale;
+
+        this.ctx.beginPath();
+        this.ctx.arc(x, y, radius, 0, 2 * Math.PI);
+        this.ctx.setLineDash([3, 3]);
+        this.ctx.strokeStyle = '#ffffff';
+        this.ctx.lineWidth = 1;
+        this.ctx.stroke();
+        this.ctx.setLineDash([]);
+    }
+
     drawTooltip(entity) {
             const canvasX = (entity.x + this.panOffset.x) * this.scale + 15;
             const canvasY = (entity.y + this.panOffset.y) * this.scale - 15;
@@ -625,7 +691,7 @@ class SimulationViewer {
         // Check if mouse is over any entity
         this.hoveredEntity = null;
 
-        for (const agentView of frame) {
+        for (const agentView of frame.agents) {
             // Check agent
             const agent = agentView.agent;
             const distance = Math.sqrt((x - agent.x) ** 2 + (y - agent.y) ** 2);
@@ -634,9 +700,11 @@ class SimulationViewer {
                 this.canvas.style.cursor = 'pointer';
                 break;
             }
+        }
 
-            // Check visible objects
-            for (const obj of agentView.visible) {
+        // Check objects
+        if (!this.hoveredEntity) {
+            for (const obj of frame.objects) {
                 const objDistance = Math.sqrt((x - obj.x) ** 2 + (y - obj.y) ** 2);
                 if (objDistance < (obj.radius || 1)) {
                     this.hoveredEntity = obj;
@@ -644,8 +712,6 @@ class SimulationViewer {
                     break;
                 }
             }
-
-            if (this.hoveredEntity) break;
         }
 
         if (!this.hoveredEntity) {